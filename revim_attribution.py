@@ -0,0 +1,193 @@
+import argparse
+import json
+import math
+import sys
+import time
+
+import numpy as np
+
+from revim_batch import encode_response, evaluate_batch
+from revim_model import CATEGORY_INPUT_SLOTS
+from revim_schema import OPTION_MAPS, PERIODS_PER_YEAR, SENSITIVITY_KEYS, SLOT_INDEX, SLOTS
+
+# --- Per-question attribution ---
+# Which answers move a response's NRUPV (and decision margin NRUPV - OCAU - sunk-cost
+# adjustment) the most. Two views, both from one batch of model runs:
+#
+#   step deltas: every Likert item, weight and future-expectation dropdown moved one step up
+#                and one step down (one answer level; the neighbouring option for dropdowns)
+#                with everything else unchanged. Answers at the end of their scale have no
+#                step beyond it (NaN).
+#   Shapley:     each group's effect, i.e. the change from answering the group's questions at
+#                all versus leaving them at their defaults (the unanswered questionnaire), split
+#                exactly among its answers. Groups are the utility/cost categories (their
+#                questions, weight and future expectation) and the discounting, alternative
+#                partner and sunk-cost questions. Every subset of a group's answers is evaluated,
+#                2^n runs for n answers, which the batch engine does in one go.
+#
+# N/A answers are not moved and get no contribution.
+#
+#   python revim_attribution.py response.json --top 15
+
+FUTURE_LEVELS = np.array(sorted(set(OPTION_MAPS["en"]["future"][0].values()))) # Most negative to most positive
+ATTRIBUTED_KINDS = ("likert", "number", "weight", "future")
+SLOT_DEFAULTS = np.array([float(default) for _, _, default in SLOTS]) # Encoded value of an unanswered question
+
+
+def _attribution_groups():
+    groups = {}
+    for cat_key, slots in CATEGORY_INPUT_SLOTS.items():
+        groups[cat_key] = sorted(slot for slot in slots if SLOTS[slot][1] in ATTRIBUTED_KINDS)
+    groups["discount"] = [SLOT_INDEX[k] for k in ("Q_risk_breakup_A_1", "Q_certainty_future_A_3", "Q_adapt_solve_B_3",
+                                                  "Q_adapt_stress_B_4", "Q_adapt_learn_hist_B_5")]
+    groups["alternative"] = [SLOT_INDEX["Q_alt_partner_likelihood_4"]]
+    groups["sunk_cost"] = [SLOT_INDEX["Q_sunk_cost_influence_4"], SLOT_INDEX["Q_sunk_cost_worry_5"]]
+    return groups
+
+
+ATTRIBUTION_GROUPS = _attribution_groups()
+SLOT_GROUP = {slot: group for group, slots in ATTRIBUTION_GROUPS.items() for slot in slots}
+
+
+def _step(kind, value, direction):
+    # The answer one step up (direction 1) or down (-1), or None past the end of the scale
+    if kind == "future":
+        level = int(np.abs(FUTURE_LEVELS - value).argmin()) + direction
+        return float(FUTURE_LEVELS[level]) if 0 <= level < len(FUTURE_LEVELS) else None
+    stepped = value + direction
+    return stepped if 1 <= stepped <= 7 else None
+
+
+class AttributionResult:
+    # rows: one dict per attributed answer with "item" (data_vars key), "kind", "group", "value"
+    # (NaN for N/A), "nrupv_up" / "nrupv_down" / "margin_up" / "margin_down" (change after one step)
+    # and "shapley_nrupv" / "shapley_margin" (share of the group's effect)
+    def __init__(self, rows, nrupv, margin, group_effects, runs, elapsed):
+        self.rows = rows
+        self.nrupv = nrupv
+        self.margin = margin
+        self.group_effects = group_effects # group -> (NRUPV effect, margin effect), the Shapley totals
+        self.runs = runs
+        self.elapsed = elapsed
+
+    # The n answers with the largest one-step effect on "nrupv" or "margin"
+    def top(self, n=10, of="nrupv"):
+        def size(row):
+            steps = [abs(row[f"{of}_{side}"]) for side in ("up", "down") if row[f"{of}_{side}"] == row[f"{of}_{side}"]]
+            return max(steps, default=0.0)
+        return sorted(self.rows, key=size, reverse=True)[:n]
+
+    def format_table(self, rows=None):
+        rows = self.top(len(self.rows)) if rows is None else rows
+        width = max([len(row["item"]) for row in rows] + [4])
+        lines = [f"{'item':<{width}}  {'group':<12}{'value':>7}{'NRUPV -1':>11}{'NRUPV +1':>11}{'Shapley':>11}"
+                 f"{'margin -1':>11}{'margin +1':>11}{'Shapley':>11}"]
+        for row in rows:
+            lines.append(f"{row['item']:<{width}}  {row['group']:<12}{row['value']:>7.3g}" + "".join(
+                f"{row[c]:>11.4f}" for c in ("nrupv_down", "nrupv_up", "shapley_nrupv", "margin_down", "margin_up", "shapley_margin")))
+        return "\n".join(lines)
+
+
+def _shapley(values, n):
+    # values[mask]: result with the answers whose bits are set in mask; exact Shapley value of each answer
+    masks = np.arange(1 << n)
+    size = np.array([bin(m).count("1") for m in masks])
+    weight = np.array([math.factorial(s) * math.factorial(n - s - 1) / math.factorial(n) for s in range(n)])
+    phi = np.empty(n)
+    for i in range(n):
+        without = masks[(masks >> i) & 1 == 0]
+        phi[i] = np.sum(weight[size[without]] * (values[without | (1 << i)] - values[without]))
+    return phi
+
+
+# response: dict of answers or ResponseRecord; sens: dict of sensitivity factors; shapley=False
+# skips the subset runs (the Shapley columns are then NaN) when only the step deltas are needed
+def attribute(response, sens=None, periods_per_year=1, shapley=True):
+    start_time = time.perf_counter()
+    x = encode_response(response)
+    variants = [x] # Row 0: the response itself
+
+    steps = [] # (slot, kind, row of the step up or None, row of the step down or None)
+    for slot, (key, kind, _) in enumerate(SLOTS):
+        if kind not in ATTRIBUTED_KINDS or x[slot] != x[slot]:
+            continue
+        rows = []
+        for direction in (1, -1):
+            value = _step(kind, x[slot], direction)
+            if value is None:
+                rows.append(None)
+                continue
+            row = x.copy()
+            row[slot] = value
+            rows.append(len(variants))
+            variants.append(row)
+        steps.append((slot, kind, rows[0], rows[1]))
+
+    subsets = {} # group -> (answered slots, first row); row first + mask has the slots in mask answered
+    for group, slots in (ATTRIBUTION_GROUPS.items() if shapley else ()):
+        players = [slot for slot in slots if x[slot] == x[slot]]
+        masks = np.arange(1 << len(players))
+        block = np.array(np.broadcast_to(x, (len(masks), len(x))))
+        for i, slot in enumerate(players):
+            block[(masks >> i) & 1 == 0, slot] = SLOT_DEFAULTS[slot]
+        subsets[group] = (players, len(variants))
+        variants.extend(block)
+
+    res = evaluate_batch(np.array(variants), sens, series=False, periods_per_year=periods_per_year)
+    nrupv = res.nrupv
+    margin = res.nrupv - (res.ocau + res.sunk_cost_adj)
+
+    contributions = {}
+    group_effects = {}
+    for group, (players, first) in subsets.items():
+        if not players:
+            continue
+        block = slice(first, first + (1 << len(players)))
+        phi_nrupv = _shapley(nrupv[block], len(players))
+        phi_margin = _shapley(margin[block], len(players))
+        group_effects[group] = (float(phi_nrupv.sum()), float(phi_margin.sum()))
+        for i, slot in enumerate(players):
+            contributions[slot] = (float(phi_nrupv[i]), float(phi_margin[i]))
+
+    def delta(values, row):
+        return math.nan if row is None else float(values[row] - values[0])
+
+    rows = []
+    for slot, kind, up, down in steps:
+        shapley_nrupv, shapley_margin = contributions.get(slot, (math.nan, math.nan))
+        rows.append({
+            "item": SLOTS[slot][0], "kind": kind, "group": SLOT_GROUP.get(slot, ""), "value": float(x[slot]),
+            "nrupv_up": delta(nrupv, up), "nrupv_down": delta(nrupv, down),
+            "margin_up": delta(margin, up), "margin_down": delta(margin, down),
+            "shapley_nrupv": shapley_nrupv, "shapley_margin": shapley_margin,
+        })
+    return AttributionResult(rows, float(nrupv[0]), float(margin[0]), group_effects, len(variants), time.perf_counter() - start_time)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Which answers move NRUPV and the decision margin the most.")
+    parser.add_argument("input", help="JSON file with one response object (keys named like the GUI's data_vars)")
+    parser.add_argument("--lang", choices=["en", "zh"], default="en", help="Ignored: option labels of both languages are recognised (kept for existing scripts)")
+    parser.add_argument("--periods", choices=list(PERIODS_PER_YEAR), default="annual", help="Horizon resolution (default: annual)")
+    parser.add_argument("--top", type=int, default=20, help="Rows shown, largest one-step effect first (0 = all)")
+    parser.add_argument("--by", choices=["nrupv", "margin"], default="nrupv", help="Quantity the rows are ranked by")
+    parser.add_argument("--json", action="store_true", help="Print all rows and group effects as JSON")
+    args = parser.parse_args(argv)
+
+    with open(args.input, encoding="utf-8") as f:
+        values = json.load(f)
+    sens = {key: float(values[key]) for key in SENSITIVITY_KEYS if values.get(key) not in (None, "")}
+    result = attribute(values, sens, PERIODS_PER_YEAR[args.periods])
+
+    if args.json:
+        rows = [{k: None if isinstance(v, float) and not math.isfinite(v) else v for k, v in row.items()} for row in result.rows] # NaN -> null
+        print(json.dumps({"nrupv": result.nrupv, "margin": result.margin, "groups": result.group_effects, "rows": rows}, indent=2))
+    else:
+        print(f"NRUPV {result.nrupv:.4f}, decision margin {result.margin:.4f}")
+        print(result.format_table(result.top(args.top or len(result.rows), args.by)))
+    print(f"{len(result.rows)} answers, {result.runs:,} model runs in {result.elapsed * 1000:.0f} ms", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,210 @@
+import numpy as np
+
+from revim_schema import (
+    CATEGORY_LABELS_EN, CATEGORY_QUESTION_SLOTS, COST_CATEGORIES, FUTURE_SLOT, MODEL_CONSTANTS, SENSITIVITY_KEYS,
+    SLOT_INDEX, SLOT_KEYS, UTILITY_CATEGORIES, WEIGHT_SLOT, response_vector,
+)
+
+# --- ReVIM Vectorized Batch Engine ---
+# Scores many respondents at once. Every response is encoded into one row of a
+# (N respondents x BATCH_COLUMNS) float array holding its schema vector (see revim_schema),
+# and evaluate_batch() reproduces ReVIMCalculator.evaluate() for all rows with array operations.
+
+UTILITY_LABELS = [CATEGORY_LABELS_EN[label] for _, label, _ in UTILITY_CATEGORIES]
+COST_LABELS = [CATEGORY_LABELS_EN[label] for _, label, _ in COST_CATEGORIES]
+BATCH_COLUMNS = SLOT_KEYS
+COLUMN_INDEX = SLOT_INDEX
+
+
+def encode_response(values, out=None):
+    if not hasattr(values, "get"): # e.g. a JSON Lines row that is a list or a number
+        raise ValueError("expected a JSON object")
+    row = response_vector(values)
+    if out is None:
+        return np.array(row)
+    out[:] = row
+    return out
+
+
+def encode_responses(rows):
+    rows = list(rows)
+    X = np.empty((len(rows), len(BATCH_COLUMNS)))
+    for n, values in enumerate(rows):
+        encode_response(values, out=X[n])
+    return X
+
+
+# Per-category (question column indices, question inclusion mask) padded to the widest category
+def _compile_categories(categories):
+    width = max(num_q for _, _, num_q in categories) + 1
+    idx = np.full((len(categories), width), -1, dtype=np.intp)
+    include = np.zeros((len(categories), width), dtype=bool)
+    for k, (cat_key, _, num_q) in enumerate(categories):
+        if cat_key == "U_law":
+            slots = CATEGORY_QUESTION_SLOTS[cat_key] + [SLOT_INDEX["U_law_LAW.2"]]
+        elif cat_key == "C_geo":
+            slots = [SLOT_INDEX["C_geo_GEO.1"], SLOT_INDEX["C_geo_GEO.2"]]
+        else:
+            slots = CATEGORY_QUESTION_SLOTS[cat_key]
+        idx[k, :len(slots)] = slots
+        include[k, :num_q] = True
+    future_idx = np.array([FUTURE_SLOT[cat_key] for cat_key, _, _ in categories])
+    weight_idx = np.array([WEIGHT_SLOT[cat_key] for cat_key, _, _ in categories])
+    return idx, include, future_idx, weight_idx
+
+_U_IDX, _U_INCLUDE, _U_FUTURE, _U_WEIGHT = _compile_categories(UTILITY_CATEGORIES)
+_C_IDX, _C_INCLUDE, _C_FUTURE, _C_WEIGHT = _compile_categories(COST_CATEGORIES)
+_U_POS = {cat_key: k for k, (cat_key, _, _) in enumerate(UTILITY_CATEGORIES)}
+_C_POS = {cat_key: k for k, (cat_key, _, _) in enumerate(COST_CATEGORIES)}
+
+
+# Average answer of every category minus the neutral 4, (N, K); categories without scored questions are 0
+def _category_base(X, idx, include):
+    scores = np.where(idx >= 0, X[:, idx], np.nan)
+    valid = include & ~np.isnan(scores)
+    count = valid.sum(axis=2)
+    total = np.where(valid, scores, 0.0).sum(axis=2)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(count > 0, total / count - 4, 0.0)
+
+
+def _sens_array(sens, key, n):
+    val = 1.0 if sens is None else sens.get(key, 1.0)
+    return np.broadcast_to(np.asarray(val, dtype=float), (n,))
+
+
+# MODEL_CONSTANTS with overrides, each as an (n,) array (a scalar or one value per row)
+def _constant_arrays(constants, n):
+    unknown = set(constants or ()) - set(MODEL_CONSTANTS)
+    if unknown:
+        raise KeyError(f"Unknown model constant(s): {', '.join(sorted(unknown))}")
+    merged = dict(MODEL_CONSTANTS, **(constants or {}))
+    return {key: np.broadcast_to(np.asarray(val, dtype=float), (n,)) for key, val in merged.items()}
+
+
+class BatchResult:
+    # Attribute names follow the ReVIMResult attributes; series are (N, max periods)
+    # arrays padded with NaN past each respondent's horizon (see time_mask).
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+    def __len__(self):
+        return len(self.nrupv)
+
+
+# periods_per_year splits the horizon like ReVIMCalculator does: per-period flows, t in years.
+# constants overrides entries of MODEL_CONSTANTS, with scalars or one value per row.
+def evaluate_batch(X, sens=None, series=True, periods_per_year=1, constants=None):
+    X = np.atleast_2d(np.asarray(X, dtype=float))
+    n = X.shape[0]
+    col = COLUMN_INDEX
+    p = periods_per_year
+    const = _constant_arrays(constants, n)
+
+    r_base_adj = _sens_array(sens, "base_discount_rate_adj", n)
+    optimism_adj = _sens_array(sens, "future_projection_optimism_adj", n)
+    risk_perception_adj = _sens_array(sens, "overall_risk_perception_adj", n)
+    realization_prob_adj = _sens_array(sens, "realization_prob_adj", n)
+
+    T_realistic = X[:, col["Q_exp_duration_realistic"]]
+    T = np.maximum(np.ceil(T_realistic * p), 0).astype(np.intp)
+    t_max = int(T.max()) if n else 0
+    step = np.arange(t_max, dtype=float)
+    t = step / p # Years since the start
+    time_mask = step[None, :] < T[:, None]
+
+    # --- Utility and cost categories ---
+    u_include = np.broadcast_to(_U_INCLUDE, (n,) + _U_INCLUDE.shape).copy()
+    bio, law = _U_POS["U_bio"], _U_POS["U_law"]
+    law_na = X[:, col["U_law_1_na"]] == 1
+    u_include[X[:, col["U_bio_5_na"]] == 1, bio, 4] = False
+    # U_law.1 N/A: only the separately read U_law_LAW.2 is scored, otherwise U_law.1 and U_law.2
+    u_include[law_na, law, :3] = [False, False, True]
+    u_norm = _category_base(X, _U_IDX, u_include)
+
+    c_include = np.broadcast_to(_C_INCLUDE, (n,) + _C_INCLUDE.shape).copy()
+    c_include[X[:, col["C_geo_1_na"]] == 1, _C_POS["C_geo"], 0] = False
+    c_norm = _category_base(X, _C_IDX, c_include)
+
+    # The calculator adds U_law once inside its category loop and once more after it,
+    # unless U_law.1 is N/A (then only the second, U_law_LAW.2-based pass counts).
+    u_mult = np.ones((n, len(UTILITY_CATEGORIES)))
+    u_mult[~law_na, law] = 2.0
+
+    u_weight = X[:, _U_WEIGHT] / 7.0
+    c_weight = X[:, _C_WEIGHT] / 7.0
+    u_growth = 1 + X[:, _U_FUTURE] * optimism_adj[:, None]
+    c_growth = 1 + X[:, _C_FUTURE] * optimism_adj[:, None]
+
+    U_t = np.zeros((n, t_max))
+    C_t = np.zeros((n, t_max))
+    for k in range(len(UTILITY_CATEGORIES)):
+        val_t = (u_norm[:, k, None] * np.power(u_growth[:, k, None], t)) * u_weight[:, k, None] * realization_prob_adj[:, None]
+        U_t += u_mult[:, k, None] * val_t
+    for k in range(len(COST_CATEGORIES)):
+        val_t = (c_norm[:, k, None] * np.power(c_growth[:, k, None], t)) * c_weight[:, k, None] * realization_prob_adj[:, None]
+        C_t += val_t
+
+    initial_utility_breakdown = u_norm * u_weight * realization_prob_adj[:, None]
+    initial_cost_breakdown = c_norm * c_weight * realization_prob_adj[:, None]
+
+    # --- Synergy/conflict factors (use the t=0 values) ---
+    u_psych0 = initial_utility_breakdown[:, _U_POS["U_psych"]]
+    u_comm0 = initial_utility_breakdown[:, _U_POS["U_comm"]]
+    c_psych0 = initial_cost_breakdown[:, _C_POS["C_psych"]]
+    c_philo0 = initial_cost_breakdown[:, _C_POS["C_philo"]]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        synergy_factor = np.where(u_comm0 > 0, 1 + const["synergy_boost"] * (u_comm0 / ((X[:, col["W_U_comm"]] / 7.0) * 3)), 1.0)
+        conflict_factor = np.where(c_philo0 > 0, 1 + const["synergy_boost"] * (c_philo0 / ((X[:, col["W_C_philo"]] / 7.0) * 3)), 1.0)
+    U_t += (u_psych0 * (synergy_factor - 1.0))[:, None]
+    C_t += (c_psych0 * (conflict_factor - 1.0))[:, None]
+    U_t /= p
+    C_t /= p
+    Net_U_t = U_t - C_t
+
+    # --- Time-varying discount rate ---
+    r_base = const["base_discount_rate"] * r_base_adj
+    r_risk_initial = (X[:, col["Q_risk_breakup_A_1"]] - 1) * const["risk_step"] * risk_perception_adj
+    r_uncertainty_initial = (7 - X[:, col["Q_certainty_future_A_3"]]) * const["risk_step"] * risk_perception_adj
+    learning_adapt_avg = (X[:, col["Q_adapt_solve_B_3"]] + X[:, col["Q_adapt_stress_B_4"]] + X[:, col["Q_adapt_learn_hist_B_5"]]) / 3.0
+    r_learning_initial_effect = (learning_adapt_avg - 4) * const["learning_step"]
+
+    stable = X[:, col["Q_conflict_patterns_exist_A_2"]] == 0
+    stability_factor = np.where(stable[:, None], 1 - const["stability_decay"][:, None] * t, 1 + const["instability_growth"][:, None] * t)
+    r_t = (r_base[:, None]
+           + r_risk_initial[:, None] * np.maximum(const["risk_floor"][:, None], stability_factor)
+           + r_uncertainty_initial[:, None] * np.maximum(const["uncertainty_floor"][:, None], 1 - const["uncertainty_decay"][:, None] * t)
+           - r_learning_initial_effect[:, None] * np.maximum(const["learning_floor"][:, None], 1 - const["learning_decay"][:, None] * t))
+    r_t = np.maximum(const["min_discount_rate"][:, None], r_t)
+
+    discounted = np.where(time_mask, Net_U_t / np.power(1 + r_t, (step + 1) / p), 0.0)
+    nrupv = discounted.sum(axis=1)
+
+    # --- OCAU and sunk cost ---
+    u_single = X[:, col["Q_single_satisfaction_1"]]
+    alt_partner_likelihood = X[:, col["Q_alt_partner_likelihood_4"]] / 7.0
+    initial_gross_U = np.where(T > 0, initial_utility_breakdown.sum(axis=1), 5) # Empty breakdown falls back to 5
+    e_u_alt = alt_partner_likelihood * (initial_gross_U * const["alt_partner_factor"])
+    ocau = np.maximum(u_single, e_u_alt)
+
+    adjustment_factor = ((X[:, col["Q_sunk_cost_influence_4"]] - 1) + (X[:, col["Q_sunk_cost_worry_5"]] - 1)) / 12.0
+    sunk_cost_adj = adjustment_factor * const["sunk_cost_max_adjustment"]
+
+    result = BatchResult(
+        nrupv=nrupv, T_realistic=T_realistic, periods=T, periods_per_year=p,
+        ocau=ocau, u_single=u_single, e_u_alt=e_u_alt, sunk_cost_adj=sunk_cost_adj,
+        is_worth_continuing=nrupv > (ocau + sunk_cost_adj),
+        initial_utility_breakdown=initial_utility_breakdown, initial_cost_breakdown=initial_cost_breakdown,
+        utility_labels=UTILITY_LABELS, cost_labels=COST_LABELS,
+    )
+    if series:
+        pad = lambda a: np.where(time_mask, a, np.nan)
+        result.time_mask = time_mask
+        result.time_periods = t
+        result.U_t_series = pad(U_t)
+        result.C_t_series = pad(C_t)
+        result.Net_U_t_series = pad(Net_U_t)
+        result.r_t_series = pad(r_t)
+        result.discounted_Net_U_t_series = pad(discounted)
+        result.cumulative_nrupv_series = pad(np.cumsum(discounted, axis=1))
+    return result
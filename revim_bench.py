@@ -0,0 +1,674 @@
+import argparse
+import ast
+import math
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from revim_cache import ResultCache
+from revim_model import EvaluationCache, IncrementalCalculator, ReVIMCalculator, ResponseRecord
+from revim_schema import LABEL_CODES, OPTION_LABELS, OPTION_MAPS, PERIODS_PER_YEAR, SLOTS, response_vector
+
+# --- ReVIM micro-benchmarks ---
+# Times one full ReVIMCalculator.evaluate() on synthetic responses with the current calculator
+# against the previous string-keyed, per-period implementation (LegacyCalculator), checks that
+# both produce the same result, and times a "Lifelong" horizon at each period resolution.
+# It also replays a chain of single-answer edits (as live mode sees them) through a fresh
+# ReVIMCalculator per edit and through IncrementalCalculator with one shared EvaluationCache,
+# and replays answers that keep coming back (repeated Calculate clicks, a slider moved back and
+# forth) with and without the ResultCache, reporting its hit rate.
+# Every run also checks locale parity: the option lists in both GUIs decode through the shared
+# label tables, and the same answers given with English, Chinese or mixed labels produce
+# identical numbers, whose encoding times are reported.
+# --charts also times the results figure redraw: rebuilt from scratch (the GUIs' previous
+# display_visualizations) against updating the reused ResultsFigure, both rendered with Agg.
+# --startup cold-starts a GUI in fresh interpreters and reports the time to its first paint with
+# every tab built up front against tabs built on first selection (needs a display).
+# --imports measures, with `python -X importtime`, what importing a GUI costs and what loading
+# the chart modules on first use (revim_plotting.load_charts) adds.
+# --scaling scores a synthetic file of ROWS responses in this process (revim_cli) and with the
+# sharded scorer (revim_shard) at 1/2/4/8/N workers, from parsed rows and from a packed store.
+#
+#   python revim_bench.py --responses 200 --repeat 5
+#   python revim_bench.py --charts
+#   python revim_bench.py --startup --lang zh
+#   python revim_bench.py --imports
+#   python revim_bench.py --scaling 200000
+
+
+def random_response(rng, lang="en", na_rate=0.1):
+    values = {}
+    for key, kind, _ in SLOTS:
+        if kind == "likert":
+            values[key] = "不适用" if rng.random() < na_rate else str(rng.randint(1, 7))
+        elif kind == "flag":
+            values[key] = int(rng.random() < na_rate)
+        elif kind in ("weight", "number"):
+            values[key] = str(rng.randint(1, 7))
+        elif kind == "conflict":
+            values[key] = rng.choice(["0", "1"])
+        else:
+            values[key] = rng.choice(list(OPTION_MAPS[lang][kind][0]))
+    return values
+
+
+# The calculator as it was before the compiled schema: every answer is looked up by string
+# key and parsed by get_val, inside the period loop.
+class LegacyCalculator(ReVIMCalculator):
+    def __init__(self, response, sensitivity=None, lang="en"):
+        self.data = response if isinstance(response, ResponseRecord) else ResponseRecord(response)
+        self.sens = sensitivity if sensitivity is not None else {}
+        self.lang = lang
+        self.periods_per_year = 1
+
+    def get_val(self, key, default_val=0, is_future_expect=False, is_duration=False, is_single_satisfaction=False, is_recovery_time=False):
+        try:
+            val_str = self.data.get(key)
+            if val_str is not None:
+                if isinstance(val_str, (int, float)): # If already numeric (e.g. from IntVar for NA)
+                    return val_str
+                if isinstance(val_str, str):
+                    if val_str.isdigit(): return int(val_str)
+                    if val_str == "不适用": return "N/A" # "Not Applicable"
+                    if val_str == "": return default_val
+
+                    en = self.lang == "en"
+                    if is_future_expect:
+                        mapping = {"显著改善": 0.03, "略有改善": 0.015, "保持不变": 0, "略有恶化": -0.015, "显著恶化": -0.03, "不确定": -0.005}
+                        mapping_en = {"Significantly improved": 0.03, "Slightly improved": 0.015, "Remained unchanged": 0, "Slightly worsened": -0.015, "Significantly worsened": -0.03, "Uncertain": -0.005}
+                        return (mapping_en if en else mapping).get(val_str, 0)
+                    if is_duration:
+                        mapping = {"几个月": 0.5, "1-2年": 1.5, "3-5年": 4, "5-10年": 7.5, "10年以上": 15, "终身": 25, "非常不确定": 3}
+                        mapping_en = {"Several months": 0.5, "1-2 years": 1.5, "3-5 years": 4, "5-10 years": 7.5, "More than 10 years": 15, "Lifelong": 25, "Very uncertain": 3}
+                        return (mapping_en if en else mapping).get(val_str, 3)
+                    if is_single_satisfaction:
+                        mapping = {"显著更高": 3, "略高": 1.5, "差不多": 0, "略低": -1.5, "显著更低": -3}
+                        mapping_en = {"Significantly higher": 3, "Slightly higher": 1.5, "About the same": 0, "Slightly lower": -1.5, "Significantly lower": -3}
+                        return (mapping_en if en else mapping).get(val_str, 0)
+                    if is_recovery_time:
+                        mapping = {"很快（1-3个月内）": 0.25, "一般（3-6个月）": 0.5, "较长（6个月-1年）": 1, "很长（1年以上）": 1.5, "不确定": 0.75}
+                        mapping_en = {"Very soon (within 1-3 months)": 0.25, "Average (3-6 months)": 0.5, "Longer (6 months-1 year)": 1, "Very long (more than 1 year)": 1.5, "Uncertain": 0.75}
+                        return (mapping_en if en else mapping).get(val_str, 0.75)
+                    return val_str
+                return val_str
+            return default_val
+        except Exception:
+            return default_val
+
+    def calculate_category_value_at_t(self, base_score_key_prefix, num_q, future_expect_key, weight_key, t, is_cost=False):
+        base_category_score = 0
+        actual_q_count = 0
+
+        category_code_from_prefix = base_score_key_prefix.split('_')[-1].upper()
+
+        for i in range(1, num_q + 1):
+            q_num_for_key = f"{category_code_from_prefix}.{i}"
+            # Corrected key formation to match add_likert_scale
+            q_key = f"{base_score_key_prefix}_{q_num_for_key.replace('.', '_')}"
+
+            # NA handling is done by adjusting num_q before calling this function for U_bio.
+            # C_geo is handled separately.
+            # For other categories, assume no NA options within the loop here.
+
+            score = self.get_val(q_key, default_val=4)
+            if score == "N/A": # Should ideally not happen if num_q is adjusted for NA
+                continue
+            base_category_score += score
+            actual_q_count += 1
+
+        if actual_q_count == 0: return 0
+
+        avg_base_score = base_category_score / actual_q_count
+        normalized_base_score = avg_base_score - 4
+
+        growth_rate = self.get_val(future_expect_key, is_future_expect=True, default_val=0)
+        optimism_adj = self.get_sens_val("future_projection_optimism_adj", 1.0)
+        effective_growth_rate = growth_rate * optimism_adj
+        current_period_score = normalized_base_score * ((1 + effective_growth_rate) ** t)
+
+        weight_val = self.get_val(weight_key, default_val=4)
+        weight = weight_val / 7.0 if isinstance(weight_val, (int, float)) else 4.0/7.0
+
+
+        realization_prob_adj = self.get_sens_val("realization_prob_adj", 1.0)
+        final_value = current_period_score * weight * realization_prob_adj
+        return final_value
+
+    def calculate_nrupv_components_over_time(self):
+        T_realistic = self.get_val("Q_exp_duration_realistic", is_duration=True, default_val=5)
+        T = int(math.ceil(T_realistic))
+
+        self.time_periods = list(range(T))
+        self.U_t_series = []
+        self.C_t_series = []
+        self.Net_U_t_series = []
+        self.r_t_series = []
+        self.discounted_Net_U_t_series = []
+
+        r_base_adj = self.get_sens_val("base_discount_rate_adj", 1.0)
+        r_base = 0.03 * r_base_adj
+        risk_perception_adj = self.get_sens_val("overall_risk_perception_adj", 1.0)
+        r_risk_initial_val = self.get_val("Q_risk_breakup_A_1", 4) # Ensure key matches add_likert_scale
+        r_risk_initial = (r_risk_initial_val - 1) * 0.005 * risk_perception_adj
+
+        r_certainty_future_val = self.get_val("Q_certainty_future_A_3", 4)
+        r_uncertainty_initial = (7 - r_certainty_future_val) * 0.005 * risk_perception_adj
+
+        learning_adapt_solve_val = self.get_val("Q_adapt_solve_B_3", 4)
+        learning_adapt_stress_val = self.get_val("Q_adapt_stress_B_4", 4)
+        learning_adapt_learn_hist_val = self.get_val("Q_adapt_learn_hist_B_5", 4)
+        learning_adapt_avg = (learning_adapt_solve_val + learning_adapt_stress_val + learning_adapt_learn_hist_val) / 3.0
+        r_learning_initial_effect = (learning_adapt_avg - 4) * 0.005
+
+        nrupv = 0
+        cumulative_nrupv = 0
+        self.cumulative_nrupv_series = []
+
+        self.initial_utility_breakdown = {}
+        self.initial_cost_breakdown = {}
+
+        utility_details = [
+            ("U_psych", "心理", 10), ("U_econ", "经济", 5), ("U_socio", "社交", 5),
+            ("U_anthro", "文化人类", 5), ("U_bio", "生理医学", 5), ("U_poli", "权力治理", 4),
+            ("U_philo", "哲学精神", 3), ("U_law", "法律承诺", 2), ("U_comm", "沟通传播", 4),
+            ("U_geo", "地理空间", 3), ("U_eco_sys", "生态系统", 3)
+        ]
+
+        cost_details = [
+            ("C_psych", "心理", 5), ("C_econ", "经济", 3), ("C_socio", "社交", 3),
+            ("C_anthro", "文化人类", 2), ("C_bio", "生理医学", 3), ("C_poli", "权力治理", 3),
+            ("C_philo", "哲学精神", 2), ("C_law", "法律承诺", 2), ("C_comm", "沟通传播", 2),
+            ("C_eco_sys", "生态系统", 3)
+            # C_geo handled separately
+        ]
+
+
+        for t in range(T):
+            current_total_utility = 0
+            for cat_key, label, num_q_default in utility_details:
+                num_q_actual = num_q_default
+                if cat_key == "U_bio" and self.get_val("U_bio_5_na") == 1: # Specific NA key for U_bio_5
+                    num_q_actual = 4
+                elif cat_key == "U_law" and self.get_val("U_law_1_na") == 1: # Specific NA key for U_law_1
+                    num_q_actual = 1 # Only U_law_LAW.2 remains if U_law_LAW.1 is NA
+                                      # This means the loop for U_law should go from i=2 to 2 if U_law_1 is NA
+                                      # Or, more simply, if U_law_1 is NA, num_q_actual becomes 1,
+                                      # and the loop in calculate_category_value_at_t will try to get U_law_LAW.1.
+                                      # This needs careful handling.
+                                      # For U_law, if U_law_1_na is true, we only score U_law_LAW.2
+                                      # It's better to calculate U_law separately for clarity.
+                    if num_q_actual == 1 and num_q_default == 2: # Only U_law_LAW.2 is scored
+                        # This requires calculate_category_value_at_t to handle a start_index or specific question list
+                        # For now, let's assume if num_q_actual is 1, it scores the first question of that category.
+                        # This is problematic for U_law if U_law_LAW.1 is NA.
+                        # Let's calculate U_law separately for clarity.
+                        if cat_key == "U_law": continue # Skip in loop, handle below
+
+                val_t = self.calculate_category_value_at_t(cat_key, num_q_actual, f"{cat_key}_future", f"W_{cat_key}", t)
+                current_total_utility += val_t
+                if t == 0: self.initial_utility_breakdown[self.label(label)] = val_t
+
+            # Special handling for U_law due to NA on its first question
+            u_law_t = 0
+            if self.get_val("U_law_1_na") == 1: # U_law_LAW.1 is NA, only score U_law_LAW.2
+                # Calculate score for U_law_LAW.2 directly
+                score_law2 = self.get_val("U_law_LAW.2", default_val=4)
+                if score_law2 != "N/A":
+                    norm_score = score_law2 - 4
+                    growth = self.get_val("U_law_future", is_future_expect=True, default_val=0)
+                    opt_adj = self.get_sens_val("future_projection_optimism_adj", 1.0)
+                    eff_growth = growth * opt_adj
+                    curr_score = norm_score * ((1 + eff_growth) ** t)
+                    weight_val = self.get_val("W_U_law", default_val=4)
+                    weight = weight_val / 7.0 if isinstance(weight_val, (int,float)) else 4.0/7.0
+                    prob_adj = self.get_sens_val("realization_prob_adj", 1.0)
+                    u_law_t = curr_score * weight * prob_adj
+            else: # Both U_law_LAW.1 and U_law_LAW.2 are scored
+                u_law_t = self.calculate_category_value_at_t("U_law", 2, "U_law_future", "W_U_law", t)
+            current_total_utility += u_law_t
+            if t == 0: self.initial_utility_breakdown[self.label("法律承诺")] = u_law_t
+
+
+            current_total_cost = 0
+            for cat_key, label, num_q in cost_details:
+                val_t = self.calculate_category_value_at_t(cat_key, num_q, f"{cat_key}_future", f"W_{cat_key}", t)
+                current_total_cost += val_t
+                if t == 0: self.initial_cost_breakdown[self.label(label)] = val_t
+
+            # Corrected c_geo_t calculation (direct)
+            c_geo_t = 0
+            geo_scores = []
+            if self.get_val("C_geo_1_na") != 1:
+                score1 = self.get_val("C_geo_GEO.1", default_val=4)
+                if score1 != "N/A": geo_scores.append(score1)
+            score2 = self.get_val("C_geo_GEO.2", default_val=4)
+            if score2 != "N/A": geo_scores.append(score2)
+
+            if geo_scores:
+                avg_base_score = sum(geo_scores) / len(geo_scores)
+                normalized_base_score = avg_base_score - 4
+                growth_rate = self.get_val("C_geo_future", is_future_expect=True, default_val=0)
+                optimism_adj = self.get_sens_val("future_projection_optimism_adj", 1.0)
+                effective_growth_rate = growth_rate * optimism_adj
+                current_period_score = normalized_base_score * ((1 + effective_growth_rate) ** t)
+                weight_val = self.get_val("W_C_geo", default_val=4)
+                weight = weight_val / 7.0 if isinstance(weight_val, (int,float)) else 4.0/7.0
+                realization_prob_adj = self.get_sens_val("realization_prob_adj", 1.0)
+                c_geo_t = current_period_score * weight * realization_prob_adj
+
+            current_total_cost += c_geo_t
+            if t == 0: self.initial_cost_breakdown[self.label("地理空间")] = c_geo_t
+
+            # Synergy/Conflict Factors
+            u_psych_val_t0 = self.initial_utility_breakdown.get(self.label("心理"), 0) # Use t=0 value for simplicity of synergy factor
+            u_comm_val_t0 = self.initial_utility_breakdown.get(self.label("沟通传播"), 0)
+
+            # Normalize initial scores for synergy factor (0-1 range approx)
+            # This is a rough proxy. A better way would be to use the non-weighted, non-projected base scores.
+            synergy_comm_psych_factor = 1.0
+            if u_comm_val_t0 > 0 : # Assuming positive communication is synergistic
+                 synergy_comm_psych_factor = 1 + 0.1 * (u_comm_val_t0 / ( (self.get_val("W_U_comm",4)/7.0) * 3) ) # Max 10% boost if comm is at max (3)
+
+            # Find u_psych_t from the series if needed, or re-calculate its component for modification
+            # For simplicity, apply synergy to the already calculated total utility's psychological component proxy
+            # This is an approximation. A more precise way would be to modify u_psych_t before summing.
+            # Let's assume u_psych_val_t0 is a proxy for the psychological component's magnitude.
+            current_total_utility += u_psych_val_t0 * (synergy_comm_psych_factor - 1.0) # Add the synergistic part
+
+            c_philo_val_t0 = self.initial_cost_breakdown.get(self.label("哲学精神"), 0)
+            c_psych_val_t0 = self.initial_cost_breakdown.get(self.label("心理"), 0)
+            conflict_philo_psych_factor = 1.0
+            if c_philo_val_t0 > 0: # Assuming philosophical cost amplifies psychological cost
+                conflict_philo_psych_factor = 1 + 0.1 * (c_philo_val_t0 / ( (self.get_val("W_C_philo",4)/7.0) * 3) )
+            current_total_cost += c_psych_val_t0 * (conflict_philo_psych_factor - 1.0)
+
+
+            self.U_t_series.append(current_total_utility)
+            self.C_t_series.append(current_total_cost)
+            net_utility_this_period = current_total_utility - current_total_cost
+            self.Net_U_t_series.append(net_utility_this_period)
+
+            conflict_pattern_exists_val = self.get_val("Q_conflict_patterns_exist_A_2", "0")
+            stability_factor = (1 - 0.05 * t) if conflict_pattern_exists_val == "0" else (1 + 0.02 * t)
+            r_risk_t = r_risk_initial * max(0.5, stability_factor)
+            r_uncertainty_t = r_uncertainty_initial * max(0.5, (1 - 0.03 * t))
+            r_learning_t_effect = r_learning_initial_effect * max(0.7, (1 - 0.02 * t))
+            r_t_period = r_base + r_risk_t + r_uncertainty_t - r_learning_t_effect
+            r_t_period = max(0.001, r_t_period)
+            self.r_t_series.append(r_t_period)
+
+            discounted_net_utility = net_utility_this_period / ((1 + r_t_period) ** (t + 1))
+            self.discounted_Net_U_t_series.append(discounted_net_utility)
+            nrupv += discounted_net_utility
+            cumulative_nrupv += discounted_net_utility
+            self.cumulative_nrupv_series.append(cumulative_nrupv)
+
+        self.series = (self.time_periods, self.U_t_series, self.C_t_series, self.Net_U_t_series, self.r_t_series,
+                       self.discounted_Net_U_t_series, self.cumulative_nrupv_series)
+        return nrupv, T_realistic
+
+    def calculate_ocau(self):
+        u_single_satisfaction = self.get_val("Q_single_satisfaction_1", is_single_satisfaction=True, default_val=0)
+        u_single = u_single_satisfaction
+
+        alt_partner_likelihood_val = self.get_val("Q_alt_partner_likelihood_4", 1)
+        alt_partner_likelihood = alt_partner_likelihood_val / 7.0
+
+        initial_gross_U = sum(self.initial_utility_breakdown.values()) if hasattr(self, 'initial_utility_breakdown') and self.initial_utility_breakdown else 5
+        e_u_alternative = alt_partner_likelihood * (initial_gross_U * 0.7)
+
+        ocau = max(u_single, e_u_alternative)
+        return ocau, u_single, e_u_alternative
+
+    def calculate_sunk_cost_adjustment(self):
+        sunk_influence_val = self.get_val("Q_sunk_cost_influence_4", 1)
+        sunk_worry_val = self.get_val("Q_sunk_cost_worry_5", 1)
+
+        adjustment_factor = ((sunk_influence_val - 1) + (sunk_worry_val - 1)) / 12.0
+        max_possible_adjustment = 3.0
+        sunk_cost_adj = adjustment_factor * max_possible_adjustment
+        return sunk_cost_adj
+
+
+def time_calls(calculator_cls, responses, lang, repeat, **kwargs):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for values in responses:
+            calculator_cls(ResponseRecord(values), lang=lang, **kwargs).evaluate()
+        best = min(best, time.perf_counter() - start)
+    return best / len(responses)
+
+
+# The hoisted horizon sums categories in a different order, so values may differ in the last bits
+def check_same(responses, lang):
+    for values in responses:
+        old = LegacyCalculator(ResponseRecord(values), lang=lang)
+        new = ReVIMCalculator(ResponseRecord(values), lang=lang)
+        old_result = old.evaluate()
+        new_result = new.evaluate()
+        if old_result.is_worth_continuing != new_result.is_worth_continuing or not math.isclose(old_result.nrupv, new_result.nrupv, rel_tol=1e-9, abs_tol=1e-12):
+            raise AssertionError(f"Results differ for response {values!r}")
+
+
+# The response with every option label given in lang (mixed: alternating between the languages)
+def relabel(values, lang):
+    out = dict(values)
+    for n, (key, kind, _) in enumerate(SLOTS):
+        code = LABEL_CODES.get(kind, {}).get(values.get(key))
+        if code is not None:
+            target = lang if lang != "mixed" else ("en", "zh")[n % 2]
+            out[key] = OPTION_LABELS[target][kind][code]
+    return out
+
+
+# Dropdown option lists assigned in a GUI's source, by kind ("future_options = [...]" -> "future")
+def gui_option_lists(lang):
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), f"revim_evaluator_v1_{lang}.py"), encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    lists = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Assign) and isinstance(node.targets[0], ast.Name) and node.targets[0].id.endswith("_options"):
+            kind = node.targets[0].id[:-len("_options")]
+            if kind in LABEL_CODES:
+                lists[kind] = tuple(ast.literal_eval(node.value))
+    return lists
+
+
+# Both GUIs offer the labels of the shared tables, and a response scores the same whichever
+# language its labels are in. The breakdowns' keys are localized, so their values are compared.
+def check_locales(responses):
+    for lang in OPTION_LABELS:
+        lists = gui_option_lists(lang)
+        if lists != OPTION_LABELS[lang]:
+            raise AssertionError(f"revim_evaluator_v1_{lang}.py options differ from the label tables: {lists!r}")
+    for values in responses:
+        results = []
+        for lang, labels in (("en", "en"), ("zh", "zh"), ("en", "mixed"), ("zh", "mixed")):
+            result = ReVIMCalculator(ResponseRecord(relabel(values, labels)), lang=lang).evaluate()
+            results.append((result.is_worth_continuing, result.nrupv, result.ocau, result.sunk_cost_adj, result.cumulative_nrupv_series.tolist(),
+                            list(result.initial_utility_breakdown.values()), list(result.initial_cost_breakdown.values())))
+        if any(result != results[0] for result in results[1:]):
+            raise AssertionError(f"Results differ between the locales for response {values!r}")
+
+
+def time_encoding(responses, labels, repeat):
+    rows = [relabel(values, labels) for values in responses]
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for values in rows:
+            response_vector(values)
+        best = min(best, time.perf_counter() - start)
+    return best / len(rows)
+
+
+# Each response is the previous one with a single answer changed (the horizon is left alone)
+def edit_chain(rng, start, n, lang):
+    chain = []
+    values = start
+    while len(chain) < n:
+        key = rng.choice(SLOTS)[0]
+        if key == "Q_exp_duration_realistic":
+            continue
+        values = dict(values, **{key: random_response(rng, lang)[key]})
+        chain.append(values)
+    return chain
+
+
+def time_edits(chain, lang, repeat, periods_per_year):
+    full = time_calls(ReVIMCalculator, chain, lang, repeat, periods_per_year=periods_per_year)
+    best = float("inf")
+    for _ in range(repeat):
+        cache = EvaluationCache()
+        start = time.perf_counter()
+        for values in chain:
+            IncrementalCalculator(ResponseRecord(values), lang=lang, periods_per_year=periods_per_year, cache=cache).evaluate()
+        best = min(best, time.perf_counter() - start)
+    cache = EvaluationCache()
+    for values in chain:
+        old = ReVIMCalculator(ResponseRecord(values), lang=lang, periods_per_year=periods_per_year)
+        new = IncrementalCalculator(ResponseRecord(values), lang=lang, periods_per_year=periods_per_year, cache=cache)
+        old_result = old.evaluate()
+        new_result = new.evaluate()
+        if (not math.isclose(old_result.nrupv, new_result.nrupv, rel_tol=1e-9, abs_tol=1e-12)
+                or old_result.cumulative_nrupv_series != new_result.cumulative_nrupv_series):
+            raise AssertionError(f"Incremental result differs for response {values!r}")
+    return full, best / len(chain)
+
+
+# Calls that revisit a few distinct responses, evaluated afresh and through one ResultCache
+def time_cached(sequence, lang, repeat, maxsize=256):
+    full = time_calls(ReVIMCalculator, sequence, lang, repeat)
+    best = float("inf")
+    for _ in range(repeat):
+        cache = ResultCache(maxsize)
+        start = time.perf_counter()
+        for values in sequence:
+            cache.evaluate(ReVIMCalculator(ResponseRecord(values), lang=lang))
+        best = min(best, time.perf_counter() - start)
+    return full, best / len(sequence), cache.stats()
+
+
+# The GUIs' previous display_visualizations: a new figure and four freshly drawn subplots per run
+def rebuild_results_figure(result):
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=(8, 7), dpi=100)
+    fig.subplots_adjust(hspace=0.5, wspace=0.35)
+    for position, breakdown in ((1, result.initial_utility_breakdown), (2, result.initial_cost_breakdown)):
+        ax = fig.add_subplot(2, 2, position)
+        data = {k: v for k, v in breakdown.items() if abs(v) > 1e-3}
+        if data:
+            ax.pie([abs(v) for v in data.values()], labels=[f"{k} ({v:.1f})" for k, v in data.items()],
+                   autopct='%1.1f%%', startangle=90, textprops={'fontsize': 6})
+            ax.set_title("Initial Composition (Weighted)", fontsize=8)
+        else:
+            ax.text(0.5, 0.5, "No significant data", ha='center', va='center', fontsize=8)
+    ax3 = fig.add_subplot(2, 2, 3)
+    ax4 = fig.add_subplot(2, 2, 4)
+    if result.time_periods:
+        ax3.plot(result.time_periods, result.Net_U_t_series, marker='o', markersize=3, label="Net Utility per Period")
+        ax3.plot(result.time_periods, result.discounted_Net_U_t_series, marker='x', markersize=3, linestyle='--', label="Discounted")
+        ax3.axhline(0, color='grey', lw=0.8, linestyle=':')
+        ax3.legend(fontsize=6)
+        ax4.plot(result.time_periods, result.cumulative_nrupv_series, marker='o', markersize=3, label="Cumulative NRUPV")
+        ax4.axhline(0, color='grey', lw=0.8, linestyle=':')
+        ax4.legend(fontsize=6)
+    return fig
+
+
+def time_chart_redraws(results, repeat):
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from revim_charts import ResultsFigure
+
+    def rebuild(result):
+        FigureCanvasAgg(rebuild_results_figure(result)).draw()
+
+    results_figure = ResultsFigure()
+    canvas = FigureCanvasAgg(results_figure.fig)
+    canvas.draw()
+    def update(result):
+        results_figure.update(result)
+        canvas.draw()
+
+    timings = []
+    for redraw in (rebuild, update):
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for result in results:
+                redraw(result)
+            best = min(best, time.perf_counter() - start)
+        timings.append(best / len(results))
+    return timings
+
+
+# Run in a fresh interpreter: argv is the GUI module and "eager" or "lazy". Prints the ms from
+# interpreter start (imports included) until Tk has handled the window's first Expose and the
+# redraws it queued.
+FIRST_PAINT_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import importlib
+import tkinter as tk
+gui = importlib.import_module(sys.argv[1])
+root = tk.Tk()
+app = gui.ReVIMApp(root, lazy_tabs=sys.argv[2] == "lazy")
+painted = []
+def report():
+    print((time.perf_counter() - start) * 1000)
+    root.destroy()
+def exposed(event):
+    if not painted:
+        painted.append(True)
+        root.after_idle(report)
+root.bind("<Expose>", exposed)
+root.mainloop()
+"""
+
+
+def time_first_paint(module, lazy, runs):
+    timings = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", FIRST_PAINT_SCRIPT, module, "lazy" if lazy else "eager"],
+                             capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        if out.returncode:
+            raise RuntimeError(f"{module} did not start: {(out.stderr.strip().splitlines() or ['?'])[-1]}")
+        timings.append(float(out.stdout.split()[-1]))
+    return statistics.median(timings)
+
+
+# Rows/s scoring `rows` (parsed responses) and the same rows from a packed store, in this process
+# (workers 0) and with the sharded scorer at each worker count. Pool start-up is included.
+def time_scaling(rows, chunk_size, worker_counts):
+    from revim_cli import score_chunks, score_store
+    from revim_shard import ShardedScorer
+    from revim_store import ResponseStore
+
+    def rate(chunks):
+        start = time.perf_counter()
+        count = sum(len(chunk) for chunk in chunks)
+        return count / (time.perf_counter() - start)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "responses.revim")
+        with ResponseStore(path, "w") as store:
+            store.append(rows)
+        with ResponseStore(path) as store:
+            results.append((0, rate(score_chunks(rows, chunk_size)), rate(score_store(store, chunk_size))))
+        for workers in worker_counts:
+            with ShardedScorer(workers, chunk_size) as scorer:
+                parsed = rate(scorer.score_chunks(rows))
+            with ShardedScorer(workers, chunk_size) as scorer:
+                results.append((workers, parsed, rate(scorer.score_store(path))))
+    return results
+
+
+# Top-level imports of `code` run under -X importtime: {module: cumulative ms}
+def import_times(code):
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, check=True,
+                         cwd=os.path.dirname(os.path.abspath(__file__))) # So the child finds the revim_* modules
+    times = {}
+    for line in out.stderr.splitlines():
+        fields = line.split("|")
+        if not line.startswith("import time:") or len(fields) != 3 or not fields[1].strip().isdigit():
+            continue
+        if not fields[2].startswith("  "): # Nested imports are indented further
+            times[fields[2].strip()] = int(fields[1]) / 1000
+    return times
+
+
+# Import cost of `code` beyond the interpreter's own startup imports, median of `runs` fresh runs
+def time_imports(code, runs):
+    startup = set(import_times("pass"))
+    totals = []
+    for _ in range(runs):
+        totals.append(sum(ms for name, ms in import_times(code).items() if name not in startup))
+    return statistics.median(totals)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark ReVIM per-evaluation time.")
+    parser.add_argument("--responses", type=int, default=200, help="Synthetic responses per run (default: 200)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per implementation; the best is reported")
+    parser.add_argument("--lang", choices=["en", "zh"], default="en")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--charts", action="store_true", help="Also time the results figure redraw")
+    parser.add_argument("--startup", action="store_true", help="Also time the GUI's first paint, eager vs. lazy tabs")
+    parser.add_argument("--imports", action="store_true", help="Also time the GUI's imports (python -X importtime)")
+    parser.add_argument("--scaling", type=int, nargs="?", const=100000, metavar="ROWS",
+                        help="Also time batch scoring at 1/2/4/8/N workers (default: 100000 rows)")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    responses = [random_response(rng, args.lang) for _ in range(args.responses)]
+    check_same(responses, args.lang)
+    check_locales(responses)
+
+    legacy = time_calls(LegacyCalculator, responses, args.lang, args.repeat)
+    compiled = time_calls(ReVIMCalculator, responses, args.lang, args.repeat)
+    print(f"get_val path:     {legacy * 1e6:9.1f} us/evaluation")
+    print(f"schema vector:    {compiled * 1e6:9.1f} us/evaluation")
+    print(f"speedup:          {legacy / compiled:9.2f}x")
+
+    encoding = "  ".join(f"{labels} {time_encoding(responses, labels, args.repeat) * 1e6:.1f}" for labels in ("en", "zh", "mixed"))
+    print(f"locale parity:    en = zh = mixed labels; encoding us/response: {encoding}")
+
+    lifelong_label = next(label for label, years in OPTION_MAPS[args.lang]["duration"][0].items() if years == 25)
+    lifelong = [dict(values, Q_exp_duration_realistic=lifelong_label) for values in responses]
+    for name, periods_per_year in PERIODS_PER_YEAR.items():
+        per_eval = time_calls(ReVIMCalculator, lifelong, args.lang, args.repeat, periods_per_year=periods_per_year)
+        steps = 25 * periods_per_year
+        print(f"lifelong {name:<9} {per_eval * 1e6:9.1f} us/evaluation ({steps} steps, {per_eval * 1e6 / steps:.2f} us/step)")
+
+    for name, periods_per_year in PERIODS_PER_YEAR.items():
+        chain = edit_chain(rng, lifelong[0], args.responses, args.lang)
+        full, incremental = time_edits(chain, args.lang, args.repeat, periods_per_year)
+        print(f"edit {name:<13} {full * 1e6:9.1f} -> {incremental * 1e6:7.1f} us/edit (full -> incremental, lifelong)")
+
+    distinct = responses[:max(1, args.responses // 10)]
+    revisits = [rng.choice(distinct) for _ in range(args.responses)]
+    full, cached, stats = time_cached(revisits, args.lang, args.repeat)
+    print(f"revisits          {full * 1e6:9.1f} -> {cached * 1e6:7.1f} us/evaluation (uncached -> ResultCache, "
+          f"hit rate {stats['hit_rate']:.0%})")
+
+    if args.charts:
+        results = [ReVIMCalculator(ResponseRecord(values), lang=args.lang).evaluate() for values in responses[:20]]
+        rebuild, update = time_chart_redraws(results, max(1, args.repeat // 2))
+        print(f"chart rebuild:    {rebuild * 1e3:9.1f} ms/redraw")
+        print(f"chart update:     {update * 1e3:9.1f} ms/redraw")
+
+    if args.scaling:
+        chunk_size = 8192
+        rows = [responses[n % len(responses)] for n in range(args.scaling)]
+        worker_counts = sorted({1, 2, 4, 8, os.cpu_count() or 1})
+        print(f"scaling, {args.scaling:,} rows in chunks of {chunk_size} ({os.cpu_count()} CPUs): rows/s parsed / store, speedup")
+        results = time_scaling(rows, chunk_size, worker_counts)
+        serial = results[0]
+        for workers, parsed, stored in results:
+            name = "in process" if workers == 0 else f"{workers} workers"
+            print(f"  {name:<12} {parsed:10,.0f} {parsed / serial[1]:5.2f}x   {stored:10,.0f} {stored / serial[2]:5.2f}x")
+
+    module = f"revim_evaluator_v1_{args.lang}"
+    if args.imports:
+        runs = max(3, args.repeat)
+        gui = time_imports(f"import {module}", runs)
+        charts = time_imports(f"import {module}; import revim_plotting; revim_plotting.load_charts()", runs)
+        label = f"import {module}:"
+        print(f"{label} {gui:6.1f} ms")
+        print(f"{'  + load_charts():':<{len(label)}} {charts - gui:6.1f} ms (first chart, or preloaded in the background)")
+
+    if args.startup:
+        runs = max(3, args.repeat)
+        for lazy, name in ((False, "eager tabs"), (True, "lazy tabs")):
+            print(f"first paint, {name + ':':<11} {time_first_paint(module, lazy, runs):6.1f} ms (median of {runs} cold starts)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
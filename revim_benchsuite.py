@@ -0,0 +1,341 @@
+import argparse
+import datetime
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+
+from revim_bench import random_response
+from revim_model import CATEGORY_QUESTION_SLOTS, MODEL_VERSION, ReVIMCalculator, ResponseRecord
+from revim_schema import OPTION_LABELS, PERIODS_PER_YEAR, SLOTS
+
+# --- Benchmark suite ---
+# Times the calculator and GUI hot paths on fixed synthetic responses (the same seed gives the
+# same answers on every machine) and saves the samples as JSON, so two runs can be compared:
+#
+#   get_val                        ReVIMCalculator.get_val over every schema answer
+#   category_value_at_t            calculate_category_value_at_t for every category
+#   nrupv_components[<horizon>]    calculate_nrupv_components_over_time, for each horizon option
+#   evaluate                       ReVIMCalculator(response).evaluate(), answer encoding included
+#   evaluate[scalar]               the same with series=False (what batch callers need)
+#   evaluate[report]               evaluate() and the English text report
+#   results_figure_agg             the results figure (with tornado chart) updated and drawn by Agg
+#   gui_construct[en|zh]           ReVIMApp construction, up to the first idle redraw (needs Tk)
+#   gui_display_visualizations     display_visualizations, until Tk has repainted (needs Tk)
+#
+# Each case is sampled --samples times; a sample repeats the case enough times to run for at
+# least --min-time and records the time per call. The GUI cases need a display: without one,
+# --xvfb starts a private Xvfb server for the run, and if none can be had they are recorded as
+# skipped. Charts are always rendered with Agg as well, so the drawing cost is tracked headless.
+#
+# compare reports every case's median change and flags it as a regression when the new samples
+# are slower with a one-sided Mann-Whitney U test at --alpha and the median grew by more than
+# --threshold; the exit status is 1 if any case regressed.
+#
+#   python revim_benchsuite.py run -o before.json
+#   python revim_benchsuite.py run -o after.json --xvfb
+#   python revim_benchsuite.py compare before.json after.json
+
+SUITE_VERSION = 1
+SEED = 20240601
+RESPONSES = 16
+GUI_CASES = ("gui_construct[en]", "gui_construct[zh]", "gui_display_visualizations")
+
+
+def fixed_responses(n=RESPONSES, seed=SEED):
+    rng = random.Random(seed)
+    return [random_response(rng, "en") for _ in range(n)]
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)))
+    except OSError:
+        return None
+    return out.stdout.strip() or None
+
+
+def _meta(args):
+    import numpy
+    return {
+        "suite_version": SUITE_VERSION, "model_version": MODEL_VERSION, "seed": SEED, "responses": RESPONSES,
+        "periods": args.periods, "samples": args.samples, "min_time": args.min_time,
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": _git_commit(), "python": platform.python_version(), "implementation": platform.python_implementation(),
+        "numpy": numpy.__version__, "platform": platform.platform(), "machine": platform.machine(), "cpus": os.cpu_count(),
+    }
+
+
+# Seconds per call of fn(i) (i counts the calls, so a case can cycle through its inputs):
+# `samples` samples of enough calls to last min_time
+def measure(fn, samples, min_time):
+    calls = 0
+    fn(calls) # Warm-up: first-use imports and caches
+    inner = 1
+    while True:
+        start = time.perf_counter()
+        for i in range(inner):
+            fn(calls + i)
+        elapsed = time.perf_counter() - start
+        calls += inner
+        if elapsed >= min_time or inner >= 1 << 20:
+            break
+        inner = max(inner * 2, int(inner * min_time / max(elapsed, 1e-9) * 1.2))
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        for i in range(inner):
+            fn(calls + i)
+        timings.append((time.perf_counter() - start) / inner)
+        calls += inner
+    return {"samples": timings, "inner": inner, "median": statistics.median(timings),
+            "mean": statistics.fmean(timings), "stdev": statistics.stdev(timings) if len(timings) > 1 else 0.0}
+
+
+# --- Cases: name -> fn(i), or a reason string when the case cannot run here ---
+
+def model_cases(responses, periods_per_year):
+    records = [ResponseRecord(values) for values in responses]
+    calculators = [ReVIMCalculator(record, periods_per_year=periods_per_year) for record in records]
+    n = len(calculators)
+
+    def get_val(i):
+        calculator = calculators[i % n]
+        for key, _, default in SLOTS:
+            calculator.get_val(key, default)
+
+    categories = [(cat_key, len(slots)) for cat_key, slots in CATEGORY_QUESTION_SLOTS.items()]
+    def category_value_at_t(i):
+        calculator = calculators[i % n]
+        for cat_key, num_q in categories:
+            calculator.calculate_category_value_at_t(cat_key, num_q, None, None, i % 10)
+
+    cases = {"get_val": get_val, "category_value_at_t": category_value_at_t}
+    for label in OPTION_LABELS["en"]["duration"]:
+        horizon = [ReVIMCalculator(ResponseRecord(dict(values, Q_exp_duration_realistic=label)), periods_per_year=periods_per_year)
+                   for values in responses]
+        cases[f"nrupv_components[{label}]"] = lambda i, horizon=horizon: horizon[i % n].calculate_nrupv_components_over_time()
+    cases["evaluate"] = lambda i: ReVIMCalculator(responses[i % n], periods_per_year=periods_per_year).evaluate()
+    cases["evaluate[scalar]"] = lambda i: ReVIMCalculator(responses[i % n], periods_per_year=periods_per_year).evaluate(series=False)
+    cases["evaluate[report]"] = lambda i: ReVIMCalculator(responses[i % n], periods_per_year=periods_per_year).evaluate().report()
+    return cases
+
+
+def _tornado_rows(responses):
+    from revim_attribution import attribute
+    return [[(row["item"], row["nrupv_down"], row["nrupv_up"]) for row in attribute(values, shapley=False).top(10)]
+            for values in responses]
+
+
+def chart_cases(responses, periods_per_year):
+    import matplotlib
+    matplotlib.use("Agg")
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from revim_charts import ResultsFigure
+
+    results = [ReVIMCalculator(values, periods_per_year=periods_per_year).evaluate() for values in responses]
+    tornado = _tornado_rows(responses)
+    figure = ResultsFigure(lang="en", figsize=(8, 9), tornado=True) # As display_visualizations builds it
+    canvas = FigureCanvasAgg(figure.fig)
+
+    def results_figure_agg(i):
+        # Consecutive calls show different responses, so every call redraws
+        figure.update(results[i % len(results)], tornado[i % len(tornado)])
+        canvas.draw()
+    return {"results_figure_agg": results_figure_agg}
+
+
+def start_xvfb():
+    # A private Xvfb server on a free display; returns the process, or None if Xvfb is not installed
+    if shutil.which("Xvfb") is None:
+        return None
+    read_fd, write_fd = os.pipe()
+    process = subprocess.Popen(["Xvfb", "-displayfd", str(write_fd), "-screen", "0", "1280x1024x24", "-nolisten", "tcp"],
+                               pass_fds=(write_fd,), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    os.close(write_fd)
+    with os.fdopen(read_fd) as f:
+        display = f.readline().strip()
+    if not display:
+        process.kill()
+        process.wait()
+        return None
+    os.environ["DISPLAY"] = f":{display}"
+    return process
+
+
+def gui_cases(responses, periods_per_year):
+    import tkinter as tk
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        reason = f"no display ({e})"
+        return {name: reason for name in GUI_CASES}, None
+    root.withdraw()
+    import revim_evaluator_v1_en
+    import revim_evaluator_v1_zh
+    cases = {}
+    for lang, module in (("en", revim_evaluator_v1_en), ("zh", revim_evaluator_v1_zh)):
+        def construct(i, module=module):
+            window = tk.Toplevel(root)
+            module.ReVIMApp(window)
+            window.update_idletasks()
+            window.destroy()
+        cases[f"gui_construct[{lang}]"] = construct
+
+    window = tk.Toplevel(root)
+    app = revim_evaluator_v1_en.ReVIMApp(window)
+    results = [ReVIMCalculator(values, periods_per_year=periods_per_year).evaluate() for values in responses]
+    attributions = [[{"item": item, "nrupv_down": down, "nrupv_up": up} for item, down, up in rows] for rows in _tornado_rows(responses)]
+    for rows in attributions: # Tornado labels are the GUI's question texts
+        rows[:] = [row for row in rows if row["item"] in app.question_labels]
+    def display_visualizations(i):
+        app.display_visualizations(results[i % len(results)], attributions[i % len(attributions)])
+        window.update() # Runs the queued draw_idle repaint
+    cases["gui_display_visualizations"] = display_visualizations
+    return cases, root
+
+
+def run_suite(args):
+    responses = fixed_responses()
+    p = PERIODS_PER_YEAR[args.periods]
+    cases = dict(model_cases(responses, p))
+    cases.update(chart_cases(responses, p))
+    xvfb = root = None
+    if not args.no_gui and (not args.cases or any(pattern in name for pattern in args.cases for name in GUI_CASES)):
+        if args.xvfb and not os.environ.get("DISPLAY"):
+            xvfb = start_xvfb()
+            if xvfb is None:
+                print("Xvfb is not available; GUI cases will be skipped", file=sys.stderr)
+        gui, root = gui_cases(responses, p)
+        cases.update(gui)
+
+    results = {}
+    try:
+        for name, fn in cases.items():
+            if args.cases and not any(pattern in name for pattern in args.cases):
+                continue
+            if isinstance(fn, str):
+                results[name] = {"skipped": fn}
+                print(f"{name:<42} skipped: {fn}", file=sys.stderr)
+                continue
+            results[name] = measure(fn, args.samples, args.min_time)
+            result = results[name]
+            print(f"{name:<42} {result['median'] * 1e6:>12.1f} µs  (±{result['stdev'] / result['median'] * 100:.1f}%, "
+                  f"{args.samples} x {result['inner']})", file=sys.stderr)
+    finally:
+        if root is not None:
+            root.destroy()
+        if xvfb is not None:
+            xvfb.terminate()
+            xvfb.wait()
+    return {"meta": _meta(args), "cases": results}
+
+
+# --- Comparison ---
+
+def mann_whitney_greater(new, old):
+    # One-sided Mann-Whitney U test that `new` tends to be larger than `old` (normal approximation
+    # with tie and continuity correction); returns (U of new, p-value)
+    n1, n2 = len(new), len(old)
+    pooled = sorted([(v, 0) for v in new] + [(v, 1) for v in old])
+    ranks = [0.0] * len(pooled)
+    ties = 0.0
+    i = 0
+    while i < len(pooled):
+        j = i
+        while j + 1 < len(pooled) and pooled[j + 1][0] == pooled[i][0]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[k] = (i + j) / 2 + 1
+        ties += (j - i + 1) ** 3 - (j - i + 1)
+        i = j + 1
+    u = sum(rank for rank, (_, group) in zip(ranks, pooled) if group == 0) - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1)))
+    if variance <= 0:
+        return u, 1.0
+    z = (u - n1 * n2 / 2 - 0.5) / math.sqrt(variance)
+    return u, 1 - statistics.NormalDist().cdf(z)
+
+
+# Rows of (case, old median, new median, change, p-value, verdict) for the cases both runs timed
+def compare(old, new, alpha=0.01, threshold=0.05):
+    rows = []
+    for name, after in new["cases"].items():
+        before = old["cases"].get(name)
+        if before is None or "skipped" in before or "skipped" in after:
+            reason = "new case" if before is None else "skipped"
+            rows.append((name, None, None, None, None, reason))
+            continue
+        change = after["median"] / before["median"] - 1
+        _, p_slower = mann_whitney_greater(after["samples"], before["samples"])
+        _, p_faster = mann_whitney_greater(before["samples"], after["samples"])
+        if p_slower < alpha and change > threshold:
+            verdict = "REGRESSION"
+        elif p_faster < alpha and change < -threshold:
+            verdict = "faster"
+        else:
+            verdict = "same"
+        rows.append((name, before["median"], after["median"], change, p_slower, verdict))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the ReVIM calculator and GUI hot paths, or compare two runs.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="Run the suite and save the results as JSON")
+    run.add_argument("-o", "--output", required=True, help="Results file (JSON)")
+    run.add_argument("--samples", type=int, default=15, help="Samples per case (default: 15)")
+    run.add_argument("--min-time", type=float, default=0.05, help="Minimum seconds per sample (default: 0.05)")
+    run.add_argument("--periods", choices=list(PERIODS_PER_YEAR), default="annual", help="Horizon resolution (default: annual)")
+    run.add_argument("--cases", nargs="+", help="Only the cases whose names contain one of these")
+    run.add_argument("--xvfb", action="store_true", help="Without a display, run the GUI cases on a private Xvfb server")
+    run.add_argument("--no-gui", action="store_true", help="Skip the GUI cases")
+    cmp = commands.add_parser("compare", help="Flag statistically significant regressions between two runs")
+    cmp.add_argument("old")
+    cmp.add_argument("new")
+    cmp.add_argument("--alpha", type=float, default=0.01, help="Significance level (default: 0.01)")
+    cmp.add_argument("--threshold", type=float, default=0.05, help="Smallest median slowdown reported, as a fraction (default: 0.05)")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        if args.samples < 2 or args.min_time <= 0:
+            parser.error("--samples must be at least 2 and --min-time positive")
+        start = time.perf_counter()
+        results = run_suite(args)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=1)
+        print(f"{len(results['cases'])} cases in {time.perf_counter() - start:.1f}s, saved to {args.output}", file=sys.stderr)
+        return 0
+
+    with open(args.old, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+    for key in ("suite_version", "seed", "periods", "machine", "python"):
+        if old["meta"].get(key) != new["meta"].get(key):
+            print(f"Warning: the runs differ in {key} ({old['meta'].get(key)} vs {new['meta'].get(key)})", file=sys.stderr)
+    rows = compare(old, new, args.alpha, args.threshold)
+    width = max([len(row[0]) for row in rows] + [4])
+    print(f"{'case':<{width}}  {'old':>12}  {'new':>12}  {'change':>8}  {'p':>8}")
+    for name, before, after, change, p, verdict in rows:
+        if before is None:
+            print(f"{name:<{width}}  {'':>12}  {'':>12}  {'':>8}  {'':>8}  {verdict}")
+        else:
+            print(f"{name:<{width}}  {before * 1e6:>10.1f}µs  {after * 1e6:>10.1f}µs  {change * 100:>+7.1f}%  {p:>8.4f}  {verdict}")
+    regressions = [row[0] for row in rows if row[5] == "REGRESSION"]
+    if regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,216 @@
+import argparse
+import json
+import math
+import sys
+import time
+
+import numpy as np
+
+from revim_batch import encode_response, evaluate_batch
+from revim_schema import OPTION_MAPS, PERIODS_PER_YEAR, SENSITIVITY_KEYS, SLOTS
+
+# --- Break-even solver ---
+# For every questionnaire input and every sensitivity factor, finds the value at which NRUPV
+# equals the decision threshold (OCAU + sunk-cost adjustment) with all other inputs held at the
+# response's answers, i.e. how far each answer is from flipping the verdict.
+#
+# All factors are solved together. First every factor's answer levels (1-7 for scales, the
+# dropdown options' values, 0/1 for flags, 0.5-1.5 for the sliders) are scored in one batch to
+# find, per factor, the pair of neighbouring levels around the sign change of the margin
+# NRUPV - threshold that is closest to the current answer. Then each bracketed factor is
+# bisected, one batch of one row per factor per step, down to `tol` of its range. Flags and
+# the conflict answer only take their levels, so they get no bisection.
+#
+#   python revim_breakeven.py response.json
+#   python revim_breakeven.py response.json --periods monthly --all
+
+SCALE_LEVELS = np.arange(1.0, 8.0) # 1-7 answers
+FLAG_LEVELS = np.array([0.0, 1.0])
+SENSITIVITY_LEVELS = np.round(np.linspace(0.5, 1.5, 11), 2) # Slider range
+
+
+SLOT_KINDS = {key: kind for key, kind, _ in SLOTS}
+
+
+def _option_levels(kind):
+    return np.array(sorted(set(OPTION_MAPS["en"][kind][0].values())), dtype=float)
+
+
+# A factor's value as the questionnaire shows it: the dropdown option for dropdown answers
+def describe_level(name, value, lang="en"):
+    if value != value:
+        return "N/A" if lang == "en" else "不适用"
+    options = OPTION_MAPS[lang].get(SLOT_KINDS.get(name))
+    if options:
+        for label, option_value in options[0].items():
+            if option_value == value:
+                return label
+    return f"{value:.3g}"
+
+
+class BreakEvenFactor:
+    # A questionnaire slot (slot index) or a sensitivity factor (sens_key); levels: the values
+    # it can take, ascending; continuous: whether values between the levels are meaningful
+    def __init__(self, name, group, levels, continuous, slot=None, sens_key=None):
+        self.name = name
+        self.group = group
+        self.levels = np.asarray(levels, dtype=float)
+        self.continuous = continuous
+        self.slot = slot
+        self.sens_key = sens_key
+
+
+def default_factors():
+    factors = []
+    for slot, (key, kind, _) in enumerate(SLOTS):
+        if kind in ("likert", "number", "weight"):
+            levels, continuous = SCALE_LEVELS, True
+        elif kind in ("flag", "conflict"):
+            levels, continuous = FLAG_LEVELS, False
+        else: # Dropdowns: their options' values, which the model uses as numbers
+            levels, continuous = _option_levels(kind), True
+        factors.append(BreakEvenFactor(key, "input", levels, continuous, slot=slot))
+    for key in SENSITIVITY_KEYS:
+        factors.append(BreakEvenFactor(key, "sensitivity", SENSITIVITY_LEVELS, True, sens_key=key))
+    return factors
+
+
+class BreakEvenResult:
+    # rows: one dict per factor with "factor", "group", "current" (NaN for an N/A answer),
+    # "break_even" (NaN when the decision does not change within the factor's range) and
+    # "flip_level" (the level closest to the current value at which the decision is the other one)
+    def __init__(self, rows, margin, is_worth_continuing, runs, elapsed):
+        self.rows = rows
+        self.margin = margin # NRUPV - threshold at the response's own answers
+        self.is_worth_continuing = is_worth_continuing
+        self.runs = runs
+        self.elapsed = elapsed
+
+    def found(self):
+        return [row for row in self.rows if row["break_even"] == row["break_even"]]
+
+    # Factors that flip the decision, the ones needing the smallest change (relative to their range) first
+    def ranked(self):
+        return sorted(self.found(), key=lambda row: row["distance"])
+
+    def format_table(self, rows=None):
+        rows = self.ranked() if rows is None else rows
+        width = max([len(row["factor"]) for row in rows] + [6])
+        lines = [f"{'factor':<{width}}  {'group':<11}{'current':>10}{'break-even':>12}{'flip level':>12}"]
+        for row in rows:
+            lines.append(f"{row['factor']:<{width}}  {row['group']:<11}{row['current']:>10.4g}{row['break_even']:>12.4g}{row['flip_level']:>12.4g}")
+        return "\n".join(lines)
+
+
+class _Evaluator:
+    # Scores copies of one response in which one factor per row is set to a given value
+    def __init__(self, x, sens, factors, periods_per_year):
+        self.x = x
+        self.sens = {key: float(sens.get(key, 1.0)) if sens else 1.0 for key in SENSITIVITY_KEYS}
+        self.periods_per_year = periods_per_year
+        self.slot = np.array([-1 if f.slot is None else f.slot for f in factors])
+        self.sens_index = np.array([-1 if f.sens_key is None else SENSITIVITY_KEYS.index(f.sens_key) for f in factors])
+        self.runs = 0
+
+    # which: factor index per row; values: the value that factor takes in that row
+    def margin(self, which, values):
+        n = len(which)
+        X = np.array(np.broadcast_to(self.x, (n, len(self.x))))
+        S = np.array(np.broadcast_to([self.sens[key] for key in SENSITIVITY_KEYS], (n, len(SENSITIVITY_KEYS))))
+        rows = np.arange(n)
+        is_slot = self.slot[which] >= 0
+        X[rows[is_slot], self.slot[which][is_slot]] = values[is_slot]
+        S[rows[~is_slot], self.sens_index[which][~is_slot]] = values[~is_slot]
+        res = evaluate_batch(X, {key: S[:, i] for i, key in enumerate(SENSITIVITY_KEYS)}, series=False,
+                             periods_per_year=self.periods_per_year)
+        self.runs += n
+        return res.nrupv - (res.ocau + res.sunk_cost_adj)
+
+
+# response: dict of answers or ResponseRecord; sens: dict of sensitivity factors; tol: bisection
+# stops once a bracket is narrower than tol x the factor's range
+def solve(response, sens=None, periods_per_year=1, factors=None, tol=1e-6):
+    start_time = time.perf_counter()
+    factors = factors or default_factors()
+    x = encode_response(response)
+    evaluator = _Evaluator(x, sens, factors, periods_per_year)
+    current = np.array([x[f.slot] if f.slot is not None else evaluator.sens[f.sens_key] for f in factors])
+    base_margin = float(evaluator.margin(np.array([0]), current[:1])[0]) # The response itself
+    base_worth = base_margin > 0
+
+    # Every factor at each of its levels (and at its current value), in one batch
+    grids = [np.unique(np.append(f.levels, c)) if c == c else f.levels for f, c in zip(factors, current)]
+    which = np.concatenate([np.full(len(g), i) for i, g in enumerate(grids)])
+    margins = evaluator.margin(which, np.concatenate(grids))
+    bounds = np.cumsum([0] + [len(g) for g in grids])
+
+    low = np.full(len(factors), np.nan) # Brackets, at the level on the current side first
+    high = np.full(len(factors), np.nan)
+    flip_level = np.full(len(factors), np.nan)
+    for i, grid in enumerate(grids):
+        worth = margins[bounds[i]:bounds[i + 1]] > 0
+        ref = current[i] if current[i] == current[i] else grid[0] # N/A answers: search upwards from the lowest level
+        best = None
+        for j in np.flatnonzero(worth[:-1] != worth[1:]):
+            distance = max(grid[j] - ref, ref - grid[j + 1], 0.0)
+            if best is None or distance < best[0]:
+                best = (distance, j)
+        if best is None:
+            continue
+        j = best[1]
+        near, far = (j, j + 1) if grid[j + 1] > ref else (j + 1, j)
+        low[i], high[i] = grid[near], grid[far]
+        flip_level[i] = grid[far]
+
+    # Vectorized bisection of all bracketed continuous factors, keeping low on the side whose
+    # decision matches the one at low's level
+    active = np.flatnonzero(~np.isnan(low) & np.array([f.continuous for f in factors]))
+    if len(active):
+        low_worth = evaluator.margin(active, low[active]) > 0
+        ranges = np.array([f.levels[-1] - f.levels[0] for f in factors])[active]
+        widest = float(np.max(np.abs(high[active] - low[active]) / ranges))
+        for _ in range(max(0, math.ceil(math.log2(widest / tol)))):
+            mid = (low[active] + high[active]) / 2
+            same = (evaluator.margin(active, mid) > 0) == low_worth
+            low[active] = np.where(same, mid, low[active])
+            high[active] = np.where(same, high[active], mid)
+    break_even = np.where(np.isnan(low), np.nan, (low + high) / 2)
+    discrete = ~np.array([f.continuous for f in factors])
+    break_even[discrete] = flip_level[discrete]
+
+    rows = []
+    for i, f in enumerate(factors):
+        width = f.levels[-1] - f.levels[0]
+        distance = abs(break_even[i] - current[i]) / width if current[i] == current[i] else math.inf
+        rows.append({"factor": f.name, "group": f.group, "current": float(current[i]), "break_even": float(break_even[i]),
+                     "flip_level": float(flip_level[i]), "distance": distance if break_even[i] == break_even[i] else math.nan})
+    return BreakEvenResult(rows, base_margin, base_worth, evaluator.runs, time.perf_counter() - start_time)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Break-even value of every input: where NRUPV meets OCAU + sunk-cost adjustment.")
+    parser.add_argument("input", help="JSON file with one response object (keys named like the GUI's data_vars)")
+    parser.add_argument("--lang", choices=["en", "zh"], default="en", help="Ignored: option labels of both languages are recognised (kept for existing scripts)")
+    parser.add_argument("--periods", choices=list(PERIODS_PER_YEAR), default="annual", help="Horizon resolution (default: annual)")
+    parser.add_argument("--all", action="store_true", help="Also list the factors that cannot flip the decision")
+    parser.add_argument("--json", action="store_true", help="Print the rows as JSON")
+    args = parser.parse_args(argv)
+
+    with open(args.input, encoding="utf-8") as f:
+        values = json.load(f)
+    sens = {key: float(values[key]) for key in SENSITIVITY_KEYS if values.get(key) not in (None, "")}
+    result = solve(values, sens, PERIODS_PER_YEAR[args.periods])
+
+    if args.json:
+        rows = [{k: None if isinstance(v, float) and not math.isfinite(v) else v for k, v in row.items()} for row in result.rows] # NaN -> null
+        print(json.dumps({"margin": result.margin, "is_worth_continuing": result.is_worth_continuing, "rows": rows}, indent=2))
+    else:
+        decision = "worth continuing" if result.is_worth_continuing else "not worth continuing"
+        print(f"Decision: {decision} (NRUPV - threshold = {result.margin:.4f})")
+        print(result.format_table(result.ranked() + ([row for row in result.rows if row["break_even"] != row["break_even"]] if args.all else [])))
+    print(f"{len(result.rows)} factors, {result.runs:,} model runs in {result.elapsed * 1000:.0f} ms", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,174 @@
+import collections
+import hashlib
+import json
+import math
+import sqlite3
+import struct
+import threading
+
+from revim_model import MODEL_VERSION, ReVIMResult
+from revim_schema import SENSITIVITY_KEYS
+
+# --- Content-addressed result cache ---
+# Results are stored under a hash of everything they depend on: the model version, the answer
+# vector (N/A answers are NaN there, so "not answered" and "N/A" keep their own keys), the
+# effective slider values in SENSITIVITY_KEYS order, the period resolution and, for full
+# results, the language of the feedback text. Two responses that encode to the same vector
+# share an entry however their answers were written (labels, numbers as strings, ...).
+#
+# ResultCache keeps the most recently used entries in memory, up to maxsize, and can write
+# every entry through to an SQLite file so later runs start warm. Bump MODEL_VERSION in
+# revim_model whenever a change to the model alters its results: old entries then miss.
+#
+#   cache = ResultCache(256)
+#   result = cache.evaluate(ReVIMCalculator(response, sensitivity))
+#   cache.stats() -> {"hits": ..., "misses": ..., "hit_rate": ..., ...}
+
+
+def _json(value):
+    # Results are kept as ReVIMResult in memory and as their dict (series included) on disk
+    return json.dumps(value.as_dict(series=True) if isinstance(value, ReVIMResult) else value)
+
+
+def _canonical(value):
+    # One bit pattern for every NaN and for -0.0 / 0.0
+    value = float(value)
+    return math.nan if value != value else value + 0.0
+
+
+def key_prefix(kind, sens, periods_per_year, lang=""):
+    # kind names what is cached ("result" for evaluate(), "batch" for revim_cli's scores);
+    # sens: effective slider values in SENSITIVITY_KEYS order
+    head = f"{kind}|{MODEL_VERSION}|{lang}|{periods_per_year}|".encode()
+    return head + struct.pack(f"<{len(sens)}d", *map(_canonical, sens))
+
+
+def vector_key(prefix, x):
+    # x: answer vector (sequence of floats)
+    data = struct.pack(f"<{len(x)}d", *map(_canonical, x))
+    return hashlib.blake2b(prefix + data, digest_size=16).hexdigest()
+
+
+def row_keys(prefix, X):
+    # One key per row of the 2-d numpy array X, the same as vector_key() gives each row.
+    # (numpy is left to the caller, so the GUIs can use this module without importing it.)
+    data = X.astype("<f8")
+    data[data != data] = math.nan
+    data += 0.0
+    return [hashlib.blake2b(prefix + row.tobytes(), digest_size=16).hexdigest() for row in data]
+
+
+def result_key(calculator):
+    sens = [calculator.get_sens_val(key, 1.0) for key in SENSITIVITY_KEYS]
+    return vector_key(key_prefix("result", sens, calculator.periods_per_year, calculator.lang), calculator.x)
+
+
+class ResultCache:
+    # maxsize: entries kept in memory; path: optional SQLite file every entry is also written to.
+    # Thread-safe (the GUIs share one between the Tk thread and the live-mode worker).
+    def __init__(self, maxsize=256, path=None):
+        if maxsize < 1:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.path = path
+        self.entries = collections.OrderedDict() # key -> value, least recently used first
+        self.hits = 0 # Served from memory or disk
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self._db.commit()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def _remember(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    # Value stored under key, or None; counts a hit or a miss
+    def get(self, key):
+        with self._lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return value
+            if self._db is not None:
+                row = self._db.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    value = json.loads(row[0])
+                    self._remember(key, value)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return value
+            self.misses += 1
+            return None
+
+    # value: anything JSON can store (round trips exactly for floats, NaN included)
+    def put(self, key, value):
+        with self._lock:
+            self._remember(key, value)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO results (key, value) VALUES (?, ?)", (key, _json(value)))
+                self._db.commit()
+
+    def put_many(self, items):
+        # items: (key, value) pairs, written to disk in one transaction
+        items = list(items)
+        with self._lock:
+            for key, value in items:
+                self._remember(key, value)
+            if self._db is not None and items:
+                self._db.executemany("INSERT OR REPLACE INTO results (key, value) VALUES (?, ?)",
+                                     [(key, _json(value)) for key, value in items])
+                self._db.commit()
+
+    # Drop the in-memory entries (and with disk=True the file's as well); counters are kept
+    def clear(self, disk=False):
+        with self._lock:
+            self.entries.clear()
+            if disk and self._db is not None:
+                self._db.execute("DELETE FROM results")
+                self._db.commit()
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {"size": len(self.entries), "maxsize": self.maxsize, "hits": self.hits, "disk_hits": self.disk_hits,
+                "misses": self.misses, "evictions": self.evictions, "hit_rate": self.hits / lookups if lookups else 0.0}
+
+    # Same as calculator.evaluate(), through the cache. Results are immutable, so a hit returns
+    # the stored ReVIMResult itself.
+    def evaluate(self, calculator):
+        key = result_key(calculator)
+        result = self.get(key)
+        if result is not None:
+            if not isinstance(result, ReVIMResult): # Read back from disk; the key includes the language
+                result = ReVIMResult.from_dict(dict(result, lang=calculator.lang))
+                with self._lock:
+                    self._remember(key, result)
+            if calculator.profiler is not None: # Recorded so profiles show how many results came from the cache
+                run = calculator.profiler.start("evaluate")
+                run.lap("cache_hit")
+                run.finish(cached=True)
+            return result
+
+        result = calculator.evaluate()
+        self.put(key, result)
+        return result
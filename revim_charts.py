@@ -0,0 +1,291 @@
+import datetime
+import math
+
+from matplotlib import dates as mdates
+from matplotlib.figure import Figure
+from matplotlib.patches import Wedge
+
+from revim_schema import CATEGORY_LABELS_EN, COST_CATEGORIES, UTILITY_CATEGORIES
+
+# --- Results figure shared by both GUIs ---
+# The figure, its four axes and all artists are created once. update() then changes the
+# artists in place: pie wedges get new angles, labels and percentages, and the time series
+# lines get set_data(). update() reports whether anything changed; the caller then repaints
+# the canvas with draw_idle(). Axis limits and tick labels follow the data, so a changed
+# result repaints the whole (small) figure rather than blitting individual artists.
+#
+# With tornado=True the figure has a fifth, full-width panel under the four: a tornado chart of
+# the answers whose one-step change moves NRUPV the most (see revim_attribution).
+#
+# TrajectoryFigure charts one person's evaluations from the longitudinal log (revim_history):
+# NRUPV and the decision margin, and the initial utility and cost of every category, by date.
+
+CHART_TEXT = {
+    "en": {
+        "utility_title": "Initial Utility Composition (Weighted)", "utility_title_empty": "Initial Utility Composition",
+        "utility_empty": "No significant utility data",
+        "cost_title": "Initial Cost Composition (Weighted)", "cost_title_empty": "Initial Cost Composition",
+        "cost_empty": "No significant cost data",
+        "net": "Net Utility per Period", "discounted": "Discounted Net Utility per Period",
+        "time": "Time Period (Years)", "net_axis": "Net Utility Value", "net_title": "Expected Net Utility Over Time",
+        "net_empty": "No time series data",
+        "cumulative": "Cumulative NRUPV", "cumulative_title": "Cumulative Net Relationship Utility Present Value",
+        "cumulative_empty": "No cumulative data",
+        "tornado_title": "Effect of Moving Each Answer One Step", "tornado_axis": "Change in NRUPV",
+        "step_down": "One step lower", "step_up": "One step higher", "tornado_empty": "No answers to attribute",
+        "trajectory_title": "NRUPV and Decision Margin Over Time", "nrupv": "NRUPV", "margin": "Decision Margin (NRUPV - Threshold)",
+        "trajectory_utility": "Initial Utility by Category", "trajectory_cost": "Initial Cost by Category",
+        "date": "Date of Evaluation", "trajectory_empty": "No evaluations in this period",
+    },
+    "zh": {
+        "utility_title": "首期效用构成 (加权后)", "utility_title_empty": "首期效用构成",
+        "utility_empty": "无显著效用数据",
+        "cost_title": "首期成本构成 (加权后)", "cost_title_empty": "首期成本构成",
+        "cost_empty": "无显著成本数据",
+        "net": "每期净效用", "discounted": "每期折现后净效用",
+        "time": "时间周期 (年)", "net_axis": "净效用值", "net_title": "预期净效用随时间变化",
+        "net_empty": "无时间序列数据",
+        "cumulative": "累计NRUPV", "cumulative_title": "累计净关系效用现值",
+        "cumulative_empty": "无累计数据",
+        "tornado_title": "各答案变动一级对结果的影响", "tornado_axis": "NRUPV变化",
+        "step_down": "降低一级", "step_up": "提高一级", "tornado_empty": "无可归因的答案",
+        "trajectory_title": "NRUPV 与决策差额随时间变化", "nrupv": "NRUPV", "margin": "决策差额 (NRUPV - 阈值)",
+        "trajectory_utility": "各类别首期效用", "trajectory_cost": "各类别首期成本",
+        "date": "评估日期", "trajectory_empty": "该时间段内无评估记录",
+    },
+}
+
+
+class PieChart:
+    # Same layout as Axes.pie(sizes, labels, autopct='%1.1f%%', startangle=90): wedges run
+    # counterclockwise from 12 o'clock, labels at 1.1 x radius, percentages at 0.6 x radius.
+    # Wedges and texts are pooled and hidden when a later result has fewer slices.
+    def __init__(self, ax, fontsize=6):
+        self.ax = ax
+        self.fontsize = fontsize
+        self.wedges = []
+        self.labels = []
+        self.pcts = []
+        ax.set_aspect('equal')
+        ax.set_frame_on(False)
+        ax.set_xticks([])
+        ax.set_yticks([])
+        ax.set_xlim(-1.25, 1.25)
+        ax.set_ylim(-1.25, 1.25)
+
+    def _grow(self, n):
+        while len(self.wedges) < n:
+            color = f"C{len(self.wedges) % 10}" # Colour cycle order, as Axes.pie uses it
+            self.wedges.append(self.ax.add_patch(Wedge((0, 0), 1, 0, 0, facecolor=color, clip_on=False)))
+            self.labels.append(self.ax.text(0, 0, "", fontsize=self.fontsize, va='center', clip_on=False))
+            self.pcts.append(self.ax.text(0, 0, "", fontsize=self.fontsize, ha='center', va='center', clip_on=False))
+
+    def update(self, sizes, labels):
+        self._grow(len(sizes))
+        total = sum(sizes)
+        theta = 90.0
+        for i, wedge in enumerate(self.wedges):
+            visible = i < len(sizes)
+            wedge.set_visible(visible)
+            self.labels[i].set_visible(visible)
+            self.pcts[i].set_visible(visible)
+            if not visible:
+                continue
+            frac = sizes[i] / total
+            theta1, theta2 = theta, theta + 360.0 * frac
+            theta = theta2
+            wedge.set_theta1(theta1)
+            wedge.set_theta2(theta2)
+            mid = math.radians((theta1 + theta2) / 2)
+            x, y = math.cos(mid), math.sin(mid)
+            self.labels[i].set_position((1.1 * x, 1.1 * y))
+            self.labels[i].set_text(labels[i])
+            self.labels[i].set_horizontalalignment('left' if x > 0 else 'right')
+            self.pcts[i].set_position((0.6 * x, 0.6 * y))
+            self.pcts[i].set_text(f"{100 * frac:.1f}%")
+
+    def clear(self):
+        self.update([], [])
+
+
+class TornadoChart:
+    # Pairs of horizontal bars from zero, one pair per answer (largest effect on top): the change
+    # in NRUPV after moving the answer one step down and one step up. Bars are pooled like
+    # PieChart's wedges; rows beyond the current count are hidden.
+    def __init__(self, ax, text, rows=10, fontsize=6, label_width=48):
+        self.ax = ax
+        self.label_width = label_width
+        positions = list(range(rows - 1, -1, -1))
+        self.down = ax.barh([y - 0.2 for y in positions], [0] * rows, height=0.4, color="C3", label=text["step_down"]).patches
+        self.up = ax.barh([y + 0.2 for y in positions], [0] * rows, height=0.4, color="C2", label=text["step_up"]).patches
+        ax.axvline(0, color='grey', lw=0.8)
+        ax.set_yticks(positions)
+        ax.set_yticklabels([""] * rows)
+        ax.set_ylim(-0.7, rows - 0.3)
+        ax.set_xlabel(text["tornado_axis"], fontsize=7)
+        ax.set_title(text["tornado_title"], fontsize=8)
+        ax.legend(fontsize=6, loc='lower right')
+        ax.tick_params(axis='both', which='major', labelsize=6)
+
+    # rows: (label, change one step down, change one step up), largest first; NaN = no such step
+    def update(self, rows):
+        rows = rows[:len(self.down)]
+        labels = []
+        limit = 0.0
+        for i, (down_bar, up_bar) in enumerate(zip(self.down, self.up)):
+            visible = i < len(rows)
+            down_bar.set_visible(visible)
+            up_bar.set_visible(visible)
+            if not visible:
+                labels.append("")
+                continue
+            label, down, up = rows[i]
+            down_bar.set_width(down if down == down else 0.0)
+            up_bar.set_width(up if up == up else 0.0)
+            limit = max(limit, abs(down_bar.get_width()), abs(up_bar.get_width()))
+            labels.append(label if len(label) <= self.label_width else label[:self.label_width - 3] + "...")
+        self.ax.set_yticklabels(labels)
+        limit = limit * 1.1 or 1.0
+        self.ax.set_xlim(-limit, limit)
+
+
+class ResultsFigure:
+    def __init__(self, lang="en", figsize=(8, 7), dpi=100, tornado=False):
+        self.text = CHART_TEXT.get(lang, CHART_TEXT["en"])
+        text = self.text
+        self.fig = Figure(figsize=figsize, dpi=dpi)
+        if tornado: # The four panels in the top part, the tornado chart below with room for its labels
+            grid = self.fig.add_gridspec(2, 2, top=0.95, bottom=0.42, hspace=0.5, wspace=0.35)
+            tornado_grid = self.fig.add_gridspec(1, 1, top=0.33, bottom=0.06, left=0.4, right=0.95)
+        else:
+            grid = self.fig.add_gridspec(2, 2, hspace=0.5, wspace=0.35)
+
+        self.ax_utility = self.fig.add_subplot(grid[0, 0])
+        self.ax_cost = self.fig.add_subplot(grid[0, 1])
+        self.ax_net = self.fig.add_subplot(grid[1, 0])
+        self.ax_cumulative = self.fig.add_subplot(grid[1, 1])
+        self.utility_pie = PieChart(self.ax_utility)
+        self.cost_pie = PieChart(self.ax_cost)
+
+        ax = self.ax_net
+        self.net_line, = ax.plot([], [], marker='o', markersize=3, label=text["net"])
+        self.discounted_line, = ax.plot([], [], marker='x', markersize=3, linestyle='--', label=text["discounted"])
+        ax.axhline(0, color='grey', lw=0.8, linestyle=':')
+        ax.set_xlabel(text["time"], fontsize=7)
+        ax.set_ylabel(text["net_axis"], fontsize=7)
+        ax.set_title(text["net_title"], fontsize=8)
+        ax.legend(fontsize=6)
+        ax.tick_params(axis='both', which='major', labelsize=6)
+
+        ax = self.ax_cumulative
+        self.cumulative_line, = ax.plot([], [], marker='o', markersize=3, label=text["cumulative"])
+        ax.axhline(0, color='grey', lw=0.8, linestyle=':')
+        ax.set_xlabel(text["time"], fontsize=7)
+        ax.set_ylabel(text["cumulative"], fontsize=7)
+        ax.set_title(text["cumulative_title"], fontsize=8)
+        ax.legend(fontsize=6)
+        ax.tick_params(axis='both', which='major', labelsize=6)
+
+        self.ax_tornado = self.tornado = None
+        if tornado:
+            self.ax_tornado = self.fig.add_subplot(tornado_grid[0, 0])
+            self.tornado = TornadoChart(self.ax_tornado, text)
+
+        # "No data" messages, shown instead of the artists above when a result has nothing to plot
+        self.empty_text = {}
+        for ax, key in ((self.ax_utility, "utility_empty"), (self.ax_cost, "cost_empty"),
+                        (self.ax_net, "net_empty"), (self.ax_cumulative, "cumulative_empty"), (self.ax_tornado, "tornado_empty")):
+            if ax is not None:
+                self.empty_text[ax] = ax.text(0.5, 0.5, text[key], ha='center', va='center', fontsize=8, transform=ax.transAxes, visible=False)
+        self.shown = None # Data currently on the figure
+
+    def _update_pie(self, ax, pie, breakdown, title_key):
+        data = {k: v for k, v in breakdown.items() if abs(v) > 1e-3} # Filter small/zero values
+        if data:
+            pie.update([abs(v) for v in data.values()], [f"{k} ({v:.1f})" for k, v in data.items()]) # Pie needs positive values
+            ax.set_title(self.text[title_key], fontsize=8)
+        else:
+            pie.clear()
+            ax.set_title(self.text[title_key + "_empty"], fontsize=8)
+        self.empty_text[ax].set_visible(not data)
+
+    def _update_lines(self, ax, lines, x, series):
+        has_data = bool(x)
+        for line, y in zip(lines, series):
+            line.set_data(x, y if has_data else [])
+            line.set_visible(has_data)
+        ax.get_legend().set_visible(has_data)
+        self.empty_text[ax].set_visible(not has_data)
+        if has_data:
+            ax.relim()
+            ax.autoscale_view()
+
+    # result: a ReVIMResult with series (revim_model); tornado: TornadoChart rows, for a figure
+    # made with tornado=True.
+    # Returns False when the figure already shows this data and needs no repaint.
+    def update(self, result, tornado=None):
+        x = list(result.time_periods or [])
+        tornado = list(tornado or []) if self.tornado else []
+        data = (tuple(result.initial_utility_breakdown.items()), tuple(result.initial_cost_breakdown.items()), tuple(x),
+                tuple(result.Net_U_t_series), tuple(result.discounted_Net_U_t_series), tuple(result.cumulative_nrupv_series),
+                tuple(tornado))
+        if data == self.shown:
+            return False
+        self.shown = data
+
+        self._update_pie(self.ax_utility, self.utility_pie, result.initial_utility_breakdown, "utility_title")
+        self._update_pie(self.ax_cost, self.cost_pie, result.initial_cost_breakdown, "cost_title")
+        self._update_lines(self.ax_net, (self.net_line, self.discounted_line), x,
+                           (result.Net_U_t_series, result.discounted_Net_U_t_series))
+        self._update_lines(self.ax_cumulative, (self.cumulative_line,), x, (result.cumulative_nrupv_series,))
+        if self.tornado:
+            self.tornado.update(tornado)
+            self.ax_tornado.get_legend().set_visible(bool(tornado))
+            self.empty_text[self.ax_tornado].set_visible(not tornado)
+        return True
+
+
+class TrajectoryFigure:
+    def __init__(self, lang="en", figsize=(8, 8), dpi=100):
+        self.text = CHART_TEXT.get(lang, CHART_TEXT["en"])
+        text = self.text
+        label = (lambda label_zh: CATEGORY_LABELS_EN[label_zh]) if lang == "en" else (lambda label_zh: label_zh)
+        self.fig = Figure(figsize=figsize, dpi=dpi)
+        self.fig.subplots_adjust(hspace=0.45, right=0.72)
+        self.ax_value = self.fig.add_subplot(3, 1, 1)
+        self.ax_utility = self.fig.add_subplot(3, 1, 2, sharex=self.ax_value)
+        self.ax_cost = self.fig.add_subplot(3, 1, 3, sharex=self.ax_value)
+
+        self.value_lines = {
+            "nrupv": self.ax_value.plot([], [], marker='o', markersize=3, label=text["nrupv"])[0],
+            "decision_margin": self.ax_value.plot([], [], marker='x', markersize=3, linestyle='--', label=text["margin"])[0],
+        }
+        self.utility_lines = {cat_key: self.ax_utility.plot([], [], marker='.', markersize=3, label=label(label_zh))[0]
+                              for cat_key, label_zh, _ in UTILITY_CATEGORIES}
+        self.cost_lines = {cat_key: self.ax_cost.plot([], [], marker='.', markersize=3, label=label(label_zh))[0]
+                           for cat_key, label_zh, _ in COST_CATEGORIES}
+        locator = mdates.AutoDateLocator()
+        self.ax_cost.xaxis.set_major_locator(locator)
+        self.ax_cost.xaxis.set_major_formatter(mdates.ConciseDateFormatter(locator))
+        self.empty_text = {}
+        for ax, title in ((self.ax_value, "trajectory_title"), (self.ax_utility, "trajectory_utility"), (self.ax_cost, "trajectory_cost")):
+            ax.axhline(0, color='grey', lw=0.8, linestyle=':')
+            ax.set_title(text[title], fontsize=8)
+            ax.legend(fontsize=6, loc='upper left', bbox_to_anchor=(1.01, 1.0))
+            ax.tick_params(axis='both', which='major', labelsize=6)
+            self.empty_text[ax] = ax.text(0.5, 0.5, text["trajectory_empty"], ha='center', va='center', fontsize=8, transform=ax.transAxes, visible=False)
+        self.ax_cost.set_xlabel(text["date"], fontsize=7)
+
+    # entries: {column: values}, as revim_history.EvaluationLog.history returns them
+    def update(self, entries):
+        x = [mdates.date2num(datetime.datetime.fromtimestamp(int(t))) for t in entries["time"]]
+        for ax, lines in ((self.ax_value, self.value_lines), (self.ax_utility, self.utility_lines), (self.ax_cost, self.cost_lines)):
+            for column, line in lines.items():
+                line.set_data(x, entries[column])
+                line.set_visible(bool(x))
+            ax.get_legend().set_visible(bool(x))
+            self.empty_text[ax].set_visible(not x)
+            ax.relim()
+            ax.autoscale_view()
+        if len(x) == 1: # A single date gives autoscale an empty range
+            self.ax_value.set_xlim(x[0] - 15, x[0] + 15)
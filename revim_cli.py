@@ -0,0 +1,404 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from itertools import islice
+
+import numpy as np
+
+from revim_batch import BATCH_COLUMNS, SENSITIVITY_KEYS, encode_response, evaluate_batch
+from revim_cache import ResultCache, key_prefix, row_keys
+from revim_schema import PERIODS_PER_YEAR
+
+# --- Headless batch scoring ---
+# Streams a CSV or JSON Lines file of responses (columns/keys named like the GUI's data_vars,
+# e.g. U_psych_PSYCH_1, Q_risk_breakup_A_1), scores it in fixed-size chunks with the batch
+# engine and writes one result row per input row. Only one chunk is held in memory at a time.
+# Option labels may be English or Chinese, even mixed within one file. Packed response stores
+# (revim_store, .revim) are scored straight from the memory-mapped file; their output rows are
+# identified by the "row" column (the record's position in the store).
+#
+#   python revim_cli.py responses.csv -o scores.csv --chunk-size 2048
+#   python revim_cli.py responses.jsonl --sens base_discount_rate_adj=1.2
+#   python revim_cli.py responses.csv --periods monthly
+#   python revim_cli.py responses.csv --cache scores.sqlite   # re-runs only score new or changed rows
+#   python revim_cli.py responses.revim -o scores.csv --id-column row
+#   python revim_cli.py responses.csv -o scores.csv --workers 8 --chunk-size 8192 --progress
+#   python revim_cli.py responses.csv -o scores.csv --workers 8 --chunk-size 8192 --resume
+#
+# With --workers, chunks are scored by a process pool (revim_shard) and written in input order.
+# Output files are checkpointed after every chunk (OUTPUT.checkpoint, removed when the run
+# completes); --resume truncates the output to the last checkpoint and carries on from there.
+
+RESULT_FIELDS = ["nrupv", "ocau", "sunk_cost_adj", "decision_threshold", "decision_margin", "is_worth_continuing"]
+
+
+def detect_format(path, fmt=None):
+    if fmt:
+        return fmt
+    if path.lower().endswith(".revim"):
+        return "store"
+    return "jsonl" if path.lower().endswith((".jsonl", ".ndjson", ".json")) else "csv"
+
+
+def read_responses(stream, fmt):
+    if fmt == "csv":
+        yield from csv.DictReader(stream)
+    else:
+        for line in stream:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def _chunks(iterable, size):
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _row_sens(values, defaults):
+    sens = dict(defaults)
+    for key in SENSITIVITY_KEYS:
+        if values.get(key) not in (None, ""):
+            sens[key] = float(values[key])
+    return sens
+
+
+# (n, len(RESULT_FIELDS)) array of the result fields, is_worth_continuing as 0/1
+def score_arrays(X, S, periods_per_year):
+    res = evaluate_batch(X, S, series=False, periods_per_year=periods_per_year)
+    threshold = res.ocau + res.sunk_cost_adj
+    return np.column_stack([res.nrupv, res.ocau, res.sunk_cost_adj, threshold, res.nrupv - threshold, res.is_worth_continuing])
+
+
+def result_dicts(A):
+    return [{
+        "nrupv": float(row[0]), "ocau": float(row[1]), "sunk_cost_adj": float(row[2]),
+        "decision_threshold": float(row[3]), "decision_margin": float(row[4]), "is_worth_continuing": bool(row[5]),
+    } for row in A]
+
+
+def _score_chunk(X, S, periods_per_year):
+    return result_dicts(score_arrays(X, S, periods_per_year))
+
+
+def _cached_scores(cache, X, S, periods_per_year):
+    # Cache key of a row: its answer vector followed by its slider values
+    keys = row_keys(key_prefix("batch", [], periods_per_year), np.column_stack([X] + [S[key] for key in SENSITIVITY_KEYS]))
+    scores = [cache.get(key) for key in keys]
+    todo = {} # Missing key -> first row with it
+    for j, (key, score) in enumerate(zip(keys, scores)):
+        if score is None:
+            todo.setdefault(key, j)
+    if todo:
+        rows = list(todo.values())
+        fresh = dict(zip(todo, _score_chunk(X[rows], {key: arr[rows] for key, arr in S.items()}, periods_per_year)))
+        cache.put_many(fresh.items())
+        scores = [fresh[key] if score is None else score for key, score in zip(keys, scores)]
+    return scores
+
+
+# Encodes a chunk of input rows into X and S (arrays of at least len(chunk) rows). Returns the
+# positions of the valid rows and {position: error} for the invalid ones.
+def encode_chunk(chunk, X, S, defaults, skip_invalid=False, row_offset=0):
+    valid, errors = [], {}
+    for i, values in enumerate(chunk):
+        n = len(valid)
+        try:
+            encode_response(values, out=X[n])
+            for key, val in _row_sens(values, defaults).items():
+                S[key][n] = val
+        except ValueError as e:
+            if not skip_invalid:
+                raise ValueError(f"Row {row_offset + i + 1}: {e}") from None
+            errors[i] = str(e)
+            continue
+        valid.append(i)
+    return valid, errors
+
+
+def merge_chunk(chunk, valid, errors, scores):
+    # (input row, result dict or None, error or None) per row of the chunk, in input order
+    position = {i: j for j, i in enumerate(valid)}
+    return [(values, None, errors[i]) if i in errors else (values, scores[position[i]], None) for i, values in enumerate(chunk)]
+
+
+def sens_defaults(sens):
+    defaults = {key: 1.0 for key in SENSITIVITY_KEYS}
+    defaults.update(sens or {})
+    return defaults
+
+
+# Yields one list per chunk of (input row, result dict or None, error message or None), in input order
+# cache: optional revim_cache.ResultCache; rows scored before (in this run or, with an on-disk
+# cache, an earlier one) are looked up instead of evaluated, and identical rows are evaluated once
+# row_offset: number of rows before the first one (for error messages)
+def score_chunks(rows, chunk_size=1024, sens=None, skip_invalid=False, periods_per_year=1, cache=None, row_offset=0):
+    defaults = sens_defaults(sens)
+    X = np.empty((chunk_size, len(BATCH_COLUMNS))) # Reused for every chunk
+    S = {key: np.empty(chunk_size) for key in SENSITIVITY_KEYS}
+    for chunk in _chunks(rows, chunk_size):
+        valid, errors = encode_chunk(chunk, X, S, defaults, skip_invalid, row_offset)
+        n = len(valid)
+        chunk_sens = {key: arr[:n] for key, arr in S.items()}
+        if cache is None:
+            scores = _score_chunk(X[:n], chunk_sens, periods_per_year)
+        else:
+            scores = _cached_scores(cache, X[:n], chunk_sens, periods_per_year)
+        yield merge_chunk(chunk, valid, errors, scores)
+        row_offset += len(chunk)
+
+
+# Yields (input row, result dict or None, error message or None) in input order
+def score_rows(rows, chunk_size=1024, sens=None, skip_invalid=False, periods_per_year=1, cache=None):
+    for chunk in score_chunks(rows, chunk_size, sens, skip_invalid, periods_per_year, cache):
+        yield from chunk
+
+
+# Same as score_chunks for a revim_store.ResponseStore, read chunk by chunk without parsing from
+# row start on. The store holds answers only, so sens applies to every row. Rows are ({"row": index}, result, None).
+def score_store(store, chunk_size=1024, sens=None, periods_per_year=1, cache=None, start=0):
+    defaults = sens_defaults(sens)
+    for first, X in store.chunks(chunk_size, start):
+        chunk_sens = {key: np.full(len(X), val) for key, val in defaults.items()}
+        if cache is None:
+            scores = _score_chunk(X, chunk_sens, periods_per_year)
+        else:
+            scores = _cached_scores(cache, X, chunk_sens, periods_per_year)
+        yield [({"row": first + j}, score, None) for j, score in enumerate(scores)]
+
+
+class ResultWriter:
+    # header: write the CSV header (not when continuing a file)
+    def __init__(self, stream, fmt, id_column=None, header=True):
+        self.stream = stream
+        self.fmt = fmt
+        self.id_column = id_column
+        fields = ([id_column] if id_column else []) + RESULT_FIELDS + ["error"]
+        if fmt == "csv":
+            self.writer = csv.DictWriter(stream, fieldnames=fields, lineterminator="\n")
+            if header:
+                self.writer.writeheader()
+
+    def write(self, values, result, error):
+        record = {self.id_column: values.get(self.id_column) if isinstance(values, dict) else None} if self.id_column else {}
+        if result is None:
+            record.update({field: None for field in RESULT_FIELDS})
+        else:
+            record.update({k: (v if isinstance(v, bool) else float(v)) for k, v in result.items()})
+        record["error"] = error
+        if self.fmt == "csv":
+            if result is not None:
+                record = {k: (f"{v:.10g}" if isinstance(v, float) else v) for k, v in record.items()}
+                record["is_worth_continuing"] = int(result["is_worth_continuing"])
+            self.writer.writerow(record)
+        else:
+            self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def _parse_sens(items):
+    sens = {}
+    for item in items or []:
+        key, _, value = item.partition("=")
+        if key not in SENSITIVITY_KEYS:
+            raise argparse.ArgumentTypeError(f"Unknown sensitivity factor: {key}")
+        sens[key] = float(value)
+    return sens
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Score ReVIM questionnaire responses without the GUI.")
+    parser.add_argument("input", help="CSV, JSON Lines or packed store (.revim) file of responses ('-' for stdin)")
+    parser.add_argument("-o", "--output", default="-", help="Output file ('-' for stdout)")
+    parser.add_argument("--input-format", choices=["csv", "jsonl", "store"], help="Default: guessed from the file extension")
+    parser.add_argument("--output-format", choices=["csv", "jsonl"], help="Default: guessed from the file extension")
+    parser.add_argument("--chunk-size", type=int, default=1024, help="Rows scored per batch (default: 1024)")
+    parser.add_argument("--lang", choices=["en", "zh"], default="en", help="Ignored: option labels of both languages are recognised (kept for existing scripts)")
+    parser.add_argument("--id-column", help="Input column copied to the output to identify rows")
+    parser.add_argument("--sens", action="append", metavar="KEY=VALUE",
+                        help="Sensitivity factor applied to all rows, e.g. base_discount_rate_adj=1.2; per-row columns override it")
+    parser.add_argument("--periods", choices=list(PERIODS_PER_YEAR), default="annual", help="Horizon resolution (default: annual)")
+    parser.add_argument("--skip-invalid", action="store_true", help="Write an error for invalid rows instead of stopping")
+    parser.add_argument("--cache", nargs="?", const=":memory:", metavar="FILE",
+                        help="Reuse the scores of identical rows; with FILE (SQLite) also across runs")
+    parser.add_argument("--cache-size", type=int, default=100000, help="Scores kept in memory with --cache (default: 100000)")
+    parser.add_argument("--workers", type=int, help="Score chunks in this many processes (default: in this process)")
+    parser.add_argument("--progress", action="store_true", help="Show rows done, rate and time left on stderr")
+    parser.add_argument("--resume", action="store_true", help="Continue an interrupted run from its last completed chunk")
+    return parser
+
+
+def _checkpoint_settings(args, in_fmt, out_fmt, sens):
+    # What a resumed run must share with the interrupted one for the output to continue it
+    return {"input": os.path.abspath(args.input), "input_format": in_fmt, "output_format": out_fmt, "id_column": args.id_column,
+            "sens": sens, "periods": args.periods, "skip_invalid": args.skip_invalid}
+
+
+def _read_checkpoint(path, settings):
+    try:
+        with open(path, encoding="utf-8") as f:
+            checkpoint = json.load(f)
+    except FileNotFoundError:
+        return None
+    if checkpoint.get("settings") != settings:
+        raise ValueError(f"{path} belongs to a run with other input or options; delete it to start over")
+    return checkpoint
+
+
+def _write_checkpoint(path, settings, rows, output_bytes):
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"settings": settings, "rows": rows, "output_bytes": output_bytes}, f)
+    os.replace(path + ".tmp", path)
+
+
+class Progress:
+    # One stderr line, rewritten after every chunk. total: rows in the input when known (stores);
+    # size_of: otherwise, a function giving (bytes read, file size) for the share done
+    def __init__(self, total=None, size_of=None, done=0):
+        self.total = total
+        self.size_of = size_of
+        self.first = done
+        self.start = time.perf_counter()
+
+    def update(self, done):
+        elapsed = time.perf_counter() - self.start
+        rate = (done - self.first) / elapsed if elapsed > 0 else 0.0
+        line = f"\r{done:,} rows, {rate:,.0f} rows/s"
+        if self.total:
+            line += f", {done / self.total:.1%}"
+            if rate > 0:
+                line += f", {(self.total - done) / rate:,.0f}s left"
+        elif self.size_of is not None:
+            position, size = self.size_of()
+            if size:
+                line += f", {min(position / size, 1.0):.1%} of the input read"
+        print(line.ljust(60), end="", file=sys.stderr, flush=True)
+
+    def finish(self):
+        print(file=sys.stderr)
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        sens = _parse_sens(args.sens)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be positive")
+    if args.cache_size < 1:
+        parser.error("--cache-size must be positive")
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be positive")
+    if args.workers and args.cache:
+        parser.error("--cache cannot be combined with --workers")
+    if args.resume and (args.output == "-" or args.input == "-"):
+        parser.error("--resume needs input and output files")
+
+    in_fmt = detect_format(args.input, args.input_format)
+    out_fmt = detect_format(args.output, args.output_format)
+    if out_fmt == "store":
+        parser.error("Scores are written as CSV or JSON Lines")
+    if in_fmt == "store" and args.input == "-":
+        parser.error("A response store cannot be read from stdin")
+
+    # Output files are checkpointed after every chunk; --resume continues after the last one
+    checkpoint_path = None if args.output == "-" else args.output + ".checkpoint"
+    settings = _checkpoint_settings(args, in_fmt, out_fmt, sens)
+    done = 0
+    try:
+        checkpoint = _read_checkpoint(checkpoint_path, settings) if args.resume else None
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    if checkpoint is not None:
+        done = checkpoint["rows"]
+        with open(args.output, "r+b") as f:
+            f.truncate(checkpoint["output_bytes"]) # Rows written after the checkpoint are scored again
+        print(f"Resuming after row {done:,}", file=sys.stderr)
+
+    if in_fmt == "store":
+        from revim_store import ResponseStore
+        try:
+            src = ResponseStore(args.input)
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+    else:
+        src = sys.stdin if args.input == "-" else open(args.input, newline="", encoding="utf-8-sig")
+    dst = sys.stdout if args.output == "-" else open(args.output, "a" if checkpoint else "w", newline="", encoding="utf-8")
+
+    cache = None
+    if args.cache:
+        cache = ResultCache(args.cache_size, None if args.cache == ":memory:" else args.cache)
+    scorer = None
+    if args.workers:
+        from revim_shard import ShardedScorer
+        scorer = ShardedScorer(args.workers, args.chunk_size, sens, PERIODS_PER_YEAR[args.periods], args.skip_invalid)
+    progress = None
+    if args.progress:
+        if in_fmt == "store":
+            progress = Progress(total=len(src), done=done)
+        elif src is not sys.stdin:
+            size = os.path.getsize(args.input)
+            progress = Progress(size_of=lambda: (src.buffer.tell(), size), done=done)
+        else:
+            progress = Progress(done=done)
+    start = time.perf_counter()
+    count = 0
+    try:
+        writer = ResultWriter(dst, out_fmt, args.id_column, header=checkpoint is None)
+        periods_per_year = PERIODS_PER_YEAR[args.periods]
+        if in_fmt == "store" and scorer is not None:
+            chunks = scorer.score_store(args.input, done)
+        elif in_fmt == "store":
+            chunks = score_store(src, args.chunk_size, sens, periods_per_year, cache, done)
+        else:
+            rows = islice(read_responses(src, in_fmt), done, None)
+            if scorer is not None:
+                chunks = scorer.score_chunks(rows, done)
+            else:
+                chunks = score_chunks(rows, args.chunk_size, sens, args.skip_invalid, periods_per_year, cache, done)
+        for chunk in chunks:
+            for values, result, error in chunk:
+                writer.write(values, result, error)
+            count += len(chunk)
+            if checkpoint_path is not None:
+                dst.flush()
+                _write_checkpoint(checkpoint_path, settings, done + count, os.fstat(dst.fileno()).st_size)
+            if progress is not None:
+                progress.update(done + count)
+    except ValueError as e:
+        if progress is not None: progress.finish()
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if src is not sys.stdin: src.close()
+        if dst is not sys.stdout: dst.close()
+        if cache is not None: cache.close()
+        if scorer is not None: scorer.close()
+
+    if progress is not None:
+        progress.finish()
+    if checkpoint_path is not None and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed if elapsed > 0 else float("inf")
+    workers = f" with {scorer.workers} workers" if scorer is not None else ""
+    print(f"Scored {count} rows in {elapsed:.2f}s ({rate:,.0f} rows/s){workers}", file=sys.stderr)
+    if cache is not None:
+        stats = cache.stats()
+        print(f"Cache: {stats['hits']} hits ({stats['disk_hits']} from disk), {stats['misses']} misses, "
+              f"hit rate {stats['hit_rate']:.1%}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
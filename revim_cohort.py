@@ -0,0 +1,469 @@
+import argparse
+import csv
+import json
+import math
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from revim_cli import RESULT_FIELDS, _parse_sens, detect_format, read_responses, score_arrays, score_chunks, sens_defaults
+from revim_schema import OPTION_LABELS, OPTION_VALUES, PERIODS_PER_YEAR, SLOT_INDEX, SLOTS, encode_value
+
+# --- Streaming cohort aggregation ---
+# Summarizes scored responses by segment (the answer to one or more questions, e.g. the
+# realistic-duration bucket) without keeping the rows: every group holds a CohortStats with the
+# row and continue-decision counts and, per metric, running moments (Welford / Chan) and a
+# t-digest for quantiles. Memory grows with the number of groups, not the number of rows.
+#
+# Aggregators merge: shards aggregated separately (in worker processes, or on other machines and
+# saved with --save) combine into the aggregate of all their rows. Counts, means and variances
+# merge exactly (up to float rounding); merged digests keep the digest's error bounds.
+#
+# Groups follow the answers as the model reads them (revim_schema.encode_value): dropdowns by
+# their English label whatever the input language, the conflict question as "stable" or
+# "conflict", N/A as "N/A" and other answers by value.
+#
+#   python revim_cohort.py aggregate responses.csv --by duration --by conflict -o cohorts.csv
+#   python revim_cohort.py aggregate responses.revim --by single --workers 8 --save part1.json
+#   python revim_cohort.py merge part1.json part2.json -o cohorts.csv
+
+SEGMENT_ALIASES = {
+    "duration": "Q_exp_duration_realistic",
+    "conflict": "Q_conflict_patterns_exist_A_2",
+    "single": "Q_single_satisfaction_1",
+}
+METRICS = ("nrupv", "ocau", "decision_margin")
+METRIC_COLUMNS = [RESULT_FIELDS.index(metric) for metric in METRICS]
+WORTH_COLUMN = RESULT_FIELDS.index("is_worth_continuing")
+QUANTILES = (0.05, 0.5, 0.95)
+DEFAULT_COMPRESSION = 200
+STATE_VERSION = 1
+
+
+class TDigest:
+    # Merging t-digest (Dunning & Ertl) with the k1 scale: at most about compression / 2
+    # centroids, small ones near the tails. Values are buffered and folded in by compress().
+    def __init__(self, compression=DEFAULT_COMPRESSION):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = math.inf
+        self.max = -math.inf
+        self._buffer = []
+        self._buffered = 0
+
+    def __len__(self):
+        return int(self.weights.sum()) + self._buffered
+
+    def add(self, values):
+        values = np.asarray(values, dtype=float)
+        if not len(values):
+            return
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self._buffer.append(values.copy())
+        self._buffered += len(values)
+        if self._buffered >= 10 * self.compression:
+            self.compress()
+
+    def merge(self, other):
+        other.compress()
+        if not len(other.weights):
+            return
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._fold(other.means, other.weights)
+
+    def compress(self):
+        if self._buffered:
+            values = np.concatenate(self._buffer)
+            self._buffer = []
+            self._buffered = 0
+            self._fold(values, np.ones(len(values)))
+
+    def _fold(self, means, weights):
+        m = np.concatenate([self.means, means])
+        w = np.concatenate([self.weights, weights])
+        order = np.argsort(m, kind="stable")
+        m, w = m[order], w[order]
+        # Each centroid takes the points whose left edge falls in one unit of k(q)
+        left = (np.cumsum(w) - w) / w.sum()
+        k = np.floor(self.compression / (2 * math.pi) * np.arcsin(2 * left - 1))
+        starts = np.flatnonzero(np.r_[True, k[1:] != k[:-1]])
+        self.weights = np.add.reduceat(w, starts)
+        self.means = np.add.reduceat(m * w, starts) / self.weights
+
+    # Values at the quantiles qs (0-1), interpolated between centroid centres and the extremes
+    def quantiles(self, qs):
+        self.compress()
+        if not len(self.weights):
+            return [math.nan] * len(qs)
+        total = self.weights.sum()
+        centres = np.cumsum(self.weights) - self.weights / 2
+        x = np.r_[0.0, centres, total]
+        y = np.r_[self.min, self.means, self.max]
+        return [float(v) for v in np.interp(np.asarray(qs, dtype=float) * total, x, y)]
+
+    def as_dict(self):
+        self.compress()
+        return {"compression": self.compression, "min": self.min, "max": self.max,
+                "means": self.means.tolist(), "weights": self.weights.tolist()}
+
+    @classmethod
+    def from_dict(cls, d):
+        digest = cls(d["compression"])
+        digest.min, digest.max = d["min"], d["max"]
+        digest.means = np.asarray(d["means"], dtype=float)
+        digest.weights = np.asarray(d["weights"], dtype=float)
+        return digest
+
+
+class RunningMoments:
+    # Count, mean and sum of squared deviations. A chunk's own moments are combined with the
+    # running ones by Chan's update (Welford's for a chunk of one), which is also the merge.
+    def __init__(self, n=0, mean=0.0, m2=0.0):
+        self.n = n
+        self.mean = mean
+        self.m2 = m2
+
+    def add(self, values):
+        values = np.asarray(values, dtype=float)
+        if len(values):
+            mean = float(values.mean())
+            self._combine(len(values), mean, float(((values - mean) ** 2).sum()))
+
+    def merge(self, other):
+        if other.n:
+            self._combine(other.n, other.mean, other.m2)
+
+    def _combine(self, n, mean, m2):
+        total = self.n + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.n * n / total
+        self.n = total
+
+    @property
+    def variance(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else math.nan # Sample variance
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    def as_dict(self):
+        return {"n": self.n, "mean": self.mean, "m2": self.m2}
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d["n"], d["mean"], d["m2"])
+
+
+class CohortStats:
+    # One group: row count, rows judged worth continuing, and moments and a digest per metric
+    def __init__(self, compression=DEFAULT_COMPRESSION):
+        self.count = 0
+        self.continuing = 0
+        self.moments = {metric: RunningMoments() for metric in METRICS}
+        self.digests = {metric: TDigest(compression) for metric in METRICS}
+
+    # A: (n, len(RESULT_FIELDS)) result rows, as revim_cli.score_arrays returns them
+    def add_arrays(self, A):
+        self.count += len(A)
+        self.continuing += int(np.count_nonzero(A[:, WORTH_COLUMN]))
+        for metric, column in zip(METRICS, METRIC_COLUMNS):
+            values = A[:, column]
+            values = values[np.isfinite(values)] # A NaN would poison the mean and the digest order
+            self.moments[metric].add(values)
+            self.digests[metric].add(values)
+
+    def merge(self, other):
+        self.count += other.count
+        self.continuing += other.continuing
+        for metric in METRICS:
+            self.moments[metric].merge(other.moments[metric])
+            self.digests[metric].merge(other.digests[metric])
+
+    def summary(self, quantiles=QUANTILES):
+        row = {"count": self.count, "continuing": self.continuing,
+               "continuing_rate": self.continuing / self.count if self.count else math.nan}
+        for metric in METRICS:
+            moments, digest = self.moments[metric], self.digests[metric]
+            row[f"{metric}_mean"] = moments.mean if moments.n else math.nan
+            row[f"{metric}_std"] = moments.std
+            row[f"{metric}_min"] = digest.min if moments.n else math.nan
+            for q, value in zip(quantiles, digest.quantiles(quantiles)):
+                row[f"{metric}_p{q * 100:g}"] = value
+            row[f"{metric}_max"] = digest.max if moments.n else math.nan
+        return row
+
+    def as_dict(self):
+        return {"count": self.count, "continuing": self.continuing,
+                "moments": {metric: m.as_dict() for metric, m in self.moments.items()},
+                "digests": {metric: d.as_dict() for metric, d in self.digests.items()}}
+
+    @classmethod
+    def from_dict(cls, d):
+        stats = cls()
+        stats.count, stats.continuing = d["count"], d["continuing"]
+        stats.moments = {metric: RunningMoments.from_dict(d["moments"][metric]) for metric in METRICS}
+        stats.digests = {metric: TDigest.from_dict(d["digests"][metric]) for metric in METRICS}
+        return stats
+
+
+def segment_slot(name):
+    # Schema slot of a segment given by alias or slot key
+    key = SEGMENT_ALIASES.get(name, name)
+    if key not in SLOT_INDEX:
+        raise ValueError(f"Unknown segment: {name} (use {', '.join(SEGMENT_ALIASES)} or a question key)")
+    return key
+
+
+def segment_label(key, value):
+    kind = SLOTS[SLOT_INDEX[key]][1]
+    if kind in OPTION_VALUES and value in OPTION_VALUES[kind]:
+        return OPTION_LABELS["en"][kind][OPTION_VALUES[kind].index(value)]
+    if kind == "conflict":
+        return "stable" if value == 0 else "conflict"
+    if math.isnan(value):
+        return "N/A"
+    return f"{value:g}"
+
+
+class CohortAggregator:
+    # segments: aliases (SEGMENT_ALIASES) or question keys to group by; none gives one group
+    # compression: t-digest compression (higher is more accurate and larger)
+    def __init__(self, segments=(), compression=DEFAULT_COMPRESSION):
+        self.segments = list(segments)
+        self.compression = compression
+        self.slots = [segment_slot(name) for name in self.segments]
+        self._columns = [SLOT_INDEX[key] for key in self.slots]
+        self.groups = {} # Tuple of segment labels -> CohortStats
+        self.errors = 0 # Invalid rows seen by add_rows
+
+    def __len__(self):
+        return sum(stats.count for stats in self.groups.values())
+
+    def _group(self, key):
+        stats = self.groups.get(key)
+        if stats is None:
+            stats = self.groups[key] = CohortStats(self.compression)
+        return stats
+
+    # V: (n, len(segments)) encoded segment answers; A: matching result rows (score_arrays)
+    def add_arrays(self, V, A):
+        if not self.segments:
+            self._group(()).add_arrays(A)
+            return
+        # np.unique does not group NaNs (N/A answers), so they get a stand-in value first
+        values, inverse = np.unique(np.nan_to_num(V, nan=-np.inf), axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        order = np.argsort(inverse, kind="stable")
+        bounds = np.searchsorted(inverse[order], np.arange(len(values) + 1))
+        for g, row in enumerate(values):
+            key = tuple(segment_label(slot, math.nan if v == -np.inf else float(v)) for slot, v in zip(self.slots, row))
+            self._group(key).add_arrays(A[order[bounds[g]:bounds[g + 1]]])
+
+    # X: (n, N_SLOTS) answer vectors (batch engine rows)
+    def add_vectors(self, X, A):
+        self.add_arrays(X[:, self._columns], A)
+
+    def _encode_segments(self, values):
+        return [encode_value(key, SLOTS[SLOT_INDEX[key]][1], SLOTS[SLOT_INDEX[key]][2], values.get(key)) for key in self.slots]
+
+    # chunk: (input row, result dict or None, error or None) tuples, as revim_cli.score_chunks yields
+    def add_rows(self, chunk):
+        scored = [(values, result) for values, result, _ in chunk if result is not None]
+        self.errors += len(chunk) - len(scored)
+        if scored:
+            V = np.array([self._encode_segments(values) for values, _ in scored], dtype=float).reshape(len(scored), len(self.slots))
+            A = np.array([[float(result[field]) for field in RESULT_FIELDS] for _, result in scored])
+            self.add_arrays(V, A)
+
+    # One response dict and its result (a result dict or revim_model.ReVIMResult)
+    def add(self, values, result):
+        if not isinstance(result, dict):
+            result = {field: getattr(result, field) for field in RESULT_FIELDS}
+        self.add_rows([(values, result, None)])
+
+    def merge(self, other):
+        if other.slots != self.slots or other.compression != self.compression:
+            raise ValueError("Aggregates with different segments or compression cannot be merged")
+        for key, stats in other.groups.items():
+            self._group(key).merge(stats)
+        self.errors += other.errors
+
+    # One summary dict per group, sorted by segment labels
+    def rows(self, quantiles=QUANTILES):
+        return [dict(zip(self.segments, key), **self.groups[key].summary(quantiles)) for key in sorted(self.groups)]
+
+    def as_dict(self):
+        return {"version": STATE_VERSION, "segments": self.segments, "compression": self.compression, "errors": self.errors,
+                "groups": [{"key": list(key), "stats": stats.as_dict()} for key, stats in self.groups.items()]}
+
+    @classmethod
+    def from_dict(cls, d):
+        if d.get("version") != STATE_VERSION:
+            raise ValueError(f"Unsupported aggregate version: {d.get('version')}")
+        aggregator = cls(d["segments"], d["compression"])
+        aggregator.errors = d["errors"]
+        for group in d["groups"]:
+            aggregator.groups[tuple(group["key"])] = CohortStats.from_dict(group["stats"])
+        return aggregator
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.as_dict(), f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+
+# Aggregate of rows start..stop of a packed store (also the worker task of aggregate_store_parallel)
+def aggregate_store(path, segments=(), sens=None, periods_per_year=1, chunk_size=8192, compression=DEFAULT_COMPRESSION, start=0, stop=None):
+    from revim_store import ResponseStore
+    aggregator = CohortAggregator(segments, compression)
+    defaults = sens_defaults(sens)
+    with ResponseStore(path) as store:
+        for _, X in store.chunks(chunk_size, start, stop):
+            S = {key: np.full(len(X), val) for key, val in defaults.items()}
+            aggregator.add_vectors(X, score_arrays(X, S, periods_per_year))
+    return aggregator
+
+
+# The store split into a few ranges per worker, each aggregated by a worker process; the
+# partial aggregates are merged in row order, so a given worker count gives the same digests
+def aggregate_store_parallel(path, workers, segments=(), sens=None, periods_per_year=1, chunk_size=8192, compression=DEFAULT_COMPRESSION):
+    from revim_store import ResponseStore
+    with ResponseStore(path) as store:
+        total = len(store)
+    step = max(chunk_size, -(-total // (4 * workers)))
+    aggregator = CohortAggregator(segments, compression)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(aggregate_store, path, segments, sens, periods_per_year, chunk_size, compression, first, min(first + step, total))
+                   for first in range(0, total, step)]
+        for future in futures:
+            aggregator.merge(future.result())
+    return aggregator
+
+
+def write_summary(rows, stream, fmt, fields):
+    if fmt == "csv":
+        writer = csv.DictWriter(stream, fieldnames=fields, lineterminator="\n")
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({k: (f"{v:.10g}" if isinstance(v, float) else v) for k, v in row.items()})
+    else:
+        for row in rows:
+            stream.write(json.dumps({k: (None if isinstance(v, float) and math.isnan(v) else v) for k, v in row.items()}, ensure_ascii=False) + "\n")
+
+
+def summary_fields(segments, quantiles):
+    fields = list(segments) + ["count", "continuing", "continuing_rate"]
+    for metric in METRICS:
+        fields += [f"{metric}_mean", f"{metric}_std", f"{metric}_min"] + [f"{metric}_p{q * 100:g}" for q in quantiles] + [f"{metric}_max"]
+    return fields
+
+
+def _aggregate(args, parser):
+    try:
+        sens = _parse_sens(args.sens)
+        CohortAggregator(args.by) # Validates the segments before any work
+    except (argparse.ArgumentTypeError, ValueError) as e:
+        parser.error(str(e))
+    if args.chunk_size < 1 or args.compression < 1:
+        parser.error("--chunk-size and --compression must be positive")
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be positive")
+    in_fmt = detect_format(args.input, args.input_format)
+    if in_fmt == "store" and args.input == "-":
+        parser.error("A response store cannot be read from stdin")
+    periods_per_year = PERIODS_PER_YEAR[args.periods]
+
+    if in_fmt == "store":
+        if args.workers:
+            return aggregate_store_parallel(args.input, args.workers, args.by, sens, periods_per_year, args.chunk_size, args.compression)
+        return aggregate_store(args.input, args.by, sens, periods_per_year, args.chunk_size, args.compression)
+    aggregator = CohortAggregator(args.by, args.compression)
+    src = sys.stdin if args.input == "-" else open(args.input, newline="", encoding="utf-8-sig")
+    scorer = None
+    try:
+        rows = read_responses(src, in_fmt)
+        if args.workers:
+            from revim_shard import ShardedScorer
+            scorer = ShardedScorer(args.workers, args.chunk_size, sens, periods_per_year, args.skip_invalid)
+            chunks = scorer.score_chunks(rows)
+        else:
+            chunks = score_chunks(rows, args.chunk_size, sens, args.skip_invalid, periods_per_year)
+        for chunk in chunks:
+            aggregator.add_rows(chunk)
+    finally:
+        if src is not sys.stdin: src.close()
+        if scorer is not None: scorer.close()
+    return aggregator
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Summarize ReVIM scores by segment, streaming, with mergeable aggregates.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    aggregate = commands.add_parser("aggregate", help="Score responses and summarize them by segment")
+    aggregate.add_argument("input", help="CSV, JSON Lines or packed store (.revim) file of responses ('-' for stdin)")
+    aggregate.add_argument("--by", action="append", default=[], metavar="SEGMENT",
+                           help=f"Group by a question ({', '.join(SEGMENT_ALIASES)} or a question key); repeat to cross segments")
+    aggregate.add_argument("--input-format", choices=["csv", "jsonl", "store"], help="Default: guessed from the file extension")
+    aggregate.add_argument("--sens", action="append", metavar="KEY=VALUE", help="Sensitivity factor applied to all rows")
+    aggregate.add_argument("--periods", choices=list(PERIODS_PER_YEAR), default="annual", help="Horizon resolution (default: annual)")
+    aggregate.add_argument("--chunk-size", type=int, default=8192, help="Rows scored per batch (default: 8192)")
+    aggregate.add_argument("--skip-invalid", action="store_true", help="Count invalid rows instead of stopping")
+    aggregate.add_argument("--workers", type=int, help="Score (and, for stores, aggregate) in this many processes")
+    aggregate.add_argument("--compression", type=int, default=DEFAULT_COMPRESSION,
+                           help=f"t-digest compression, more is more accurate (default: {DEFAULT_COMPRESSION})")
+    merge = commands.add_parser("merge", help="Merge aggregates saved with --save")
+    merge.add_argument("parts", nargs="+", help="Aggregate files (JSON)")
+    for command in (aggregate, merge):
+        command.add_argument("-o", "--output", default="-", help="Summary file, CSV or JSON Lines ('-' for stdout)")
+        command.add_argument("--output-format", choices=["csv", "jsonl"], help="Default: guessed from the file extension")
+        command.add_argument("--save", metavar="FILE", help="Also save the mergeable aggregate (JSON)")
+        command.add_argument("--quantiles", type=float, nargs="+", default=list(QUANTILES), help="Quantiles reported (default: 0.05 0.5 0.95)")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if any(not 0 <= q <= 1 for q in args.quantiles):
+        parser.error("--quantiles must lie between 0 and 1")
+    out_fmt = detect_format(args.output, args.output_format)
+    if out_fmt == "store":
+        parser.error("Summaries are written as CSV or JSON Lines")
+    start = time.perf_counter()
+    try:
+        if args.command == "aggregate":
+            aggregator = _aggregate(args, parser)
+        else:
+            aggregator = CohortAggregator.load(args.parts[0])
+            for path in args.parts[1:]:
+                aggregator.merge(CohortAggregator.load(path))
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    if args.save:
+        aggregator.save(args.save)
+    dst = sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
+    try:
+        write_summary(aggregator.rows(args.quantiles), dst, out_fmt, summary_fields(aggregator.segments, args.quantiles))
+    finally:
+        if dst is not sys.stdout: dst.close()
+    elapsed = time.perf_counter() - start
+    errors = f", {aggregator.errors} invalid rows skipped" if aggregator.errors else ""
+    print(f"{len(aggregator):,} rows in {len(aggregator.groups)} groups in {elapsed:.2f}s{errors}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,326 +1,13 @@
+import os
+import sys
+import time
 import tkinter as tk
 from tkinter import ttk, messagebox, font as tkFont
-import math
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 
-# --- ReVIM 模型计算逻辑 ---
-class ReVIMCalculator:
-    def __init__(self, data_vars, sensitivity_vars):
-        self.data = data_vars
-        self.sens = sensitivity_vars
-
-    def get_val(self, key, default_val=0, is_future_expect=False, is_duration=False, is_single_satisfaction=False, is_recovery_time=False):
-        try:
-            var = self.data.get(key)
-            if var:
-                val_str = var.get()
-                if isinstance(val_str, (int, float)): # If already numeric (e.g. from IntVar for NA)
-                    return val_str
-                if isinstance(val_str, str):
-                    if val_str.isdigit(): return int(val_str)
-                    if val_str == "不适用": return "N/A"
-                    if val_str == "": return default_val
-
-                    if is_future_expect:
-                        mapping = {"显著改善": 0.03, "略有改善": 0.015, "保持不变": 0, "略有恶化": -0.015, "显著恶化": -0.03, "不确定": -0.005}
-                        return mapping.get(val_str, 0)
-                    if is_duration:
-                        mapping = {"几个月": 0.5, "1-2年": 1.5, "3-5年": 4, "5-10年": 7.5, "10年以上": 15, "终身": 25, "非常不确定": 3}
-                        return mapping.get(val_str, 3)
-                    if is_single_satisfaction:
-                        mapping = {"显著更高": 3, "略高": 1.5, "差不多": 0, "略低": -1.5, "显著更低": -3}
-                        return mapping.get(val_str, 0)
-                    if is_recovery_time:
-                        mapping = {"很快（1-3个月内）": 0.25, "一般（3-6个月）": 0.5, "较长（6个月-1年）": 1, "很长（1年以上）": 1.5, "不确定": 0.75}
-                        return mapping.get(val_str, 0.75)
-                    return val_str 
-                return val_str 
-            return default_val
-        except Exception:
-            return default_val
-
-    def get_sens_val(self, key, default_val=1.0):
-        try:
-            var = self.sens.get(key)
-            return var.get() if var else default_val
-        except:
-            return default_val
-
-    def calculate_category_value_at_t(self, base_score_key_prefix, num_q, future_expect_key, weight_key, t, is_cost=False):
-        base_category_score = 0
-        actual_q_count = 0
-        
-        category_code_from_prefix = base_score_key_prefix.split('_')[-1].upper()
-
-        for i in range(1, num_q + 1):
-            q_num_for_key = f"{category_code_from_prefix}.{i}"
-            # Corrected key formation to match add_likert_scale
-            q_key = f"{base_score_key_prefix}_{q_num_for_key.replace('.', '_')}"
-            
-            # NA handling is done by adjusting num_q before calling this function for U_bio.
-            # C_geo is handled separately.
-            # For other categories, assume no NA options within the loop here.
-
-            score = self.get_val(q_key, default_val=4)
-            if score == "N/A": # Should ideally not happen if num_q is adjusted for NA
-                continue
-            base_category_score += score
-            actual_q_count += 1
-
-        if actual_q_count == 0: return 0
-        
-        avg_base_score = base_category_score / actual_q_count
-        normalized_base_score = avg_base_score - 4
-
-        growth_rate = self.get_val(future_expect_key, is_future_expect=True, default_val=0)
-        optimism_adj = self.get_sens_val("future_projection_optimism_adj", 1.0)
-        effective_growth_rate = growth_rate * optimism_adj
-        current_period_score = normalized_base_score * ((1 + effective_growth_rate) ** t)
-
-        weight_val = self.get_val(weight_key, default_val=4)
-        weight = weight_val / 7.0 if isinstance(weight_val, (int, float)) else 4.0/7.0
-
-
-        realization_prob_adj = self.get_sens_val("realization_prob_adj", 1.0)
-        final_value = current_period_score * weight * realization_prob_adj
-        return final_value
-
-    def calculate_nrupv_components_over_time(self):
-        T_realistic = self.get_val("Q_exp_duration_realistic", is_duration=True, default_val=5)
-        T = int(math.ceil(T_realistic)) 
-
-        self.time_periods = list(range(T))
-        self.U_t_series = []
-        self.C_t_series = []
-        self.Net_U_t_series = []
-        self.r_t_series = []
-        self.discounted_Net_U_t_series = []
-        
-        r_base_adj = self.get_sens_val("base_discount_rate_adj", 1.0)
-        r_base = 0.03 * r_base_adj 
-        risk_perception_adj = self.get_sens_val("overall_risk_perception_adj", 1.0)
-        r_risk_initial_val = self.get_val("Q_risk_breakup_A_1", 4) # Ensure key matches add_likert_scale
-        r_risk_initial = (r_risk_initial_val - 1) * 0.005 * risk_perception_adj
-        
-        r_certainty_future_val = self.get_val("Q_certainty_future_A_3", 4)
-        r_uncertainty_initial = (7 - r_certainty_future_val) * 0.005 * risk_perception_adj
-
-        learning_adapt_solve_val = self.get_val("Q_adapt_solve_B_3", 4)
-        learning_adapt_stress_val = self.get_val("Q_adapt_stress_B_4", 4)
-        learning_adapt_learn_hist_val = self.get_val("Q_adapt_learn_hist_B_5", 4)
-        learning_adapt_avg = (learning_adapt_solve_val + learning_adapt_stress_val + learning_adapt_learn_hist_val) / 3.0
-        r_learning_initial_effect = (learning_adapt_avg - 4) * 0.005 
-
-        nrupv = 0
-        cumulative_nrupv = 0
-        self.cumulative_nrupv_series = []
-
-        self.initial_utility_breakdown = {}
-        self.initial_cost_breakdown = {}
-
-        utility_details = [
-            ("U_psych", "心理", 10), ("U_econ", "经济", 5), ("U_socio", "社交", 5),
-            ("U_anthro", "文化人类", 5), ("U_bio", "生理医学", 5), ("U_poli", "权力治理", 4),
-            ("U_philo", "哲学精神", 3), ("U_law", "法律承诺", 2), ("U_comm", "沟通传播", 4),
-            ("U_geo", "地理空间", 3), ("U_eco_sys", "生态系统", 3)
-        ]
-        cost_details = [
-            ("C_psych", "心理", 5), ("C_econ", "经济", 3), ("C_socio", "社交", 3),
-            ("C_anthro", "文化人类", 2), ("C_bio", "生理医学", 3), ("C_poli", "权力治理", 3),
-            ("C_philo", "哲学精神", 2), ("C_law", "法律承诺", 2), ("C_comm", "沟通传播", 2),
-            ("C_eco_sys", "生态系统", 3)
-            # C_geo handled separately
-        ]
-
-        for t in range(T):
-            current_total_utility = 0
-            for cat_key, label, num_q_default in utility_details:
-                num_q_actual = num_q_default
-                if cat_key == "U_bio" and self.get_val("U_bio_5_na") == 1: # Specific NA key for U_bio_5
-                    num_q_actual = 4
-                elif cat_key == "U_law" and self.get_val("U_law_1_na") == 1: # Specific NA key for U_law_1
-                    num_q_actual = 1 # Only U_law_LAW.2 remains if U_law_LAW.1 is NA
-                                      # This means the loop for U_law should go from i=2 to 2 if U_law_1 is NA
-                                      # Or, more simply, if U_law_1 is NA, num_q_actual becomes 1,
-                                      # and the loop in calculate_category_value_at_t will try to get U_law_LAW.1.
-                                      # This needs careful handling.
-                                      # For U_law, if U_law_1_na is true, we only score U_law_LAW.2
-                                      # It's better to calculate U_law separately if it has complex NA.
-                    if num_q_actual == 1 and num_q_default == 2: # Only U_law_LAW.2 is scored
-                        # This requires calculate_category_value_at_t to handle a start_index or specific question list
-                        # For now, let's assume if num_q_actual is 1, it scores the first question of that category.
-                        # This is problematic for U_law if U_law_LAW.1 is NA.
-                        # Let's calculate U_law separately for clarity.
-                        if cat_key == "U_law": continue # Skip in loop, handle below
-
-                val_t = self.calculate_category_value_at_t(cat_key, num_q_actual, f"{cat_key}_future", f"W_{cat_key}", t)
-                current_total_utility += val_t
-                if t == 0: self.initial_utility_breakdown[label] = val_t
-            
-            # Special handling for U_law due to NA on its first question
-            u_law_t = 0
-            if self.get_val("U_law_1_na") == 1: # U_law_LAW.1 is NA, only score U_law_LAW.2
-                # Calculate score for U_law_LAW.2 directly
-                score_law2 = self.get_val("U_law_LAW.2", default_val=4)
-                if score_law2 != "N/A":
-                    norm_score = score_law2 - 4
-                    growth = self.get_val("U_law_future", is_future_expect=True, default_val=0)
-                    opt_adj = self.get_sens_val("future_projection_optimism_adj", 1.0)
-                    eff_growth = growth * opt_adj
-                    curr_score = norm_score * ((1 + eff_growth) ** t)
-                    weight_val = self.get_val("W_U_law", default_val=4)
-                    weight = weight_val / 7.0 if isinstance(weight_val, (int,float)) else 4.0/7.0
-                    prob_adj = self.get_sens_val("realization_prob_adj", 1.0)
-                    u_law_t = curr_score * weight * prob_adj
-            else: # Both U_law_LAW.1 and U_law_LAW.2 are scored
-                u_law_t = self.calculate_category_value_at_t("U_law", 2, "U_law_future", "W_U_law", t)
-            current_total_utility += u_law_t
-            if t == 0: self.initial_utility_breakdown["法律承诺"] = u_law_t
-
-
-            current_total_cost = 0
-            for cat_key, label, num_q in cost_details:
-                val_t = self.calculate_category_value_at_t(cat_key, num_q, f"{cat_key}_future", f"W_{cat_key}", t)
-                current_total_cost += val_t
-                if t == 0: self.initial_cost_breakdown[label] = val_t
-
-            # Corrected c_geo_t calculation (direct)
-            c_geo_t = 0
-            geo_scores = []
-            if self.get_val("C_geo_1_na") != 1:
-                score1 = self.get_val("C_geo_GEO.1", default_val=4)
-                if score1 != "N/A": geo_scores.append(score1)
-            score2 = self.get_val("C_geo_GEO.2", default_val=4)
-            if score2 != "N/A": geo_scores.append(score2)
-
-            if geo_scores:
-                avg_base_score = sum(geo_scores) / len(geo_scores)
-                normalized_base_score = avg_base_score - 4
-                growth_rate = self.get_val("C_geo_future", is_future_expect=True, default_val=0)
-                optimism_adj = self.get_sens_val("future_projection_optimism_adj", 1.0)
-                effective_growth_rate = growth_rate * optimism_adj
-                current_period_score = normalized_base_score * ((1 + effective_growth_rate) ** t)
-                weight_val = self.get_val("W_C_geo", default_val=4)
-                weight = weight_val / 7.0 if isinstance(weight_val, (int,float)) else 4.0/7.0
-                realization_prob_adj = self.get_sens_val("realization_prob_adj", 1.0)
-                c_geo_t = current_period_score * weight * realization_prob_adj
-            
-            current_total_cost += c_geo_t
-            if t == 0: self.initial_cost_breakdown["地理空间"] = c_geo_t
-            
-            # Synergy/Conflict Factors
-            u_psych_val_t0 = self.initial_utility_breakdown.get("心理", 0) # Use t=0 value for simplicity of synergy factor
-            u_comm_val_t0 = self.initial_utility_breakdown.get("沟通传播", 0)
-            
-            # Normalize initial scores for synergy factor (0-1 range approx)
-            # This is a rough proxy. A better way would be to use the non-weighted, non-projected base scores.
-            synergy_comm_psych_factor = 1.0
-            if u_comm_val_t0 > 0 : # Assuming positive communication is synergistic
-                 synergy_comm_psych_factor = 1 + 0.1 * (u_comm_val_t0 / ( (self.get_val("W_U_comm",4)/7.0) * 3) ) # Max 10% boost if comm is at max (3)
-            
-            # Find u_psych_t from the series if needed, or re-calculate its component for modification
-            # For simplicity, apply synergy to the already calculated total utility's psychological component proxy
-            # This is an approximation. A more precise way would be to modify u_psych_t before summing.
-            # Let's assume u_psych_val_t0 is a proxy for the psychological component's magnitude.
-            current_total_utility += u_psych_val_t0 * (synergy_comm_psych_factor - 1.0) # Add the synergistic part
-
-            c_philo_val_t0 = self.initial_cost_breakdown.get("哲学精神", 0)
-            c_psych_val_t0 = self.initial_cost_breakdown.get("心理", 0)
-            conflict_philo_psych_factor = 1.0
-            if c_philo_val_t0 > 0: # Assuming philosophical cost amplifies psychological cost
-                conflict_philo_psych_factor = 1 + 0.1 * (c_philo_val_t0 / ( (self.get_val("W_C_philo",4)/7.0) * 3) )
-            current_total_cost += c_psych_val_t0 * (conflict_philo_psych_factor - 1.0)
-
-
-            self.U_t_series.append(current_total_utility)
-            self.C_t_series.append(current_total_cost)
-            net_utility_this_period = current_total_utility - current_total_cost
-            self.Net_U_t_series.append(net_utility_this_period)
-
-            conflict_pattern_exists_val = self.get_val("Q_conflict_patterns_exist_A_2", "0")
-            stability_factor = (1 - 0.05 * t) if conflict_pattern_exists_val == "0" else (1 + 0.02 * t)
-            r_risk_t = r_risk_initial * max(0.5, stability_factor) 
-            r_uncertainty_t = r_uncertainty_initial * max(0.5, (1 - 0.03 * t)) 
-            r_learning_t_effect = r_learning_initial_effect * max(0.7, (1 - 0.02 * t)) 
-            r_t_period = r_base + r_risk_t + r_uncertainty_t - r_learning_t_effect
-            r_t_period = max(0.001, r_t_period) 
-            self.r_t_series.append(r_t_period)
-
-            discounted_net_utility = net_utility_this_period / ((1 + r_t_period) ** (t + 1)) 
-            self.discounted_Net_U_t_series.append(discounted_net_utility)
-            nrupv += discounted_net_utility
-            cumulative_nrupv += discounted_net_utility
-            self.cumulative_nrupv_series.append(cumulative_nrupv)
-            
-        return nrupv, T_realistic
-
-    def calculate_ocau(self):
-        u_single_satisfaction = self.get_val("Q_single_satisfaction_1", is_single_satisfaction=True, default_val=0)
-        u_single = u_single_satisfaction 
-
-        alt_partner_likelihood_val = self.get_val("Q_alt_partner_likelihood_4", 1)
-        alt_partner_likelihood = alt_partner_likelihood_val / 7.0
-        
-        initial_gross_U = sum(self.initial_utility_breakdown.values()) if hasattr(self, 'initial_utility_breakdown') and self.initial_utility_breakdown else 5 
-        e_u_alternative = alt_partner_likelihood * (initial_gross_U * 0.7) 
-        
-        ocau = max(u_single, e_u_alternative)
-        return ocau, u_single, e_u_alternative
-
-    def calculate_sunk_cost_adjustment(self):
-        sunk_influence_val = self.get_val("Q_sunk_cost_influence_4", 1)
-        sunk_worry_val = self.get_val("Q_sunk_cost_worry_5", 1)
-        
-        adjustment_factor = ((sunk_influence_val - 1) + (sunk_worry_val - 1)) / 12.0 
-        max_possible_adjustment = 3.0 
-        sunk_cost_adj = adjustment_factor * max_possible_adjustment
-        return sunk_cost_adj
-
-    def evaluate(self):
-        # Ensure all data_vars keys used in calculation match those created in GUI population
-        # Example: Q_risk_breakup_A_1, Q_certainty_future_A_3 etc.
-        # These were formed by f"{key_prefix}_{q_num_str.replace('.', '_')}"
-        
-        self.nrupv, self.T_realistic = self.calculate_nrupv_components_over_time()
-        self.ocau, self.u_single, self.e_u_alt = self.calculate_ocau()
-        self.sunk_cost_adj = self.calculate_sunk_cost_adjustment()
-
-        is_worth_continuing = self.nrupv > (self.ocau + self.sunk_cost_adj)
-        
-        feedback = f"**ReVIM 模型分析结果**\n"
-        feedback += f"--------------------------------------------------\n"
-        feedback += f"计算的净关系效用现值 (NRUPV): {self.nrupv:.2f}\n"
-        feedback += f"  (基于对未来 {self.T_realistic:.1f} 年的预期效用与成本进行折现计算)\n"
-        initial_total_U = sum(self.initial_utility_breakdown.values()) if hasattr(self, 'initial_utility_breakdown') else 0
-        initial_total_C = sum(self.initial_cost_breakdown.values()) if hasattr(self, 'initial_cost_breakdown') else 0
-        feedback += f"  (首期总效用(加权): {initial_total_U:.2f}, 首期总成本(加权): {initial_total_C:.2f})\n"
-        feedback += f"--------------------------------------------------\n"
-        feedback += f"计算的机会成本/替代选项效用 (OCAU): {self.ocau:.2f}\n"
-        feedback += f"  (单身状态预估效用: {self.u_single:.2f}, 其他潜在伴侣预估效用: {self.e_u_alt:.2f})\n"
-        feedback += f"--------------------------------------------------\n"
-        feedback += f"沉没成本谬误调整项: {self.sunk_cost_adj:.2f}\n"
-        feedback += f"  (此数值越高，表明您可能受沉没成本影响越大，模型会提高决策的“门槛”)\n"
-        feedback += f"--------------------------------------------------\n"
-        feedback += f"**决策阈值比较:**\n"
-        decision_threshold = self.ocau + self.sunk_cost_adj
-        feedback += f"  NRUPV ({self.nrupv:.2f})  vs  (OCAU ({self.ocau:.2f}) + 沉没成本调整 ({self.sunk_cost_adj:.2f}))\n"
-        feedback += f"  NRUPV ({self.nrupv:.2f})  vs  决策阈值 ({decision_threshold:.2f})\n"
-        feedback += f"--------------------------------------------------\n"
-
-        if is_worth_continuing:
-            feedback += "**结论：根据ReVIM模型及您的输入，此段恋爱关系目前看来【值得继续】。**"
-            margin = self.nrupv - decision_threshold
-            if abs(decision_threshold) > 1e-6 and margin < abs(decision_threshold) * 0.15 : 
-                 feedback += "\n  注意：尽管值得继续，但优势较小。建议关注关系中的薄弱环节并积极改善。"
-        else:
-            feedback += "**结论：根据ReVIM模型及您的输入，此段恋爱关系目前看来【可能不值得继续，或需重大改善】。**"
-            margin = decision_threshold - self.nrupv
-            if abs(decision_threshold) > 1e-6 and margin < abs(decision_threshold) * 0.15:
-                feedback += "\n  注意：尽管目前不建议继续，但差距较小。若双方有强烈意愿，针对性改善关键问题后可重新评估。"
-        
-        feedback += "\n\n*免责声明：本结果仅为理论模型计算，不能替代您的个人判断和专业咨询。*"
-        return feedback, is_worth_continuing
+from revim_cache import ResultCache
+from revim_model import EvaluationCache, IncrementalCalculator, ReVIMCalculator, ResponseRecord, read_tk_vars
+from revim_live import LiveRecompute
+from revim_plotting import load_charts, preload as preload_charts
 
 # --- GUI Application (ReVIMApp class and its methods) ---
 # ... (The entire ReVIMApp class from the previous response, no changes needed there based on this error) ...
@@ -328,11 +15,13 @@ class ReVIMCalculator:
 # For example, in populate_dynamics_tab:
 # self.add_likert_scale(parent_frame, "...", "Q_risk_breakup", "A.1")
 # This creates key "Q_risk_breakup_A_1". This is what ReVIMCalculator.get_val("Q_risk_breakup_A_1",...) should use.
-# This was corrected in the ReVIMCalculator part above.
+# ReVIMCalculator itself lives in revim_model.py and reads a ResponseRecord snapshot of these variables.
 
 class ReVIMApp:
-    def __init__(self, master):
+    def __init__(self, master, lazy_tabs=True, result_cache=None, profiler=None, history=None):
         self.master = master
+        self.profiler = profiler # revim_profile.Profiler, or None: calculations and redraws are not profiled
+        self.history = history # revim_history.EvaluationLog to save results to, or None (no history controls)
         master.title("ReVIM - 恋爱关系持续性综合评估模型")
         master.geometry("950x800") # Increased size slightly more
 
@@ -341,6 +30,8 @@ class ReVIMApp:
         master.option_add("*Font", default_font)
         
         self.data_vars = {} 
+        self.utility_weight_vars = {} # Utility weight sliders: their keys (W_PSYCH_1, ...) are the cost sliders', which data_vars holds
+        self.question_labels = {} # data_vars / sensitivity_vars key -> question text, for the break-even list
         self.sensitivity_vars = {} 
 
         self.notebook = ttk.Notebook(master)
@@ -354,20 +45,57 @@ class ReVIMApp:
         for title in tab_titles:
             self.tabs[title] = self.create_scrollable_tab(title)
 
-        self.populate_basic_info_tab(self.tabs["第1部分: 基本信息"].scrollable_frame)
-        self.populate_utility_tab(self.tabs["第2部分: 关系效用"].scrollable_frame)
-        self.populate_cost_tab(self.tabs["第3部分: 关系成本"].scrollable_frame)
-        self.populate_dynamics_tab(self.tabs["第4部分: 动态与未来"].scrollable_frame)
-        self.populate_ocau_tab(self.tabs["第5部分: 机会成本"].scrollable_frame)
-        self.populate_sunk_cost_tab(self.tabs["第6部分: 沉没成本"].scrollable_frame)
-        self.populate_weights_tab(self.tabs["第7部分: 权重分配"].scrollable_frame)
-        self.populate_sensitivity_tab(self.tabs["敏感性分析"].scrollable_frame)
-        self.populate_results_and_visualization_tab(self.tabs["结果与可视化"].scrollable_frame)
+        # Tabs are filled in when first selected (build_tab), which keeps startup fast. Until then
+        # their questions exist only as Tk variables holding the defaults (declared by calling the
+        # populate method without a parent frame), so a calculation sees the same answers either way.
+        self.tab_builders = {
+            "第1部分: 基本信息": self.populate_basic_info_tab,
+            "第2部分: 关系效用": self.populate_utility_tab,
+            "第3部分: 关系成本": self.populate_cost_tab,
+            "第4部分: 动态与未来": self.populate_dynamics_tab,
+            "第5部分: 机会成本": self.populate_ocau_tab,
+            "第6部分: 沉没成本": self.populate_sunk_cost_tab,
+            "第7部分: 权重分配": self.populate_weights_tab,
+            "敏感性分析": self.populate_sensitivity_tab,
+            "结果与可视化": self.populate_results_and_visualization_tab,
+        }
+        self.tab_title_by_widget = {str(tab): title for title, tab in self.tabs.items()}
+        self.built_tabs = set()
+        self.results_text_widget = None
+        self.canvas_agg = None
+        self.results_figure = None
+        self.redraw_started = None
+        self.last_redraw_ms = None
+        self.redraw_timing_hook = None # Called with the redraw latency in ms, e.g. print
+        self.profile_run = None # Profiled display_visualizations() waiting for its repaint
+        self.last_result = None # Latest calculated result, saved by save_to_history()
+        self.trajectory_window = None
+        for title, populate in self.tab_builders.items():
+            if not lazy_tabs or title == "第1部分: 基本信息":
+                self.build_tab(title)
+            else:
+                populate(None)
 
         self.notebook.pack(expand=1, fill="both")
 
         self.calculate_button = ttk.Button(master, text="开始计算关系持续价值", command=self.run_calculation_and_show_results)
         self.calculate_button.pack(pady=10)
+
+        # Live mode: any answer or slider change is recomputed in the background (see revim_live)
+        self.live_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(master, text="编辑时实时更新", variable=self.live_var, command=self.toggle_live_mode).pack()
+        self.live_summary_label = ttk.Label(master, text="")
+        self.live_summary_label.pack(pady=(0, 8))
+        self.live_cache = EvaluationCache() # Only used on the live worker thread
+        # Results of earlier answer/slider combinations (repeated Calculate clicks, sliders moved back)
+        self.result_cache = result_cache if result_cache is not None else ResultCache(256)
+        self.live = LiveRecompute(master, self.snapshot_inputs, self.compute_results, self.show_live_result, self.show_live_error)
+        self.pending_visualization = None
+        for var in list(self.data_vars.values()) + list(self.sensitivity_vars.values()):
+            var.trace_add("write", self.on_input_changed)
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+        # matplotlib is imported on first use; start loading it once the window has been shown
+        master.after(300, preload_charts)
         
     def create_scrollable_tab(self, tab_title):
         tab_frame = ttk.Frame(self.notebook)
@@ -392,58 +120,79 @@ class ReVIMApp:
         tab_frame.scrollable_frame = scrollable_frame 
         return tab_frame
 
-    def add_likert_scale(self, parent, text, key_prefix, q_num_str, not_applicable_key=None, default_val=4):
-        frame = ttk.LabelFrame(parent, text=f"{q_num_str}. {text}", padding=(5,2))
-        frame.pack(fill="x", padx=5, pady=1)
-        
-        var = tk.IntVar(value=default_val)
+    def build_tab(self, title):
+        if title in self.built_tabs:
+            return
+        self.built_tabs.add(title)
+        self.tab_builders[title](self.tabs[title].scrollable_frame)
+
+    def declare_var(self, store, key, var_class, value):
+        # A question's variable is created once: when its tab is declared or when it is first built.
+        # Building a declared tab binds the new widgets to the existing variable.
+        if key not in store:
+            store[key] = var_class(value=value)
+        return store[key]
+
+    def add_likert_scale(self, parent, text, key_prefix, q_num_str, not_applicable_key=None, default_val=4, store=None):
         # Ensure q_num_str part of key is consistent (e.g. A_1, B_2)
         processed_q_num_str = str(q_num_str).replace('.', '_')
         full_key = f"{key_prefix}_{processed_q_num_str}"
-        self.data_vars[full_key] = var
-        
+        var = self.declare_var(self.data_vars if store is None else store, full_key, tk.IntVar, default_val)
+        self.question_labels[full_key] = text
+        if not_applicable_key: # This key should be the exact key for the NA IntVar
+            na_var = self.declare_var(self.data_vars, not_applicable_key, tk.IntVar, 0) # e.g. "U_bio_5_na"
+            self.question_labels[not_applicable_key] = f"{text}（不适用）"
+        if parent is None: # Declaring only (tab not built yet)
+            return var
+
+        frame = ttk.LabelFrame(parent, text=f"{q_num_str}. {text}", padding=(5,2))
+        frame.pack(fill="x", padx=5, pady=1)
         scale = tk.Scale(frame, from_=1, to=7, orient=tk.HORIZONTAL, variable=var, length=250, resolution=1)
         scale.pack(side=tk.LEFT, padx=5)
 
-        if not_applicable_key: # This key should be the exact key for the NA IntVar
-            na_var = tk.IntVar(value=0)
-            self.data_vars[not_applicable_key] = na_var # e.g. "U_bio_5_na"
+        if not_applicable_key:
             na_cb = ttk.Checkbutton(frame, text="不适用", variable=na_var)
             na_cb.pack(side=tk.LEFT, padx=5)
         return var
 
     def add_dropdown(self, parent, text, key, options, default_option_idx=0, q_num_str=""):
         # Key here is the direct key for data_vars
+        var = self.declare_var(self.data_vars, key, tk.StringVar, options[default_option_idx])
+        self.question_labels[key] = text
+        if parent is None:
+            return var
         frame = ttk.LabelFrame(parent, text=f"{q_num_str}. {text}" if q_num_str else text, padding=(5,2))
         frame.pack(fill="x", padx=5, pady=1)
-        var = tk.StringVar(value=options[default_option_idx])
-        self.data_vars[key] = var
         dropdown = ttk.Combobox(frame, textvariable=var, values=options, state="readonly", width=20)
         dropdown.pack(side=tk.LEFT, padx=5)
         return var
 
     def add_entry(self, parent, text, key, q_num_str="", default_value="30", width=8):
+        var = self.declare_var(self.data_vars, key, tk.StringVar, default_value) # Direct key
+        if parent is None:
+            return var
         frame = ttk.LabelFrame(parent, text=f"{q_num_str}. {text}", padding=(5,2))
         frame.pack(fill="x", padx=5, pady=1)
-        var = tk.StringVar(value=default_value)
-        self.data_vars[key] = var # Direct key
         entry = ttk.Entry(frame, textvariable=var, width=width)
         entry.pack(side=tk.LEFT, padx=5)
         return var
         
     def add_radiobuttons(self, parent, text, key, options_map, q_num_str="", default_key_idx=0):
+        default_val_str = list(options_map.values())[default_key_idx]
+        var = self.declare_var(self.data_vars, key, tk.StringVar, default_val_str) # Direct key
+        self.question_labels[key] = text
+        if parent is None:
+            return var
         frame = ttk.LabelFrame(parent, text=f"{q_num_str}. {text}", padding=(5,2))
         frame.pack(fill="x", padx=5, pady=1)
-        
-        default_val_str = list(options_map.values())[default_key_idx]
-        var = tk.StringVar(value=default_val_str)
-        self.data_vars[key] = var # Direct key
         for label, val_str in options_map.items():
             rb = ttk.Radiobutton(frame, text=label, variable=var, value=val_str)
             rb.pack(side=tk.LEFT, padx=3, anchor='w')
         return var
 
     def add_section_header(self, parent, text):
+        if parent is None:
+            return
         ttk.Label(parent, text=text, font=("Microsoft YaHei", 10, "bold")).pack(anchor="w", padx=5, pady=(8,2))
 
     def populate_basic_info_tab(self, parent_frame):
@@ -453,14 +202,15 @@ class ReVIMApp:
         self.add_entry(parent_frame, "您伴侣的年龄：", "P1_Q3_partner_age", "3", "30")
         self.add_dropdown(parent_frame, "您伴侣的性别：", "P1_Q4_partner_gender", ["男", "女", "其他"], 1, "4")
         
-        dur_frame = ttk.LabelFrame(parent_frame, text="5. 您目前这段恋爱关系已持续时间：", padding=(5,2))
-        dur_frame.pack(fill="x", padx=5, pady=1)
-        self.data_vars["P1_Q5_duration_years"] = tk.StringVar(value="1") # Used by get_val if needed, though T comes from Q_exp_duration_realistic
-        ttk.Entry(dur_frame, textvariable=self.data_vars["P1_Q5_duration_years"], width=5).pack(side=tk.LEFT)
-        ttk.Label(dur_frame, text="年").pack(side=tk.LEFT)
-        self.data_vars["P1_Q5_duration_months"] = tk.StringVar(value="0")
-        ttk.Entry(dur_frame, textvariable=self.data_vars["P1_Q5_duration_months"], width=5).pack(side=tk.LEFT)
-        ttk.Label(dur_frame, text="月").pack(side=tk.LEFT)
+        years_var = self.declare_var(self.data_vars, "P1_Q5_duration_years", tk.StringVar, "1") # Used by get_val if needed, though T comes from Q_exp_duration_realistic
+        months_var = self.declare_var(self.data_vars, "P1_Q5_duration_months", tk.StringVar, "0")
+        if parent_frame is not None:
+            dur_frame = ttk.LabelFrame(parent_frame, text="5. 您目前这段恋爱关系已持续时间：", padding=(5,2))
+            dur_frame.pack(fill="x", padx=5, pady=1)
+            ttk.Entry(dur_frame, textvariable=years_var, width=5).pack(side=tk.LEFT)
+            ttk.Label(dur_frame, text="年").pack(side=tk.LEFT)
+            ttk.Entry(dur_frame, textvariable=months_var, width=5).pack(side=tk.LEFT)
+            ttk.Label(dur_frame, text="月").pack(side=tk.LEFT)
 
         self.add_dropdown(parent_frame, "您与伴侣目前的同居状态：", "P1_Q6_cohabitation", 
                           ["未同居", "部分时间同居", "完全同居"], 0, "6")
@@ -552,20 +302,21 @@ class ReVIMApp:
         single_options = ["显著更高", "略高", "差不多", "略低", "显著更低"]
         self.add_dropdown(parent_frame, "如果您现在是单身状态，您预期的个人生活满意度会比目前高还是低？", "Q_single_satisfaction_1", single_options, 2, "1") # Key changed
         
-        ttk.Label(parent_frame, text="2. 单身状态可能益处 (多选，暂不直接计入模型):").pack(anchor='w', padx=5, pady=(5,0))
-        # ... (checkboxes as before, not stored in self.data_vars for calculation)
-        single_benefits = ["更多个人自由和时间", "更能专注个人事业/学业发展", "避免关系中的冲突和情感消耗", "有机会结识新的潜在伴侣", "财务更独立自主"]
-        for benefit in single_benefits:
-             cb_var = tk.IntVar() 
-             cb = ttk.Checkbutton(parent_frame, text=benefit, variable=cb_var)
-             cb.pack(anchor='w', padx=15)
+        if parent_frame is not None: # Not part of the model, nothing to declare
+            ttk.Label(parent_frame, text="2. 单身状态可能益处 (多选，暂不直接计入模型):").pack(anchor='w', padx=5, pady=(5,0))
+            # ... (checkboxes as before, not stored in self.data_vars for calculation)
+            single_benefits = ["更多个人自由和时间", "更能专注个人事业/学业发展", "避免关系中的冲突和情感消耗", "有机会结识新的潜在伴侣", "财务更独立自主"]
+            for benefit in single_benefits:
+                 cb_var = tk.IntVar() 
+                 cb = ttk.Checkbutton(parent_frame, text=benefit, variable=cb_var)
+                 cb.pack(anchor='w', padx=15)
         
-        ttk.Label(parent_frame, text="3. 单身状态可能弊端 (多选，暂不直接计入模型):").pack(anchor='w', padx=5, pady=(5,0))
-        single_drawbacks = ["孤独感", "缺乏情感支持和亲密感", "生活成本可能更高", "某些生活方面缺乏帮助", "社会压力"]
-        for drawback in single_drawbacks:
-             cb_var = tk.IntVar() 
-             cb = ttk.Checkbutton(parent_frame, text=drawback, variable=cb_var)
-             cb.pack(anchor='w', padx=15)
+            ttk.Label(parent_frame, text="3. 单身状态可能弊端 (多选，暂不直接计入模型):").pack(anchor='w', padx=5, pady=(5,0))
+            single_drawbacks = ["孤独感", "缺乏情感支持和亲密感", "生活成本可能更高", "某些生活方面缺乏帮助", "社会压力"]
+            for drawback in single_drawbacks:
+                 cb_var = tk.IntVar() 
+                 cb = ttk.Checkbutton(parent_frame, text=drawback, variable=cb_var)
+                 cb.pack(anchor='w', padx=15)
 
         self.add_likert_scale(parent_frame, "您认为在您当前可接触的范围内，找到一个比现任伴侣更适合您、且能建立满意关系的人的可能性有多大？", "Q_alt_partner_likelihood", "4")
         recovery_options = ["很快（1-3个月内）", "一般（3-6个月）", "较长（6个月-1年）", "很长（1年以上）", "不确定"]
@@ -588,7 +339,7 @@ class ReVIMApp:
             "W_U_geo": "舒适共享空间归属感", "W_U_eco_sys": "关系系统健康稳定"
         }
         for i, (key, text) in enumerate(utility_weight_map.items()): # key is direct key for data_vars
-            self.add_likert_scale(parent_frame, text, key.split('_')[0], f"{key.split('_')[-1].upper()}.{i+1}") # Use key directly
+            self.add_likert_scale(parent_frame, text, key.split('_')[0], f"{key.split('_')[-1].upper()}.{i+1}", store=self.utility_weight_vars) # Use key directly
 
         self.add_section_header(parent_frame, "B. 关系成本方面的敏感度 (1=容忍度高/不敏感, 7=容忍度极低/极敏感)")
         cost_weight_map = {
@@ -601,14 +352,15 @@ class ReVIMApp:
              self.add_likert_scale(parent_frame, text, key.split('_')[0], f"{key.split('_')[-1].upper()}.{i+1}") # Use key directly
 
     def add_sensitivity_slider(self, parent, text, key, from_=0.5, to=1.5, default_val=1.0, resolution=0.05):
+        var = self.declare_var(self.sensitivity_vars, key, tk.DoubleVar, default_val)
+        self.question_labels[key] = text.rstrip(":：")
+        if parent is None:
+            return var
         frame = ttk.Frame(parent, padding=(5,2))
         frame.pack(fill="x", padx=5, pady=1)
         ttk.Label(frame, text=text, width=35, anchor='w').pack(side=tk.LEFT)
         
-        var = tk.DoubleVar(value=default_val)
-        self.sensitivity_vars[key] = var
-        
-        val_label = ttk.Label(frame, text=f"{default_val:.2f}", width=5)
+        val_label = ttk.Label(frame, text=f"{var.get():.2f}", width=5)
         val_label.pack(side=tk.RIGHT, padx=5)
 
         def update_label(v): 
@@ -620,13 +372,125 @@ class ReVIMApp:
 
     def populate_sensitivity_tab(self, parent_frame):
         self.add_section_header(parent_frame, "敏感性分析调整项")
-        ttk.Label(parent_frame, text="调整以下参数，观察其对最终结果的影响（默认值为1.0，表示不调整原始计算）：").pack(padx=5, pady=5, anchor='w')
+        if parent_frame is not None:
+            ttk.Label(parent_frame, text="调整以下参数，观察其对最终结果的影响（默认值为1.0，表示不调整原始计算）：").pack(padx=5, pady=5, anchor='w')
         self.add_sensitivity_slider(parent_frame, "基础贴现率调整因子 (r_base Adj.):", "base_discount_rate_adj")
         self.add_sensitivity_slider(parent_frame, "未来预期乐观度调整 (Future Optimism Adj.):", "future_projection_optimism_adj")
         self.add_sensitivity_slider(parent_frame, "总体风险感知调整 (Risk Perception Adj.):", "overall_risk_perception_adj")
         self.add_sensitivity_slider(parent_frame, "效用/成本实现概率调整 (Realization Prob Adj.):", "realization_prob_adj")
+        if parent_frame is None: # The sweep section has no questions to declare
+            return
+
+        # Break-even value of every answer and slider, one at a time (see revim_breakeven)
+        self.add_section_header(parent_frame, "盈亏平衡值")
+        ttk.Label(parent_frame, text="对每个答案和滑块，计算在其余输入不变时使 NRUPV 恰好等于决策阈值的取值。最接近改变结论的答案排在最前。", wraplength=850, justify=tk.LEFT).pack(padx=5, pady=5, anchor='w')
+        ttk.Button(parent_frame, text="计算盈亏平衡值", command=self.run_break_even).pack(padx=5, anchor='w')
+        self.break_even_text = tk.Text(parent_frame, wrap=tk.WORD, height=10, padx=5, pady=5)
+        self.break_even_text.pack(fill="x", padx=5, pady=5)
+        self.break_even_text.config(state=tk.DISABLED)
+
+        # Full-grid sweep over all four factors, shown as a heatmap of two chosen axes
+        self.add_section_header(parent_frame, "全网格敏感性扫描")
+        ttk.Label(parent_frame, text="计算上述四个因子所有组合（0.5-1.5，步长0.05，共21^4个点）的结果，并显示结论发生变化的区域。未作为热力图坐标轴的因子取当前滑块值。", wraplength=850, justify=tk.LEFT).pack(padx=5, pady=5, anchor='w')
+        self.sweep_axis_keys = {"基础贴现率 (r_base Adj.)": "base_discount_rate_adj", "未来预期乐观度 (Future Optimism Adj.)": "future_projection_optimism_adj",
+                                 "总体风险感知 (Risk Perception Adj.)": "overall_risk_perception_adj", "实现概率 (Realization Prob Adj.)": "realization_prob_adj"}
+        axis_names = list(self.sweep_axis_keys)
+        controls = ttk.Frame(parent_frame, padding=(5,2))
+        controls.pack(fill="x", padx=5, pady=1)
+        self.sweep_x_var = tk.StringVar(value=axis_names[3])
+        self.sweep_y_var = tk.StringVar(value=axis_names[0])
+        for text, var in (("横轴：", self.sweep_x_var), ("纵轴：", self.sweep_y_var)):
+            ttk.Label(controls, text=text).pack(side=tk.LEFT, padx=(0, 2))
+            combo = ttk.Combobox(controls, textvariable=var, values=axis_names, state="readonly", width=24)
+            combo.pack(side=tk.LEFT, padx=(0, 10))
+            combo.bind("<<ComboboxSelected>>", lambda event: self.display_sweep_heatmap())
+        ttk.Button(controls, text="运行扫描", command=self.run_sensitivity_sweep).pack(side=tk.LEFT)
+        self.sweep_status_label = ttk.Label(parent_frame, text="", wraplength=850, justify=tk.LEFT)
+        self.sweep_status_label.pack(padx=5, pady=2, anchor='w')
+        self.sweep_frame = ttk.Frame(parent_frame)
+        self.sweep_frame.pack(fill="both", expand=True, padx=5, pady=5)
+        self.sweep_result = None
+        self.sweep_canvas = None
+
+    def run_break_even(self):
+        try:
+            response = ResponseRecord.from_tk_vars(self.data_vars)
+            sensitivity = read_tk_vars(self.sensitivity_vars)
+            start = time.perf_counter()
+            from revim_breakeven import describe_level, solve # Pulls in numpy, so only on first use
+            result = solve(response, sens=sensitivity)
+            elapsed = time.perf_counter() - start
+        except Exception as e:
+            messagebox.showerror("盈亏平衡计算错误", f"求解时发生错误：\n{e}")
+            return
+        lines = []
+        for row in result.ranked():
+            label = self.question_labels.get(row["factor"])
+            if label is None: # Not asked in this questionnaire (e.g. the category weights)
+                continue
+            current = describe_level(row["factor"], row["current"], "zh")
+            flip = describe_level(row["factor"], row["flip_level"], "zh")
+            lines.append(f"{label}：{current} -> {flip}（平衡点 {row['break_even']:.3g}）")
+        decision = "继续" if result.is_worth_continuing else "重新考虑"
+        text = f"共有 {len(lines)} 个答案或因子单独即可改变结论（当前结论：{decision}；用时 {elapsed * 1000:.0f} 毫秒）。按接近程度排列：" if lines else "在各自取值范围内，没有任何单个答案或因子能改变结论。"
+        self.break_even_text.config(state=tk.NORMAL)
+        self.break_even_text.delete('1.0', tk.END)
+        self.break_even_text.insert(tk.END, "\n".join([text] + lines))
+        self.break_even_text.config(state=tk.DISABLED)
+
+    def run_sensitivity_sweep(self):
+        try:
+            response = ResponseRecord.from_tk_vars(self.data_vars)
+            start = time.perf_counter()
+            from revim_sweep import sweep # Pulls in numpy, so only on first use
+            self.sweep_result = sweep(response)
+            elapsed = time.perf_counter() - start
+        except Exception as e:
+            messagebox.showerror("扫描错误", f"扫描过程中发生错误：\n{e}")
+            return
+        res = self.sweep_result
+        decision = "值得继续" if res.baseline_worth else "需要重新考虑"
+        self.sweep_status_label.config(text=f"已在 {elapsed * 1000:.0f} 毫秒内计算 {res.nrupv.size:,} 个组合。默认因子下的结论：{decision}；在 {res.flip_fraction:.1%} 的网格点上结论发生变化。")
+        self.display_sweep_heatmap()
+
+    def display_sweep_heatmap(self):
+        if self.sweep_result is None:
+            return
+        x_key = self.sweep_axis_keys[self.sweep_x_var.get()]
+        y_key = self.sweep_axis_keys[self.sweep_y_var.get()]
+        if x_key == y_key:
+            messagebox.showinfo("全网格敏感性扫描", "请选择两个不同的坐标轴。")
+            return
+        current = read_tk_vars(self.sensitivity_vars)
+        x_values, y_values, margin, worth = self.sweep_result.slice2d(x_key, y_key, fixed=current)
+
+        if self.sweep_canvas:
+            self.sweep_canvas.get_tk_widget().destroy()
+
+        charts = load_charts() # matplotlib, with the chart font set (see revim_plotting)
+        fig = charts.Figure(figsize=(6, 4.5), dpi=100)
+        ax = fig.add_subplot(1, 1, 1)
+        limit = max(float(abs(margin).max()), 1e-9) # Symmetric colour scale: red = below threshold, green = above
+        mesh = ax.pcolormesh(x_values, y_values, margin, cmap='RdYlGn', vmin=-limit, vmax=limit, shading='nearest')
+        if worth.any() and not worth.all():
+            ax.contour(x_values, y_values, margin, levels=[0], colors='black', linewidths=1)
+        ax.plot(current.get(x_key, 1.0), current.get(y_key, 1.0), marker='o', linestyle='none', color='black', markersize=5, label="当前滑块值")
+        cbar = fig.colorbar(mesh, ax=ax)
+        cbar.set_label("NRUPV - 决策阈值", fontsize=7)
+        cbar.ax.tick_params(labelsize=6)
+        ax.set_xlabel(self.sweep_x_var.get(), fontsize=7)
+        ax.set_ylabel(self.sweep_y_var.get(), fontsize=7)
+        ax.set_title("决策差额（黑线：决策边界）", fontsize=8)
+        ax.legend(fontsize=6, loc='upper right')
+        ax.tick_params(axis='both', which='major', labelsize=6)
+
+        self.sweep_canvas = charts.FigureCanvasTkAgg(fig, master=self.sweep_frame)
+        self.sweep_canvas.draw()
+        self.sweep_canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
 
     def populate_results_and_visualization_tab(self, parent_frame):
+        if parent_frame is None: # No questions on this tab
+            return
         # This tab will be split into two main areas: Text results and Visualizations
         # Top part for text results
         self.results_text_widget = tk.Text(parent_frame, wrap=tk.WORD, padx=10, pady=10, height=15, font=("Microsoft YaHei", 10))
@@ -643,87 +507,186 @@ class ReVIMApp:
         parent_frame.grid_rowconfigure(0, weight=1) # Text area takes some space
         parent_frame.grid_rowconfigure(1, weight=2) # Visualization takes more space
         parent_frame.grid_columnconfigure(0, weight=1)
-        
-        self.canvas_agg = None
 
-    def display_visualizations(self, calculator):
-        if self.canvas_agg: 
-            self.canvas_agg.get_tk_widget().destroy()
+        if self.history is not None:
+            # Longitudinal log (see revim_history): save a result under a person ID, chart their evaluations
+            history_frame = ttk.LabelFrame(parent_frame, text="评估历史", padding=(5,2))
+            history_frame.grid(row=2, column=0, columnspan=2, sticky="ew", pady=(10,0))
+            self.person_id_var = tk.StringVar()
+            self.history_from_var = tk.StringVar()
+            self.history_to_var = tk.StringVar()
+            for text, var, width in (("人员编号：", self.person_id_var, 16), ("起始（YYYY-MM-DD）：", self.history_from_var, 11), ("至：", self.history_to_var, 11)):
+                ttk.Label(history_frame, text=text).pack(side=tk.LEFT, padx=(0, 2))
+                ttk.Entry(history_frame, textvariable=var, width=width).pack(side=tk.LEFT, padx=(0, 8))
+            ttk.Button(history_frame, text="保存结果", command=self.save_to_history).pack(side=tk.LEFT, padx=2)
+            ttk.Button(history_frame, text="显示变化趋势", command=self.show_trajectory).pack(side=tk.LEFT, padx=2)
+
+    def save_to_history(self):
+        person_id = self.person_id_var.get().strip()
+        if self.last_result is None or not person_id:
+            messagebox.showinfo("评估历史", "请先输入人员编号并完成计算。")
+            return
+        try:
+            self.history.append(person_id, self.last_result)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("评估历史", f"无法保存结果：\n{e}")
+            return
+        self.show_trajectory()
+
+    def show_trajectory(self):
+        person_id = self.person_id_var.get().strip()
+        try:
+            entries = self.history.history(person_id, self.history_from_var.get().strip() or None, self.history_to_var.get().strip() or None)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("评估历史", f"无法读取历史记录：\n{e}")
+            return
+        if self.trajectory_window is None or not self.trajectory_window.winfo_exists():
+            charts = load_charts()
+            self.trajectory_window = tk.Toplevel(self.master)
+            self.trajectory_figure = charts.TrajectoryFigure(lang="zh")
+            self.trajectory_canvas = charts.FigureCanvasTkAgg(self.trajectory_figure.fig, master=self.trajectory_window)
+            self.trajectory_canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+        self.trajectory_window.title(f"评估历史：{person_id}（{len(entries['time'])} 次评估）")
+        self.trajectory_figure.update(entries)
+        self.trajectory_canvas.draw_idle()
+
+    # The questionnaire answers whose one-step change moves NRUPV the most, for the tornado chart
+    # (see revim_attribution). Inputs the questionnaire does not ask for (the category weights) are left out.
+    def compute_attribution(self, response, sensitivity, count=10):
+        from revim_attribution import attribute # Pulls in numpy, so only on first use
+        result = attribute(response, sens=sensitivity, shapley=False)
+        return [row for row in result.top(len(result.rows)) if row["item"] in self.question_labels][:count]
+
+    def tornado_rows(self, attribution):
+        return [(self.question_labels[row["item"]], row["nrupv_down"], row["nrupv_up"]) for row in attribution or []]
+
+    def display_visualizations(self, result, attribution=None):
+        # The figure is built once (see revim_charts) and its artists are updated in place;
+        # draw_idle() lets Tk repaint once the event loop is idle.
+        if self.profile_run is not None: # Superseded before Tk got to repaint it
+            self.profile_run.finish(drawn=False)
+        run = self.profile_run = self.profiler.start("display_visualizations") if self.profiler is not None else None
+        self.build_tab("结果与可视化")
+        if run is not None: run.lap("build_tab")
+        self.redraw_started = time.perf_counter()
+        if self.results_figure is None:
+            charts = load_charts()
+            self.results_figure = charts.ResultsFigure(lang="zh", figsize=(8, 9), tornado=True)
+            self.canvas_agg = charts.FigureCanvasTkAgg(self.results_figure.fig, master=self.vis_frame)
+            self.canvas_agg.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+            self.canvas_agg.mpl_connect("draw_event", self.on_results_drawn)
+            if run is not None: run.lap("create_figure")
+        updated = self.results_figure.update(result, self.tornado_rows(attribution))
+        if run is not None: run.lap("update_artists")
+        if updated:
+            self.canvas_agg.draw_idle() # A profiled call is finished by on_results_drawn()
+        else:
+            self.redraw_started = None # Same result as on screen, nothing to repaint
+            if run is not None:
+                self.profile_run = None
+                run.finish(drawn=False)
+
+    def on_results_drawn(self, event):
+        # Redraw latency: from display_visualizations() to the finished repaint
+        if self.profile_run is not None:
+            self.profile_run.lap("repaint") # Waiting for Tk to be idle, then drawing
+            self.profile_run.finish(drawn=True)
+            self.profile_run = None
+        if self.redraw_started is None:
+            return
+        self.last_redraw_ms = (time.perf_counter() - self.redraw_started) * 1000
+        self.redraw_started = None
+        if self.redraw_timing_hook:
+            self.redraw_timing_hook(self.last_redraw_ms)
+
+    def snapshot_inputs(self):
+        # Runs on the Tk thread; the worker only ever sees these plain copies. The attribution
+        # (about 20 evaluations' worth) is only computed while the results tab shows it.
+        return ResponseRecord.from_tk_vars(self.data_vars), read_tk_vars(self.sensitivity_vars), self.results_tab_visible()
+
+    def compute_results(self, inputs):
+        response, sensitivity, with_attribution = inputs
+        # Successive live results differ in a few answers: recompute only what those feed
+        calculator = IncrementalCalculator(response, sensitivity, lang="zh", cache=self.live_cache, profiler=self.profiler)
+        result = self.result_cache.evaluate(calculator)
+        attribution = self.compute_attribution(response, sensitivity) if with_attribution else None
+        return result, attribution, (response, sensitivity)
+
+    def show_results_text(self, text):
+        self.build_tab("结果与可视化")
+        if self.results_text_widget:
+            self.results_text_widget.config(state=tk.NORMAL)
+            self.results_text_widget.delete('1.0', tk.END)
+            self.results_text_widget.insert(tk.END, text)
+            self.results_text_widget.config(state=tk.DISABLED)
+
+    def results_tab_visible(self):
+        return self.notebook.select() == str(self.tabs["结果与可视化"])
 
-        fig = plt.Figure(figsize=(8, 7), dpi=100) # Adjusted figsize
-        fig.subplots_adjust(hspace=0.5, wspace=0.35) 
+    def on_input_changed(self, *args):
+        if self.live_var.get():
+            self.live.changed()
 
-        ax1 = fig.add_subplot(2, 2, 1)
-        utility_data = {k: v for k, v in calculator.initial_utility_breakdown.items() if abs(v) > 1e-3} # Filter small/zero values
-        utility_labels = [f"{k} ({v:.1f})" for k,v in utility_data.items()]
-        utility_sizes = [abs(v) for v in utility_data.values()] # Pie needs positive values
-        if utility_sizes:
-            ax1.pie(utility_sizes, labels=utility_labels, autopct='%1.1f%%', startangle=90, textprops={'fontsize': 6})
-            ax1.set_title("首期效用构成 (加权后)", fontsize=8)
-        else:
-            ax1.text(0.5, 0.5, "无显著效用数据", ha='center', va='center', fontsize=8)
-            ax1.set_title("首期效用构成", fontsize=8)
-
-        ax2 = fig.add_subplot(2, 2, 2)
-        cost_data = {k: v for k, v in calculator.initial_cost_breakdown.items() if abs(v) > 1e-3}
-        cost_labels = [f"{k} ({v:.1f})" for k,v in cost_data.items()]
-        cost_sizes = [abs(v) for v in cost_data.values()]
-        if cost_sizes:
-            ax2.pie(cost_sizes, labels=cost_labels, autopct='%1.1f%%', startangle=90, textprops={'fontsize': 6})
-            ax2.set_title("首期成本构成 (加权后)", fontsize=8)
+    def toggle_live_mode(self):
+        if self.live_var.get():
+            self.live.changed()
         else:
-            ax2.text(0.5, 0.5, "无显著成本数据", ha='center', va='center', fontsize=8)
-            ax2.set_title("首期成本构成", fontsize=8)
-
-        ax3 = fig.add_subplot(2, 2, 3)
-        if hasattr(calculator, 'time_periods') and calculator.time_periods:
-            ax3.plot(calculator.time_periods, calculator.Net_U_t_series, marker='o', markersize=3, label="每期净效用")
-            ax3.plot(calculator.time_periods, calculator.discounted_Net_U_t_series, marker='x', markersize=3, linestyle='--', label="每期折现后净效用")
-            ax3.axhline(0, color='grey', lw=0.8, linestyle=':')
-            ax3.set_xlabel("时间周期 (年)", fontsize=7)
-            ax3.set_ylabel("净效用值", fontsize=7)
-            ax3.set_title("预期净效用随时间变化", fontsize=8)
-            ax3.legend(fontsize=6)
-            ax3.tick_params(axis='both', which='major', labelsize=6)
+            self.live_summary_label.config(text="")
+
+    def show_live_result(self, outcome):
+        if not self.live_var.get(): # Switched off while the worker was busy
+            return
+        result, attribution, inputs = outcome
+        self.last_result = result
+        self.show_results_text(result.report())
+        decision = "值得继续" if result.is_worth_continuing else "需要重新考虑"
+        self.live_summary_label.config(text=f"实时结果：NRUPV {result.nrupv:.2f}，决策阈值 {result.decision_threshold:.2f}，{decision}")
+        # Redrawing the charts is the slow part, so it only happens while they are on screen
+        if self.results_tab_visible():
+            self.pending_visualization = None
+            if attribution is None: # The tab was opened while the worker was busy
+                attribution = self.compute_attribution(*inputs)
+            self.display_visualizations(result, attribution)
         else:
-            ax3.text(0.5, 0.5, "无时间序列数据", ha='center', va='center', fontsize=8)
-            ax3.set_title("预期净效用随时间变化", fontsize=8)
-
-        ax4 = fig.add_subplot(2, 2, 4)
-        if hasattr(calculator, 'time_periods') and calculator.time_periods:
-            ax4.plot(calculator.time_periods, calculator.cumulative_nrupv_series, marker='o', markersize=3, label="累计NRUPV")
-            ax4.axhline(0, color='grey', lw=0.8, linestyle=':')
-            ax4.set_xlabel("时间周期 (年)", fontsize=7)
-            ax4.set_ylabel("累计NRUPV", fontsize=7)
-            ax4.set_title("累计净关系效用现值", fontsize=8)
-            ax4.legend(fontsize=6)
-            ax4.tick_params(axis='both', which='major', labelsize=6)
-        else:
-            ax4.text(0.5, 0.5, "无累计数据", ha='center', va='center', fontsize=8)
-            ax4.set_title("累计净关系效用现值", fontsize=8)
-
-        plt.rcParams['font.sans-serif'] = ['Microsoft YaHei', 'SimHei', 'Arial Unicode MS'] 
-        plt.rcParams['axes.unicode_minus'] = False 
-
-        self.canvas_agg = FigureCanvasTkAgg(fig, master=self.vis_frame)
-        self.canvas_agg.draw()
-        self.canvas_agg.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+            self.pending_visualization = (result, attribution, inputs)
+
+    def show_live_error(self, error):
+        self.live_summary_label.config(text=f"实时计算出错：{error}")
+        import traceback
+        traceback.print_exception(type(error), error, error.__traceback__) # Also a failed redraw; live mode carries on
+
+    def on_tab_changed(self, event):
+        title = self.tab_title_by_widget.get(self.notebook.select())
+        if title:
+            self.build_tab(title)
+        if self.pending_visualization is not None and self.results_tab_visible():
+            (result, attribution, inputs), self.pending_visualization = self.pending_visualization, None
+            if attribution is None:
+                attribution = self.compute_attribution(*inputs)
+            self.display_visualizations(result, attribution)
 
     def run_calculation_and_show_results(self):
+        self.build_tab("结果与可视化")
         # Clear previous results from text widget
         if self.results_text_widget:
             self.results_text_widget.config(state=tk.NORMAL)
             self.results_text_widget.delete('1.0', tk.END)
         
         try:
-            calculator = ReVIMCalculator(self.data_vars, self.sensitivity_vars)
-            feedback, _ = calculator.evaluate() 
+            # Snapshot the Tk variables once; the calculator itself never touches Tk
+            response = ResponseRecord.from_tk_vars(self.data_vars)
+            sensitivity = read_tk_vars(self.sensitivity_vars)
+            calculator = ReVIMCalculator(response, sensitivity, lang="zh", profiler=self.profiler)
+            result = self.last_result = self.result_cache.evaluate(calculator)
+            feedback = result.report()
+            attribution = self.compute_attribution(response, sensitivity) 
             
             if self.results_text_widget:
                 self.results_text_widget.insert(tk.END, feedback)
                 self.results_text_widget.config(state=tk.DISABLED) 
 
-            self.display_visualizations(calculator)
+            self.pending_visualization = None
+            self.display_visualizations(result, attribution)
             self.notebook.select(self.tabs["结果与可视化"]) 
 
         except Exception as e:
@@ -738,6 +701,29 @@ class ReVIMApp:
 
 
 if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="ReVIM - 关系存续价值综合模型")
+    parser.add_argument("--profile", metavar="FILE", help="退出时将本次会话的 cProfile 统计（pstats）写入 FILE。实时模式的计算在工作线程上运行，不在其中；请用 --stages")
+    parser.add_argument("--stages", metavar="FILE", help="记录每次计算和图表重绘的各阶段耗时、计数和内存分配；退出时以 JSON 写入 FILE，并在 stderr 输出汇总")
+    parser.add_argument("--trace-allocations", action="store_true", help="与 --stages 一起使用：另外追踪每次调用分配的字节数（tracemalloc，较慢）")
+    parser.add_argument("--history", metavar="DIR", help="评估记录目录（revim_history），用于保存结果并绘制某人的历次评估；不存在时自动创建")
+    args = parser.parse_args()
+    if args.trace_allocations and not args.stages:
+        parser.error("--trace-allocations 需要 --stages")
+    profiler = None
+    if args.stages:
+        from revim_profile import Profiler
+        profiler = Profiler(keep=100000, trace_allocations=args.trace_allocations)
+    history = None
+    if args.history:
+        from revim_history import EvaluationLog # Pulls in numpy, so only when asked for
+        history = EvaluationLog(args.history, "a")
+    session = None
+    if args.profile:
+        import cProfile
+        session = cProfile.Profile()
+        session.enable()
+
     root = tk.Tk()
     style = ttk.Style(root)
     available_themes = style.theme_names()
@@ -745,5 +731,16 @@ if __name__ == '__main__':
         style.theme_use("clam")
     elif "vista" in available_themes: 
         style.theme_use("vista")
-    app = ReVIMApp(root)
-    root.mainloop()
+    # REVIM_CACHE: optional SQLite file that keeps calculated results across sessions
+    app = ReVIMApp(root, result_cache=ResultCache(256, os.environ.get("REVIM_CACHE") or None), profiler=profiler, history=history)
+    if os.environ.get("REVIM_TIMING"): # Print chart redraw latency to stderr
+        app.redraw_timing_hook = lambda ms: print(f"redraw: {ms:.1f} ms", file=sys.stderr)
+    try:
+        root.mainloop()
+    finally:
+        if session is not None:
+            session.disable()
+            session.dump_stats(args.profile)
+        if profiler is not None:
+            profiler.dump(args.stages)
+            print(profiler.format_summary(), file=sys.stderr)
@@ -0,0 +1,282 @@
+import argparse
+import csv
+import sys
+import time
+
+import numpy as np
+from scipy.stats import qmc
+
+from revim_batch import encode_responses, evaluate_batch
+from revim_schema import MODEL_CONSTANTS, OPTION_MAPS, SLOTS, response_vector
+
+# --- Global sensitivity analysis ---
+# Ranks questionnaire inputs and the model's hardcoded constants (MODEL_CONSTANTS) by how much
+# they drive NRUPV (or the decision margin NRUPV - OCAU - sunk-cost adjustment).
+#
+#   morris(): elementary effects (mu, mu*, sigma) along one-at-a-time trajectories
+#   sobol():  first-order and total Sobol indices (Saltelli / Jansen estimators)
+#
+# Both sample the unit hypercube with scrambled Sobol points and map every coordinate to a
+# factor value: questionnaire inputs take their answer levels with equal probability (or
+# follow the marginal distribution of a population of responses), constants vary uniformly
+# within +-50% of their value. All model runs go through the batch engine in chunks.
+#
+#   python revim_gsa.py sobol --samples 4096 --population responses.csv --top 25
+#   python revim_gsa.py morris --trajectories 500 --output margin
+
+SCALE_LEVELS = np.arange(1.0, 8.0) # 1-7 answers
+FLAG_LEVELS = np.array([0.0, 1.0])
+
+
+def _option_levels(kind):
+    return np.array(sorted(OPTION_MAPS["en"][kind][0].values()), dtype=float)
+
+
+class Factor:
+    # A questionnaire slot (slot index) or a model constant (constant name). levels: values
+    # taken with equal probability, or in proportion to counts; bounds: (low, high) for a uniform value.
+    def __init__(self, name, group, slot=None, constant=None, levels=None, bounds=None, counts=None):
+        self.name = name
+        self.group = group
+        self.slot = slot
+        self.constant = constant
+        self.levels = None if levels is None else np.asarray(levels, dtype=float)
+        self.bounds = bounds
+        self.cumulative = None if counts is None else np.cumsum(counts)
+
+    def transform(self, u):
+        if self.cumulative is not None: # Same as repeating each level counts times
+            index = np.searchsorted(self.cumulative, u * self.cumulative[-1], side="right")
+            return self.levels[np.minimum(index, len(self.levels) - 1)]
+        if self.levels is not None:
+            return self.levels[np.minimum((u * len(self.levels)).astype(np.intp), len(self.levels) - 1)]
+        low, high = self.bounds
+        return low + u * (high - low)
+
+
+# Per slot (distinct values, counts) of encoded responses, read from (n, Q) arrays one at a time,
+# so memory grows with the number of distinct answers, not of responses. N/A (NaN) counts too.
+def population_marginals(chunks):
+    marginals = [(np.empty(0), np.empty(0)) for _ in SLOTS]
+    for X in chunks:
+        for slot, (values, counts) in enumerate(marginals):
+            chunk_values, chunk_counts = np.unique(X[:, slot], return_counts=True)
+            values, inverse = np.unique(np.concatenate([values, chunk_values]), return_inverse=True)
+            marginals[slot] = (values, np.bincount(inverse, np.concatenate([counts, chunk_counts]), len(values)))
+    return marginals
+
+
+# population: optional (N, Q) array of encoded responses, or population_marginals() of them; each
+# input then follows that column's observed values (an empirical marginal, N/A answers included)
+# instead of uniform answer levels
+def default_factors(population=None, constants=True, constant_spread=0.5):
+    if isinstance(population, np.ndarray):
+        population = population_marginals([population])
+    factors = []
+    for slot, (key, kind, _) in enumerate(SLOTS):
+        counts = None
+        if population is not None:
+            levels, counts = population[slot]
+        elif kind in ("likert", "number", "weight"):
+            levels = SCALE_LEVELS
+        elif kind in ("flag", "conflict"):
+            levels = FLAG_LEVELS
+        else:
+            levels = _option_levels(kind)
+        factors.append(Factor(key, "input", slot=slot, levels=levels, counts=counts))
+    if constants:
+        for key, val in MODEL_CONSTANTS.items():
+            factors.append(Factor(key, "constant", constant=key, bounds=(val * (1 - constant_spread), val * (1 + constant_spread))))
+    return factors
+
+
+class ModelRunner:
+    # Maps unit-hypercube points to model inputs and evaluates them in chunks
+    def __init__(self, factors, output="nrupv", sens=None, periods_per_year=1, chunk_size=50000, base=None):
+        if output not in ("nrupv", "margin"):
+            raise ValueError(f"Unknown output: {output}")
+        self.factors = factors
+        self.output = output
+        self.sens = sens
+        self.periods_per_year = periods_per_year
+        self.chunk_size = chunk_size
+        self.base = np.asarray(response_vector({}) if base is None else base, dtype=float) # Values of slots that are not factors
+        self.runs = 0
+
+    def _evaluate_chunk(self, U):
+        X = np.array(np.broadcast_to(self.base, (len(U), len(self.base))))
+        constants = {}
+        for j, factor in enumerate(self.factors):
+            values = factor.transform(U[:, j])
+            if factor.slot is not None:
+                X[:, factor.slot] = values
+            else:
+                constants[factor.constant] = values
+        res = evaluate_batch(X, self.sens, series=False, periods_per_year=self.periods_per_year, constants=constants)
+        return res.nrupv if self.output == "nrupv" else res.nrupv - res.ocau - res.sunk_cost_adj
+
+    def __call__(self, U):
+        self.runs += len(U)
+        return np.concatenate([self._evaluate_chunk(U[start:start + self.chunk_size])
+                               for start in range(0, len(U), self.chunk_size)] or [np.empty(0)])
+
+
+class GSAResult:
+    # One row per factor: dict with "factor", "group" and the method's index columns
+    def __init__(self, method, rows, runs, elapsed, rank_by):
+        self.method = method
+        self.rows = rows
+        self.runs = runs
+        self.elapsed = elapsed
+        self.rank_by = rank_by
+
+    def ranked(self, by=None):
+        by = by or self.rank_by
+        return sorted(self.rows, key=lambda row: -abs(row[by]) if row[by] == row[by] else 0.0)
+
+    def format_table(self, limit=None, by=None):
+        rows = self.ranked(by)[:limit]
+        columns = [c for c in rows[0] if c not in ("factor", "group")] if rows else []
+        width = max([len(row["factor"]) for row in rows] + [6])
+        lines = [f"{'rank':>4}  {'factor':<{width}}  {'group':<8}" + "".join(f"{c:>12}" for c in columns)]
+        for rank, row in enumerate(rows, 1):
+            lines.append(f"{rank:>4}  {row['factor']:<{width}}  {row['group']:<8}" + "".join(f"{row[c]:>12.4g}" for c in columns))
+        return "\n".join(lines)
+
+    def write_csv(self, stream, by=None):
+        rows = self.ranked(by)
+        writer = csv.DictWriter(stream, fieldnames=["rank"] + list(rows[0]), lineterminator="\n")
+        writer.writeheader()
+        for rank, row in enumerate(rows, 1):
+            writer.writerow(dict(row, rank=rank))
+
+
+# First n points of a scrambled Sobol sequence (drawn as a power of two, which the sequence's
+# balance properties are defined for; sample counts that are powers of two use all of them)
+def _sobol_points(d, n, seed):
+    sampler = qmc.Sobol(d, scramble=True, seed=seed)
+    m = int(np.ceil(np.log2(max(n, 1))))
+    return sampler.random_base2(m)[:n]
+
+
+def morris(factors=None, trajectories=100, levels=4, seed=0, **runner_kwargs):
+    if levels < 2 or levels % 2:
+        raise ValueError(f"levels must be even and at least 2, got {levels}") # Odd grids step out of [0, 1]
+    factors = factors or default_factors()
+    d = len(factors)
+    delta = levels / (2 * (levels - 1))
+    rng = np.random.default_rng(seed)
+    start_time = time.perf_counter()
+
+    # Trajectory starts on the lower half of the level grid, so a +delta step stays in [0, 1];
+    # half of the factors start delta higher and step down instead.
+    start = np.floor(_sobol_points(d, trajectories, rng) * (levels / 2)) / (levels - 1)
+    sign = rng.choice([-1.0, 1.0], size=(trajectories, d))
+    start = np.where(sign < 0, start + delta, start)
+    order = np.argsort(rng.random((trajectories, d)), axis=1) # Factor moved at each step
+
+    points = np.repeat(start[:, None, :], d + 1, axis=1)
+    moved = np.zeros((trajectories, d))
+    rows = np.arange(trajectories)
+    for step in range(d):
+        moved[rows, order[:, step]] = sign[rows, order[:, step]] * delta
+        points[:, step + 1] = start + moved
+
+    runner = ModelRunner(factors, **runner_kwargs)
+    y = runner(points.reshape(-1, d)).reshape(trajectories, d + 1)
+    effects = np.empty((trajectories, d))
+    effects[rows[:, None], order] = np.diff(y, axis=1) / (sign[rows[:, None], order] * delta)
+
+    result_rows = [{"factor": f.name, "group": f.group, "mu": effects[:, j].mean(), "mu_star": np.abs(effects[:, j]).mean(),
+                    "sigma": effects[:, j].std(ddof=1) if trajectories > 1 else 0.0} for j, f in enumerate(factors)]
+    return GSAResult("morris", result_rows, runner.runs, time.perf_counter() - start_time, "mu_star")
+
+
+def _sobol_indices(fA, fB, fAB):
+    var = np.var(np.concatenate([fA, fB]))
+    if var == 0:
+        zeros = np.zeros(fAB.shape[1])
+        return zeros, zeros
+    first = np.mean(fB[:, None] * (fAB - fA[:, None]), axis=0) / var # Saltelli et al. (2010)
+    total = 0.5 * np.mean((fA[:, None] - fAB) ** 2, axis=0) / var # Jansen (1999)
+    return first, total
+
+
+def sobol(factors=None, samples=1024, seed=0, n_bootstrap=100, conf_level=0.95, **runner_kwargs):
+    factors = factors or default_factors()
+    d = len(factors)
+    rng = np.random.default_rng(seed)
+    start_time = time.perf_counter()
+
+    AB = _sobol_points(2 * d, samples, rng)
+    A, B = AB[:, :d], AB[:, d:]
+    runner = ModelRunner(factors, **runner_kwargs)
+    fA = runner(A)
+    fB = runner(B)
+    fAB = np.empty((samples, d))
+    for j in range(d): # A with column j taken from B
+        ABj = A.copy()
+        ABj[:, j] = B[:, j]
+        fAB[:, j] = runner(ABj)
+    first, total = _sobol_indices(fA, fB, fAB)
+
+    # Bootstrap half-widths of the confidence intervals
+    first_conf = total_conf = np.full(d, np.nan)
+    if n_bootstrap > 0:
+        boot_first = np.empty((n_bootstrap, d))
+        boot_total = np.empty((n_bootstrap, d))
+        for b in range(n_bootstrap):
+            idx = rng.integers(0, samples, samples)
+            boot_first[b], boot_total[b] = _sobol_indices(fA[idx], fB[idx], fAB[idx])
+        tail = (1 - conf_level) / 2 * 100
+        first_conf = np.diff(np.percentile(boot_first, [tail, 100 - tail], axis=0), axis=0)[0] / 2
+        total_conf = np.diff(np.percentile(boot_total, [tail, 100 - tail], axis=0), axis=0)[0] / 2
+
+    result_rows = [{"factor": f.name, "group": f.group, "S1": first[j], "S1_conf": first_conf[j],
+                    "ST": total[j], "ST_conf": total_conf[j]} for j, f in enumerate(factors)]
+    return GSAResult("sobol", result_rows, runner.runs, time.perf_counter() - start_time, "ST")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Global sensitivity analysis of NRUPV over questionnaire inputs and model constants.")
+    parser.add_argument("method", choices=["morris", "sobol"])
+    parser.add_argument("--samples", type=int, default=1024, help="Sobol base samples; runs = samples x (factors + 2)")
+    parser.add_argument("--trajectories", type=int, default=200, help="Morris trajectories; runs = trajectories x (factors + 1)")
+    parser.add_argument("--levels", type=int, default=4, help="Morris grid levels (even)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", choices=["nrupv", "margin"], default="nrupv",
+                        help="Analysed quantity: NRUPV or NRUPV - (OCAU + sunk-cost adjustment)")
+    parser.add_argument("--population", help="CSV or JSON Lines responses whose answer distribution the inputs follow (read in chunks; only answer counts are kept)")
+    parser.add_argument("--lang", choices=["en", "zh"], default="en", help="Ignored: option labels of both languages are recognised (kept for existing scripts)")
+    parser.add_argument("--no-constants", action="store_true", help="Analyse questionnaire inputs only")
+    parser.add_argument("--constant-spread", type=float, default=0.5, help="Relative range of the constants (default: +-50%%)")
+    parser.add_argument("--bootstrap", type=int, default=100, help="Bootstrap resamples for Sobol confidence intervals")
+    parser.add_argument("--top", type=int, default=30, help="Rows shown in the ranked table (0 = all)")
+    parser.add_argument("--csv", help="Write the full ranked table to this CSV file")
+    args = parser.parse_args(argv)
+    if args.levels < 2 or args.levels % 2:
+        parser.error("--levels must be even and at least 2")
+
+    population = None
+    if args.population:
+        from revim_cli import _chunks, detect_format, read_responses
+        with open(args.population, newline="", encoding="utf-8-sig") as f:
+            rows = read_responses(f, detect_format(args.population))
+            population = population_marginals(encode_responses(chunk) for chunk in _chunks(rows, 8192))
+    factors = default_factors(population, constants=not args.no_constants, constant_spread=args.constant_spread)
+
+    if args.method == "morris":
+        result = morris(factors, args.trajectories, args.levels, args.seed, output=args.output)
+    else:
+        result = sobol(factors, args.samples, args.seed, args.bootstrap, output=args.output)
+
+    print(result.format_table(args.top or None))
+    print(f"{result.runs:,} model runs in {result.elapsed:.1f}s ({result.runs / result.elapsed:,.0f} runs/s)", file=sys.stderr)
+    if args.csv:
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            result.write_csv(f)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,402 @@
+import argparse
+import csv
+import datetime
+import json
+import numbers
+import os
+import sys
+import time
+import zlib
+
+import numpy as np
+
+from revim_batch import evaluate_batch
+from revim_cli import _chunks, _parse_sens, detect_format, encode_chunk, read_responses, sens_defaults
+from revim_schema import CATEGORY_LABELS_EN, COST_CATEGORIES, N_SLOTS, PERIODS_PER_YEAR, SENSITIVITY_KEYS, UTILITY_CATEGORIES
+
+# --- Longitudinal evaluation log ---
+# Timestamped evaluations of many people, for following a person's results across re-takes of
+# the questionnaire. The log is a directory that is only ever appended to:
+#
+#   log.json      format version, partition count and columns
+#   persons.txt   person IDs, one per line; the line number is the person's code
+#   p000/ ...     partitions, each with one file per column (COLUMNS) holding one little-endian
+#                 value per entry in append order, and index.npy
+#
+# All entries of a person go to one partition (crc32 of the ID), so a query reads one partition.
+# index.npy holds the (person code, time, row) triples of the partition's first rows, sorted,
+# so "person X between A and B" is two binary searches plus reading the matching rows of the
+# requested columns. Rows appended since the index was written are scanned; once they exceed
+# a quarter of the partition (and INDEX_TAIL) the index is rebuilt, which keeps rebuilds
+# amortized O(log n) per entry as the log grows to tens of millions of entries.
+#
+# One writer at a time. A crash mid-append leaves column files of unequal length; readers use
+# the shortest and a writer truncates the others when it opens the log.
+#
+#   python revim_history.py append clients.log responses.csv --person-column client_id --time-column taken_at
+#   python revim_history.py query clients.log C-1042 --from 2024-01-01 --to 2024-12-31
+#   python revim_history.py info clients.log
+
+LOG_VERSION = 1
+DEFAULT_PARTITIONS = 16
+INDEX_TAIL = 65536 # Unindexed rows always tolerated per partition
+UTILITY_KEYS = [cat_key for cat_key, _, _ in UTILITY_CATEGORIES]
+COST_KEYS = [cat_key for cat_key, _, _ in COST_CATEGORIES]
+# (name, numpy dtype) of every column; time is Unix seconds, person the code in persons.txt
+COLUMNS = [
+    ("time", "<i8"), ("person", "<i4"), ("nrupv", "<f8"), ("ocau", "<f8"), ("sunk_cost_adj", "<f8"),
+    ("decision_margin", "<f8"), ("T_realistic", "<f8"), ("is_worth_continuing", "|i1"),
+] + [(key, "<f8") for key in UTILITY_KEYS + COST_KEYS]
+VALUE_COLUMNS = [name for name, _ in COLUMNS if name not in ("time", "person")]
+
+# Breakdown label (Chinese or English, as ReVIMResult has them) -> category key
+_UTILITY_LABEL_KEYS = {}
+_COST_LABEL_KEYS = {}
+for _categories, _table in ((UTILITY_CATEGORIES, _UTILITY_LABEL_KEYS), (COST_CATEGORIES, _COST_LABEL_KEYS)):
+    for _cat_key, _label, _ in _categories:
+        _table[_label] = _table[CATEGORY_LABELS_EN[_label]] = _cat_key
+
+
+def to_timestamp(value, end=False):
+    # Unix seconds of a datetime, date, ISO string or number (also as a string); None is now. A date
+    # (or a string without a time) means its start, or with end=True its last second. Naive times are local.
+    if value is None:
+        return int(time.time())
+    if isinstance(value, numbers.Real):
+        return int(value)
+    if isinstance(value, str):
+        value = value.strip()
+        try:
+            return int(float(value)) # Unix seconds, as CSV text
+        except (ValueError, OverflowError):
+            pass
+        value = datetime.date.fromisoformat(value) if len(value) == 10 else datetime.datetime.fromisoformat(value)
+    if isinstance(value, datetime.datetime):
+        return int(value.timestamp())
+    if isinstance(value, datetime.date):
+        start = int(datetime.datetime.combine(value, datetime.time()).timestamp())
+        return start + 86399 if end else start
+    raise ValueError(f"Not a time: {value!r}")
+
+
+def result_columns(result):
+    # Column values of one revim_model.ReVIMResult
+    values = {"nrupv": result.nrupv, "ocau": result.ocau, "sunk_cost_adj": result.sunk_cost_adj,
+              "decision_margin": result.decision_margin, "T_realistic": result.T_realistic,
+              "is_worth_continuing": int(result.is_worth_continuing)}
+    values.update({key: np.nan for key in UTILITY_KEYS + COST_KEYS}) # Categories a result does not list
+    for label, value in result.initial_utility_breakdown.items():
+        values[_UTILITY_LABEL_KEYS[label]] = value
+    for label, value in result.initial_cost_breakdown.items():
+        values[_COST_LABEL_KEYS[label]] = value
+    return values
+
+
+def batch_columns(res):
+    # Column arrays of a revim_batch.BatchResult
+    threshold = res.ocau + res.sunk_cost_adj
+    columns = {"nrupv": res.nrupv, "ocau": res.ocau, "sunk_cost_adj": res.sunk_cost_adj, "decision_margin": res.nrupv - threshold,
+               "T_realistic": res.T_realistic, "is_worth_continuing": res.is_worth_continuing}
+    columns.update({key: res.initial_utility_breakdown[:, k] for k, key in enumerate(UTILITY_KEYS)})
+    columns.update({key: res.initial_cost_breakdown[:, k] for k, key in enumerate(COST_KEYS)})
+    return columns
+
+
+class EvaluationLog:
+    # path: log directory; mode: "r" read, "a" append (created if missing, with `partitions`)
+    def __init__(self, path, mode="r", partitions=DEFAULT_PARTITIONS):
+        if mode not in ("r", "a"):
+            raise ValueError(f"Unknown mode: {mode!r}")
+        self.path = path
+        self.mode = mode
+        manifest = os.path.join(path, "log.json")
+        if mode == "a" and not os.path.exists(manifest):
+            self._create(partitions)
+        try:
+            with open(manifest, encoding="utf-8") as f:
+                header = json.load(f)
+        except FileNotFoundError:
+            raise ValueError(f"{path} is not an evaluation log") from None
+        if header.get("version", LOG_VERSION + 1) > LOG_VERSION:
+            raise ValueError(f"{path} has log version {header.get('version')}; this version reads up to {LOG_VERSION}")
+        self.partitions = header["partitions"]
+        self.columns = {name: np.dtype(dtype) for name, dtype in header["columns"]}
+        if mode == "a" and [[name, dtype] for name, dtype in COLUMNS] != header["columns"]:
+            raise ValueError(f"{path} was written with other columns; append to a new log")
+        self.person_ids = [] # Code -> ID
+        self.person_codes = {} # ID -> code
+        self._load_persons()
+        if mode == "a":
+            for p in range(self.partitions):
+                rows = self._rows(p)
+                for name, dtype in self.columns.items(): # Drop an entry left half-written by an interrupted append
+                    with open(self._column_path(p, name), "r+b") as f:
+                        f.truncate(rows * dtype.itemsize)
+
+    def _create(self, partitions):
+        os.makedirs(self.path, exist_ok=True)
+        for p in range(partitions):
+            os.makedirs(self._partition_path(p), exist_ok=True)
+            for name, _ in COLUMNS:
+                open(self._column_path(p, name), "ab").close()
+        open(os.path.join(self.path, "persons.txt"), "ab").close()
+        with open(os.path.join(self.path, "log.json.tmp"), "w", encoding="utf-8") as f:
+            json.dump({"version": LOG_VERSION, "partitions": partitions, "columns": [[name, dtype] for name, dtype in COLUMNS]}, f)
+        os.replace(os.path.join(self.path, "log.json.tmp"), os.path.join(self.path, "log.json"))
+
+    def _load_persons(self):
+        path = os.path.join(self.path, "persons.txt")
+        with open(path, "rb") as f:
+            data = f.read()
+        complete = data[:data.rfind(b"\n") + 1] # A line without its newline was cut off mid-append
+        if self.mode == "a" and len(complete) < len(data):
+            with open(path, "r+b") as f:
+                f.truncate(len(complete))
+        self.person_ids = complete.decode("utf-8").split("\n")[:-1]
+        self.person_codes = {person_id: code for code, person_id in enumerate(self.person_ids)}
+
+    def _partition_path(self, p):
+        return os.path.join(self.path, f"p{p:03d}")
+
+    def _column_path(self, p, name):
+        return os.path.join(self._partition_path(p), f"{name}.bin")
+
+    def _rows(self, p):
+        return min(os.path.getsize(self._column_path(p, name)) // dtype.itemsize for name, dtype in self.columns.items())
+
+    def __len__(self):
+        return sum(self._rows(p) for p in range(self.partitions))
+
+    def partition_of(self, person_id):
+        return zlib.crc32(person_id.encode("utf-8")) % self.partitions
+
+    def nbytes(self):
+        return sum(entry.stat().st_size for p in range(self.partitions) for entry in os.scandir(self._partition_path(p)))
+
+    # Column `name` of partition p, memory-mapped (read-only, no copy); rows 0..rows
+    def column(self, p, name, rows=None):
+        rows = self._rows(p) if rows is None else rows
+        if rows == 0:
+            return np.empty(0, dtype=self.columns[name])
+        return np.memmap(self._column_path(p, name), dtype=self.columns[name], mode="r", shape=(rows,))
+
+    def _index(self, p):
+        try:
+            index = np.load(os.path.join(self._partition_path(p), "index.npy"), mmap_mode="r")
+        except (FileNotFoundError, ValueError):
+            return np.empty((3, 0), dtype=np.int64)
+        return index
+
+    def _person_code(self, person_id, f):
+        code = self.person_codes.get(person_id)
+        if code is None:
+            if not isinstance(person_id, str) or not person_id or "\n" in person_id or "\r" in person_id:
+                raise ValueError(f"Invalid person ID: {person_id!r}")
+            code = self.person_codes[person_id] = len(self.person_ids)
+            self.person_ids.append(person_id)
+            f.write(person_id.encode("utf-8") + b"\n")
+        return code
+
+    # person_ids: one ID per entry; times: anything to_timestamp takes, per entry;
+    # columns: {column name: array or list of one value per entry} for every VALUE_COLUMNS name
+    def append_columns(self, person_ids, times, columns):
+        if self.mode != "a":
+            raise ValueError("Log is open for reading")
+        n = len(person_ids)
+        if n == 0:
+            return 0
+        stamps = np.array([to_timestamp(t) for t in times], dtype=np.int64)
+        with open(os.path.join(self.path, "persons.txt"), "ab") as f:
+            codes = np.array([self._person_code(person_id, f) for person_id in person_ids], dtype=np.int64)
+        parts = np.array([self.partition_of(self.person_ids[code]) for code in codes])
+        values = {"time": stamps, "person": codes}
+        values.update({name: np.asarray(columns[name]) for name in VALUE_COLUMNS})
+        order = np.argsort(parts, kind="stable")
+        bounds = np.searchsorted(parts[order], np.arange(self.partitions + 1))
+        for p in range(self.partitions):
+            rows = order[bounds[p]:bounds[p + 1]]
+            if not len(rows):
+                continue
+            for name, dtype in self.columns.items():
+                with open(self._column_path(p, name), "ab") as f:
+                    f.write(values[name][rows].astype(dtype).tobytes())
+            indexed = self._index(p).shape[1]
+            if self._rows(p) - indexed > max(INDEX_TAIL, indexed // 4):
+                self.reindex(p)
+        return n
+
+    # entries: (person ID, time, revim_model.ReVIMResult) tuples
+    def append_many(self, entries):
+        entries = list(entries)
+        columns = {name: [] for name in VALUE_COLUMNS}
+        for _, _, result in entries:
+            for name, value in result_columns(result).items():
+                columns[name].append(value)
+        return self.append_columns([entry[0] for entry in entries], [entry[1] for entry in entries], columns)
+
+    def append(self, person_id, result, time=None):
+        return self.append_many([(person_id, time, result)])
+
+    # Sorts all of partition p's entries into its index (every partition when p is None)
+    def reindex(self, p=None):
+        for p in range(self.partitions) if p is None else [p]:
+            rows = self._rows(p)
+            index = np.empty((3, rows), dtype=np.int64)
+            index[0] = self.column(p, "person", rows)
+            index[1] = self.column(p, "time", rows)
+            index[2] = np.arange(rows)
+            index = index[:, np.lexsort((index[2], index[1], index[0]))]
+            path = os.path.join(self._partition_path(p), "index.npy")
+            with open(path + ".tmp", "wb") as f:
+                np.save(f, index)
+            os.replace(path + ".tmp", path)
+
+    # Rows (of the first `rows`) of partition p holding entries of person code between the start
+    # and end timestamps
+    def _find(self, p, code, start, end, rows):
+        index = self._index(p)
+        lo, hi = np.searchsorted(index[0], [code, code + 1])
+        times = index[1, lo:hi]
+        found = index[2, lo + np.searchsorted(times, start, side="left"):lo + np.searchsorted(times, end, side="right")]
+        found = found[found < rows] # The index may be newer than `rows` when another process appends
+        indexed = min(index.shape[1], rows)
+        # Entries appended since the index was written
+        tail_people = self.column(p, "person", rows)[indexed:]
+        tail_times = self.column(p, "time", rows)[indexed:]
+        tail = np.flatnonzero((tail_people == code) & (tail_times >= start) & (tail_times <= end)) + indexed
+        return np.concatenate([found, tail])
+
+    # {column: array} of a person's entries from start to end (inclusive, anything to_timestamp
+    # takes; None for no limit), oldest first. columns: names to read (default: all)
+    def history(self, person_id, start=None, end=None, columns=None):
+        names = list(self.columns) if columns is None else ["time"] + [name for name in columns if name != "time"]
+        code = self.person_codes.get(person_id)
+        if code is None: # Perhaps added since the log was opened
+            self._load_persons()
+            code = self.person_codes.get(person_id)
+        if code is None:
+            return {name: np.empty(0, dtype=self.columns[name]) for name in names}
+        start = np.iinfo(np.int64).min if start is None else to_timestamp(start)
+        end = np.iinfo(np.int64).max if end is None else to_timestamp(end, end=True)
+        p = self.partition_of(person_id)
+        n = self._rows(p)
+        rows = self._find(p, code, start, end, n)
+        rows = rows[np.argsort(self.column(p, "time", n)[rows], kind="stable")]
+        return {name: np.asarray(self.column(p, name, n)[rows]) for name in names}
+
+    def persons(self):
+        return list(self.person_ids)
+
+
+def _iso(timestamp):
+    return datetime.datetime.fromtimestamp(int(timestamp)).isoformat(sep=" ")
+
+
+def append_responses(log, rows, person_column, time_column=None, chunk_size=8192, sens=None, periods_per_year=1, skip_invalid=False):
+    # Scores response rows with the batch engine and appends them; returns (appended, skipped)
+    defaults = sens_defaults(sens)
+    X = np.empty((chunk_size, N_SLOTS))
+    S = {key: np.empty(chunk_size) for key in SENSITIVITY_KEYS}
+    appended = skipped = 0
+    row_offset = 0
+    for chunk in _chunks(rows, chunk_size):
+        valid, errors = encode_chunk(chunk, X, S, defaults, skip_invalid, row_offset)
+        people, times, keep = [], [], []
+        for j, i in enumerate(valid):
+            values = chunk[i]
+            try:
+                person_id = str(values.get(person_column) or "").strip()
+                if not person_id:
+                    raise ValueError(f"no {person_column}")
+                times.append(to_timestamp(values.get(time_column) or None) if time_column else None)
+            except ValueError as e:
+                if not skip_invalid:
+                    raise ValueError(f"Row {row_offset + i + 1}: {e}") from None
+                continue
+            people.append(person_id)
+            keep.append(j)
+        if keep:
+            res = evaluate_batch(X[keep], {key: arr[keep] for key, arr in S.items()}, series=False, periods_per_year=periods_per_year)
+            appended += log.append_columns(people, times, batch_columns(res))
+        skipped += len(chunk) - len(keep)
+        row_offset += len(chunk)
+    return appended, skipped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Append-only log of timestamped ReVIM evaluations, queried per person.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    append = commands.add_parser("append", help="Score responses and append them to the log")
+    append.add_argument("log", help="Log directory (created if missing)")
+    append.add_argument("input", help="CSV or JSON Lines file of responses ('-' for stdin)")
+    append.add_argument("--person-column", required=True, help="Input column identifying the person")
+    append.add_argument("--time-column", help="Input column with the evaluation time (ISO date/time or Unix seconds; default: now)")
+    append.add_argument("--input-format", choices=["csv", "jsonl"], help="Default: guessed from the file extension")
+    append.add_argument("--sens", action="append", metavar="KEY=VALUE", help="Sensitivity factor applied to all rows")
+    append.add_argument("--periods", choices=list(PERIODS_PER_YEAR), default="annual", help="Horizon resolution (default: annual)")
+    append.add_argument("--chunk-size", type=int, default=8192, help="Rows scored per batch (default: 8192)")
+    append.add_argument("--skip-invalid", action="store_true", help="Skip invalid rows instead of stopping")
+    append.add_argument("--partitions", type=int, default=DEFAULT_PARTITIONS, help=f"Partitions of a new log (default: {DEFAULT_PARTITIONS})")
+    query = commands.add_parser("query", help="A person's evaluations, oldest first")
+    query.add_argument("log")
+    query.add_argument("person")
+    query.add_argument("--from", dest="start", help="First date or time (inclusive)")
+    query.add_argument("--to", dest="end", help="Last date or time (inclusive)")
+    query.add_argument("-o", "--output", default="-", help="CSV or JSON Lines file ('-' for stdout)")
+    query.add_argument("--output-format", choices=["csv", "jsonl"], help="Default: guessed from the file extension")
+    for name, text in (("info", "Entries, people and size of the log"), ("reindex", "Rebuild the indexes of every partition")):
+        commands.add_parser(name, help=text).add_argument("log")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        if args.command == "append":
+            if args.chunk_size < 1 or args.partitions < 1:
+                parser.error("--chunk-size and --partitions must be positive")
+            sens = _parse_sens(args.sens)
+            log = EvaluationLog(args.log, "a", args.partitions)
+            src = sys.stdin if args.input == "-" else open(args.input, newline="", encoding="utf-8-sig")
+            try:
+                appended, skipped = append_responses(log, read_responses(src, detect_format(args.input, args.input_format)), args.person_column,
+                                                     args.time_column, args.chunk_size, sens, PERIODS_PER_YEAR[args.periods], args.skip_invalid)
+            finally:
+                if src is not sys.stdin: src.close()
+            elapsed = time.perf_counter() - start
+            skipped = f", {skipped} invalid rows skipped" if skipped else ""
+            print(f"Appended {appended} evaluations in {elapsed:.2f}s{skipped}; {args.log} now holds {len(log):,}", file=sys.stderr)
+        elif args.command == "query":
+            log = EvaluationLog(args.log)
+            entries = log.history(args.person, args.start, args.end)
+            fmt = detect_format(args.output, args.output_format)
+            fields = [name for name in log.columns if name != "person"]
+            dst = sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
+            try:
+                writer = csv.DictWriter(dst, fieldnames=fields, lineterminator="\n") if fmt == "csv" else None
+                if writer is not None:
+                    writer.writeheader()
+                for j in range(len(entries["time"])):
+                    record = {name: _iso(entries[name][j]) if name == "time" else entries[name][j].item() for name in fields}
+                    if writer is not None:
+                        writer.writerow({k: (f"{v:.10g}" if isinstance(v, float) else v) for k, v in record.items()})
+                    else:
+                        dst.write(json.dumps({k: (None if v != v else v) for k, v in record.items()}, ensure_ascii=False) + "\n")
+            finally:
+                if dst is not sys.stdout: dst.close()
+            print(f"{len(entries['time'])} evaluations in {(time.perf_counter() - start) * 1000:.1f} ms", file=sys.stderr)
+        elif args.command == "info":
+            log = EvaluationLog(args.log)
+            indexed = sum(min(log._index(p).shape[1], log._rows(p)) for p in range(log.partitions))
+            print(f"{len(log):,} evaluations of {len(log.person_ids):,} people in {log.partitions} partitions "
+                  f"({indexed:,} indexed), {log.nbytes():,} bytes on disk")
+        else:
+            log = EvaluationLog(args.log, "a")
+            log.reindex()
+            print(f"Reindexed {len(log):,} evaluations in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+    except (OSError, ValueError, argparse.ArgumentTypeError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
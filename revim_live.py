@@ -0,0 +1,123 @@
+import queue
+import threading
+import time
+
+# --- Live recompute for the GUIs ---
+# Input changes (Likert scales, sensitivity sliders, ...) call changed(). Changes are debounced:
+# the calculation starts once the input has been quiet for delay_ms, but never later than
+# max_wait_ms after the first change, so results keep flowing during a continuous drag.
+#
+# The inputs are snapshotted on the Tk thread and computed on one background worker thread.
+# Only the newest snapshot is kept: a snapshot that is superseded before the worker picks it
+# up is never computed, and results for superseded snapshots are dropped. Finished results
+# are collected on the Tk thread by polling with after(), because Tk must not be called from
+# the worker.
+
+class LiveRecompute:
+    # widget: any Tk widget (used for after()); snapshot(): read the inputs on the Tk thread;
+    # compute(inputs): runs on the worker thread; on_result(result) / on_error(exception): Tk thread.
+    # on_error also gets the exceptions of on_result.
+    def __init__(self, widget, snapshot, compute, on_result, on_error=None, delay_ms=30, max_wait_ms=60, poll_ms=10):
+        self.widget = widget
+        self.snapshot = snapshot
+        self.compute = compute
+        self.on_result = on_result
+        self.on_error = on_error
+        self.delay_ms = delay_ms
+        self.max_wait_ms = max_wait_ms
+        self.poll_ms = poll_ms
+        self.last_latency_ms = None # From the first change to the result being handed to on_result
+
+        self._generation = 0 # Id of the newest submitted snapshot
+        self._delivered = 0
+        self._first_change = None
+        self._submitted_at = {}
+        self._debounce_id = None
+        self._poll_id = None
+        self._job = None
+        self._closed = False
+        self._cond = threading.Condition()
+        self._results = queue.SimpleQueue()
+        self._worker = threading.Thread(target=self._run, name="revim-live", daemon=True)
+        self._worker.start()
+
+    def changed(self, *args): # Usable directly as a Tk variable trace callback
+        if self._closed:
+            return
+        now = time.perf_counter()
+        if self._first_change is None:
+            self._first_change = now
+        if self._debounce_id is not None:
+            self.widget.after_cancel(self._debounce_id)
+        waited_ms = (now - self._first_change) * 1000
+        delay = max(0, min(self.delay_ms, self.max_wait_ms - waited_ms))
+        self._debounce_id = self.widget.after(int(delay), self._submit)
+
+    def _submit(self):
+        self._debounce_id = None
+        self._generation += 1
+        self._submitted_at[self._generation] = self._first_change
+        self._first_change = None
+        job = (self._generation, self.snapshot())
+        with self._cond:
+            self._job = job # Replaces a snapshot the worker has not started yet
+            self._cond.notify()
+        if self._poll_id is None:
+            self._poll_id = self.widget.after(self.poll_ms, self._poll)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._job is None and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                (generation, inputs), self._job = self._job, None
+            try:
+                self._results.put((generation, self.compute(inputs), None))
+            except Exception as e:
+                self._results.put((generation, None, e))
+
+    def _poll(self):
+        self._poll_id = None
+        try:
+            self._deliver()
+        finally: # Even if on_result raised, keep polling for the newest snapshot
+            if self._delivered < self._generation and not self._closed:
+                self._poll_id = self.widget.after(self.poll_ms, self._poll)
+
+    def _deliver(self):
+        latest = None
+        while True:
+            try:
+                latest = self._results.get_nowait()
+            except queue.Empty:
+                break
+        if latest is None:
+            return
+        generation, result, error = latest
+        first_change = self._submitted_at.pop(generation, None)
+        for stale in [g for g in self._submitted_at if g < generation]:
+            del self._submitted_at[stale]
+        if generation != self._generation: # Older results are stale by now
+            return
+        self._delivered = generation
+        if first_change is not None:
+            self.last_latency_ms = (time.perf_counter() - first_change) * 1000
+        if error is None:
+            try:
+                self.on_result(result)
+            except Exception as e: # e.g. a failed redraw: reported like a failed calculation
+                if self.on_error is None:
+                    raise
+                error = e
+        if error is not None and self.on_error:
+            self.on_error(error)
+
+    def close(self):
+        self._closed = True
+        for after_id in (self._debounce_id, self._poll_id):
+            if after_id is not None:
+                self.widget.after_cancel(after_id)
+        with self._cond:
+            self._cond.notify()
@@ -0,0 +1,151 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+from revim_bench import random_response
+
+# --- Load test for revim_server ---
+# Sends requests over `concurrency` keep-alive connections as fast as the service answers and
+# reports throughput and the p50/p99 latency of the answered requests, along with how many were
+# refused (503, back-pressure) and how many the service coalesced. A share of the requests
+# (--duplicates) repeat a handful of responses, as double submissions would. --spawn starts a
+# local service on a free port for the run and stops it afterwards.
+#
+#   python revim_loadtest.py --spawn --workers 4 --requests 5000 --concurrency 64
+#   python revim_loadtest.py --url http://127.0.0.1:8765 --batch 200 --requests 200
+
+
+async def _request(reader, writer, host, method, path, body=b""):
+    head = f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+    writer.write(head.encode("latin-1") + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+
+async def _client(host, port, bodies, path, counter, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while counter[0] < len(bodies):
+            body = bodies[counter[0]]
+            counter[0] += 1
+            start = time.perf_counter()
+            status, _ = await _request(reader, writer, host, "POST", path, body)
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == 200:
+                latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+async def _get_json(host, port, path):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        _, body = await _request(reader, writer, host, "GET", path)
+        return json.loads(body)
+    finally:
+        writer.close()
+
+
+def percentile(sorted_values, q):
+    # Nearest-rank percentile of an ascending list
+    if not sorted_values:
+        return float("nan")
+    return sorted_values[max(0, math.ceil(q / 100 * len(sorted_values)) - 1)]
+
+
+async def run(host, port, bodies, path, concurrency):
+    before = await _get_json(host, port, "/stats")
+    counter, latencies, statuses = [0], [], {}
+    start = time.perf_counter()
+    await asyncio.gather(*(_client(host, port, bodies, path, counter, latencies, statuses) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    after = await _get_json(host, port, "/stats")
+    return elapsed, sorted(latencies), statuses, after["coalesced"] - before["coalesced"], after
+
+
+def make_bodies(n, batch, duplicates, seed):
+    rng = random.Random(seed)
+    repeated = [random_response(rng, rng.choice(["en", "zh"])) for _ in range(8)]
+    bodies = []
+    for _ in range(n):
+        if batch:
+            payload = {"responses": [random_response(rng, rng.choice(["en", "zh"])) for _ in range(batch)]}
+        else:
+            values = rng.choice(repeated) if rng.random() < duplicates else random_response(rng, rng.choice(["en", "zh"]))
+            payload = {"response": values}
+        bodies.append(json.dumps(payload, ensure_ascii=False).encode())
+    return bodies
+
+
+def spawn(workers, pool):
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "revim_server.py")
+    command = [sys.executable, script, "--port", "0", "--pool", pool] + (["--workers", str(workers)] if workers else [])
+    process = subprocess.Popen(command, stderr=subprocess.PIPE, text=True)
+    line = process.stderr.readline()
+    if not line.startswith("Serving on "):
+        process.kill()
+        raise RuntimeError(f"Server did not start: {line}{process.stderr.read()}")
+    # Keep reading the server's stderr, so it never blocks on a full pipe; its messages pass through
+    threading.Thread(target=shutil.copyfileobj, args=(process.stderr, sys.stderr), daemon=True).start()
+    return process, line.split()[2]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the ReVIM HTTP scoring service.")
+    parser.add_argument("--url", default="http://127.0.0.1:8765")
+    parser.add_argument("--spawn", action="store_true", help="Start a local service for the run (ignores --url)")
+    parser.add_argument("--workers", type=int, help="With --spawn: the service's pool size")
+    parser.add_argument("--pool", choices=["process", "thread"], default="process", help="With --spawn: the service's pool")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32, help="Open connections (default: 32)")
+    parser.add_argument("--batch", type=int, default=0, help="Responses per /score/batch request (default: 0, single /score requests)")
+    parser.add_argument("--duplicates", type=float, default=0.2, help="Share of single requests repeating a few responses")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    if args.requests < 1 or args.concurrency < 1 or args.batch < 0:
+        parser.error("--requests and --concurrency must be positive")
+
+    process = None
+    url = args.url
+    if args.spawn:
+        process, url = spawn(args.workers, args.pool)
+    parts = urlsplit(url)
+    path = "/score/batch" if args.batch else "/score"
+    bodies = make_bodies(args.requests, args.batch, args.duplicates, args.seed)
+    try:
+        elapsed, latencies, statuses, coalesced, stats = asyncio.run(run(parts.hostname, parts.port or 80, bodies, path, args.concurrency))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    answered = statuses.get(200, 0)
+    print(f"{len(bodies)} requests to {path} over {args.concurrency} connections in {elapsed:.2f}s "
+          f"({stats['workers']} {stats['pool']} workers)")
+    print(f"throughput:  {answered / elapsed:,.0f} requests/s" + (f" ({answered * args.batch / elapsed:,.0f} responses/s)" if args.batch else ""))
+    print(f"latency:     p50 {percentile(latencies, 50) * 1e3:.1f} ms, p99 {percentile(latencies, 99) * 1e3:.1f} ms")
+    print(f"statuses:    " + ", ".join(f"{status}: {count}" for status, count in sorted(statuses.items())))
+    print(f"coalesced:   {coalesced}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
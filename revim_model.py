@@ -0,0 +1,702 @@
+import math
+from array import array
+from types import MappingProxyType
+
+from revim_schema import (
+    CATEGORY_LABELS_EN, CATEGORY_QUESTION_SLOTS, COST_CATEGORIES, FUTURE_SLOT, MODEL_CONSTANTS, SENSITIVITY_KEYS, SLOT_INDEX,
+    UTILITY_CATEGORIES, WEIGHT_SLOT, resolve_value, response_vector,
+)
+
+# --- ReVIM Model Calculation Logic ---
+# Shared by revim_evaluator_v1_en.py and revim_evaluator_v1_zh.py. Nothing here imports tkinter:
+# answers are read from a ResponseRecord, which can be filled from the GUI's Tk variables once
+# per calculation, from a plain dict, or from a CSV/JSON row. The record is converted into the
+# schema's dense vector once and the model indexes that vector (see revim_schema).
+
+# Part of every result cache key (revim_cache): change it with any change that alters results
+MODEL_VERSION = "1"
+
+# One .get() per variable; unreadable entries (e.g. an empty IntVar) count as missing,
+# the same as the calculator's lookup used to treat them.
+def read_tk_vars(tk_vars):
+    values = {}
+    for key, var in tk_vars.items():
+        try:
+            values[key] = var.get()
+        except Exception:
+            pass
+    return values
+
+
+class ResponseRecord:
+    __slots__ = ("values", "_vector")
+
+    def __init__(self, values=None):
+        self.values = dict(values) if values else {}
+        self._vector = None
+
+    @classmethod
+    def from_tk_vars(cls, tk_vars):
+        return cls(read_tk_vars(tk_vars))
+
+    @classmethod
+    def from_row(cls, row):
+        return cls({k: v for k, v in row.items() if v is not None})
+
+    def get(self, key, default=None):
+        return self.values.get(key, default)
+
+    def vector(self):
+        if self._vector is None:
+            self._vector = response_vector(self.values)
+        return self._vector
+
+    def __contains__(self, key):
+        return key in self.values
+
+    def __len__(self):
+        return len(self.values)
+
+
+FEEDBACK_TEXT = {
+    "en": {
+        "title": "**ReVIM Model Analysis Results**",
+        "nrupv": "Calculated Net Relationship Utility Present Value (NRUPV): {nrupv:.2f}",
+        "horizon": "  (Calculated based on discounting expected utility and costs over the next {years:.1f} years)",
+        "initial": "  (Initial Total Utility (Weighted): {u:.2f}, Initial Total Cost (Weighted): {c:.2f})",
+        "ocau": "Calculated Opportunity Cost / Alternative Utility (OCAU): {ocau:.2f}",
+        "ocau_detail": "  (Estimated Utility in Single State: {single:.2f}, Estimated Utility with Other Potential Partners: {alt:.2f})",
+        "sunk": "Sunk Cost Fallacy Adjustment: {sunk:.2f}",
+        "sunk_detail": "  (A higher value indicates you may be more influenced by sunk costs, raising the decision 'threshold' in the model)",
+        "threshold_title": "**Decision Threshold Comparison:**",
+        "threshold_parts": "  NRUPV ({nrupv:.2f})  vs  (OCAU ({ocau:.2f}) + Sunk Cost Adjustment ({sunk:.2f}))",
+        "threshold": "  NRUPV ({nrupv:.2f})  vs  Decision Threshold ({threshold:.2f})",
+        "worth": "**Conclusion: Based on the ReVIM model and your input, this relationship currently appears to be [WORTH CONTINUING].**",
+        "worth_note": "\n  Note: Although worth continuing, the advantage is small. It is recommended to focus on weak areas in the relationship and actively improve them.",
+        "not_worth": "**Conclusion: Based on the ReVIM model and your input, this relationship currently appears to be [POSSIBLY NOT WORTH CONTINUING, or requires significant improvement].**",
+        "not_worth_note": "\n  Note: Although not recommended to continue at present, the difference is small. If both parties have a strong desire, re-evaluation is possible after targeted improvement of key issues.",
+        "disclaimer": "\n\n*Disclaimer: This result is based purely on theoretical model calculation and should not replace your personal judgment or professional advice.*",
+    },
+    "zh": {
+        "title": "**ReVIM 模型分析结果**",
+        "nrupv": "计算的净关系效用现值 (NRUPV): {nrupv:.2f}",
+        "horizon": "  (基于对未来 {years:.1f} 年的预期效用与成本进行折现计算)",
+        "initial": "  (首期总效用(加权): {u:.2f}, 首期总成本(加权): {c:.2f})",
+        "ocau": "计算的机会成本/替代选项效用 (OCAU): {ocau:.2f}",
+        "ocau_detail": "  (单身状态预估效用: {single:.2f}, 其他潜在伴侣预估效用: {alt:.2f})",
+        "sunk": "沉没成本谬误调整项: {sunk:.2f}",
+        "sunk_detail": "  (此数值越高，表明您可能受沉没成本影响越大，模型会提高决策的“门槛”)",
+        "threshold_title": "**决策阈值比较:**",
+        "threshold_parts": "  NRUPV ({nrupv:.2f})  vs  (OCAU ({ocau:.2f}) + 沉没成本调整 ({sunk:.2f}))",
+        "threshold": "  NRUPV ({nrupv:.2f})  vs  决策阈值 ({threshold:.2f})",
+        "worth": "**结论：根据ReVIM模型及您的输入，此段恋爱关系目前看来【值得继续】。**",
+        "worth_note": "\n  注意：尽管值得继续，但优势较小。建议关注关系中的薄弱环节并积极改善。",
+        "not_worth": "**结论：根据ReVIM模型及您的输入，此段恋爱关系目前看来【可能不值得继续，或需重大改善】。**",
+        "not_worth_note": "\n  注意：尽管目前不建议继续，但差距较小。若双方有强烈意愿，针对性改善关键问题后可重新评估。",
+        "disclaimer": "\n\n*免责声明：本结果仅为理论模型计算，不能替代您的个人判断和专业咨询。*",
+    },
+}
+
+
+SERIES_NAMES = ("time_periods", "U_t_series", "C_t_series", "Net_U_t_series", "r_t_series",
+                "discounted_Net_U_t_series", "cumulative_nrupv_series")
+
+
+# The localized text report of a result (lang: "en" or "zh")
+def render_report(result, lang="en"):
+    text = FEEDBACK_TEXT.get(lang, FEEDBACK_TEXT["en"])
+    rule = "--------------------------------------------------\n"
+    nrupv, threshold = result.nrupv, result.decision_threshold
+    parts = [
+        text["title"], "\n", rule,
+        text["nrupv"].format(nrupv=nrupv), "\n",
+        text["horizon"].format(years=result.T_realistic), "\n",
+        text["initial"].format(u=sum(result.initial_utility_breakdown.values()), c=sum(result.initial_cost_breakdown.values())), "\n",
+        rule,
+        text["ocau"].format(ocau=result.ocau), "\n",
+        text["ocau_detail"].format(single=result.u_single, alt=result.e_u_alt), "\n",
+        rule,
+        text["sunk"].format(sunk=result.sunk_cost_adj), "\n",
+        text["sunk_detail"], "\n",
+        rule,
+        text["threshold_title"], "\n",
+        text["threshold_parts"].format(nrupv=nrupv, ocau=result.ocau, sunk=result.sunk_cost_adj), "\n",
+        text["threshold"].format(nrupv=nrupv, threshold=threshold), "\n",
+        rule,
+    ]
+    # A small margin either way gets a note
+    close = abs(threshold) > 1e-6 and abs(nrupv - threshold) < abs(threshold) * 0.15
+    if result.is_worth_continuing:
+        parts.append(text["worth"])
+        if close: parts.append(text["worth_note"])
+    else:
+        parts.append(text["not_worth"])
+        if close: parts.append(text["not_worth_note"])
+    parts.append(text["disclaimer"])
+    return "".join(parts)
+
+
+class PeriodSeries:
+    # A read-only per-period series of floats, kept in an array("d") (8 bytes a value). A sequence
+    # (len, indexing, iteration, ==); numpy and matplotlib read it through __array__ as a
+    # read-only array, and tolist() gives plain floats for JSON.
+    __slots__ = ("_values",)
+
+    def __init__(self, values=()):
+        self._values = values if isinstance(values, array) else array("d", values)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return PeriodSeries(self._values[index])
+        return self._values[index]
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __eq__(self, other):
+        if isinstance(other, PeriodSeries):
+            return self._values == other._values
+        return NotImplemented
+
+    __hash__ = None
+
+    def __array__(self, dtype=None, copy=None):
+        import numpy as np # Only when a consumer asks for an array, so the GUIs can import this module without numpy
+        values = np.frombuffer(memoryview(self._values).toreadonly(), dtype=float)
+        if dtype is not None:
+            return values.astype(dtype)
+        return values.copy() if copy else values
+
+    def __repr__(self):
+        return f"PeriodSeries({self._values.tolist()!r})"
+
+    def tolist(self):
+        return self._values.tolist()
+
+
+class _ResultSeries:
+    # A per-period series of ReVIMResult: a PeriodSeries (None for results evaluated without
+    # series). Results of IncrementalCalculator build their series on first access.
+    def __set_name__(self, owner, name):
+        self.index = SERIES_NAMES.index(name)
+
+    def __get__(self, result, owner=None):
+        if result is None:
+            return self
+        series = result._series
+        if callable(series):
+            series = tuple(PeriodSeries(values) for values in series())
+            object.__setattr__(result, "_series", series)
+        return None if series is None else series[self.index]
+
+
+class ReVIMResult:
+    # What evaluate() returns. Immutable; the breakdowns are read-only mappings (category label in
+    # the calculator's language -> weighted value at t = 0) and the series PeriodSeries.
+    # The text report is rendered on request only (report()), in the result's language or another.
+    __slots__ = ("nrupv", "T_realistic", "ocau", "u_single", "e_u_alt", "sunk_cost_adj", "is_worth_continuing",
+                 "initial_utility_breakdown", "initial_cost_breakdown", "lang", "_series", "_reports")
+
+    time_periods = _ResultSeries()
+    U_t_series = _ResultSeries()
+    C_t_series = _ResultSeries()
+    Net_U_t_series = _ResultSeries()
+    r_t_series = _ResultSeries()
+    discounted_Net_U_t_series = _ResultSeries()
+    cumulative_nrupv_series = _ResultSeries()
+
+    # series: the SERIES_NAMES sequences, a function returning them, or None (scalar result)
+    def __init__(self, nrupv, T_realistic, ocau, u_single, e_u_alt, sunk_cost_adj, utility_breakdown, cost_breakdown, lang="en", series=None):
+        init = object.__setattr__
+        init(self, "nrupv", nrupv)
+        init(self, "T_realistic", T_realistic)
+        init(self, "ocau", ocau)
+        init(self, "u_single", u_single)
+        init(self, "e_u_alt", e_u_alt)
+        init(self, "sunk_cost_adj", sunk_cost_adj)
+        init(self, "is_worth_continuing", bool(nrupv > (ocau + sunk_cost_adj)))
+        init(self, "initial_utility_breakdown", MappingProxyType(dict(utility_breakdown)))
+        init(self, "initial_cost_breakdown", MappingProxyType(dict(cost_breakdown)))
+        init(self, "lang", lang)
+        init(self, "_series", series if series is None or callable(series) else
+             tuple(PeriodSeries(values) for values in series))
+        init(self, "_reports", {})
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __repr__(self):
+        return (f"ReVIMResult(nrupv={self.nrupv:.4f}, ocau={self.ocau:.4f}, sunk_cost_adj={self.sunk_cost_adj:.4f}, "
+                f"is_worth_continuing={self.is_worth_continuing})")
+
+    def __reduce__(self):
+        return (ReVIMResult.from_dict, (self.as_dict(series=True),))
+
+    @property
+    def decision_threshold(self):
+        return self.ocau + self.sunk_cost_adj
+
+    @property
+    def decision_margin(self):
+        return self.nrupv - self.decision_threshold
+
+    @property
+    def has_series(self):
+        return self._series is not None
+
+    # Text report in lang (default: the language the result was evaluated in), rendered once per language
+    def report(self, lang=None):
+        lang = lang or self.lang
+        text = self._reports.get(lang)
+        if text is None:
+            text = self._reports[lang] = render_report(self, lang)
+        return text
+
+    # Plain dict of the numbers (and with series=True the series, as lists), for JSON
+    def as_dict(self, series=False):
+        out = {
+            "nrupv": self.nrupv, "T_realistic": self.T_realistic, "ocau": self.ocau, "u_single": self.u_single,
+            "e_u_alt": self.e_u_alt, "sunk_cost_adj": self.sunk_cost_adj, "is_worth_continuing": self.is_worth_continuing,
+            "initial_utility_breakdown": dict(self.initial_utility_breakdown),
+            "initial_cost_breakdown": dict(self.initial_cost_breakdown), "lang": self.lang,
+        }
+        if series and self.has_series:
+            for name in SERIES_NAMES:
+                out[name] = getattr(self, name).tolist()
+        return out
+
+    @classmethod
+    def from_dict(cls, d):
+        series = [d[name] for name in SERIES_NAMES] if SERIES_NAMES[0] in d else None
+        return cls(d["nrupv"], d["T_realistic"], d["ocau"], d["u_single"], d["e_u_alt"], d["sunk_cost_adj"],
+                   d["initial_utility_breakdown"], d["initial_cost_breakdown"], d.get("lang", "en"), series)
+
+
+U_LAW_POSITION = [cat_key for cat_key, _, _ in UTILITY_CATEGORIES].index("U_law")
+
+
+# Sum the coefficients of categories growing at the same rate: [coefficient, per-step factor, running power]
+def growth_groups(terms, periods_per_year):
+    groups = {}
+    for _, coefficient, growth, times in terms:
+        groups[growth] = groups.get(growth, 0) + coefficient * times
+    p = periods_per_year
+    return [[coefficient, growth if p == 1 else growth ** (1.0 / p), 1.0] for growth, coefficient in groups.items()]
+
+
+class ReVIMCalculator:
+    profiler = None
+    profile_run = None # The evaluate() call being profiled (revim_profile.ProfileRun), if any
+    keep_series = True # False while evaluate(series=False) runs
+
+    def __init__(self, response, sensitivity=None, lang="en", periods_per_year=1, profiler=None):
+        # response: ResponseRecord (or a plain dict of answers); sensitivity: dict of slider factors;
+        # periods_per_year: 1 (annual), 4 (quarterly) or 12 (monthly), see revim_schema.PERIODS_PER_YEAR;
+        # profiler: revim_profile.Profiler recording the stages of every evaluate(), or None
+        self.data = response if isinstance(response, ResponseRecord) else ResponseRecord(response)
+        self.sens = sensitivity if sensitivity is not None else {}
+        self.lang = lang
+        self.periods_per_year = periods_per_year
+        self.profiler = profiler
+        self.x = self.data.vector() # Dense answer vector indexed by schema slot
+
+    def label(self, label_zh):
+        return CATEGORY_LABELS_EN.get(label_zh, label_zh) if self.lang == "en" else label_zh
+
+    def get_val(self, key, default_val=0, is_future_expect=False, is_duration=False, is_single_satisfaction=False, is_recovery_time=False):
+        # Schema answers come from the encoded vector (N/A questions are NaN there); anything
+        # else is resolved from the raw record.
+        slot = SLOT_INDEX.get(key)
+        if slot is not None:
+            val = self.x[slot]
+            return "N/A" if val != val else val
+        kind = ("future" if is_future_expect else "duration" if is_duration else
+                "single" if is_single_satisfaction else "recovery" if is_recovery_time else None)
+        try:
+            return resolve_value(self.data.get(key), kind, default_val)
+        except Exception:
+            return default_val
+
+    def get_sens_val(self, key, default_val=1.0):
+        try:
+            val = self.sens.get(key)
+            return val if val is not None else default_val
+        except Exception:
+            return default_val
+
+    # Normalized base score x weight x realization adjustment of one category, and its annual
+    # growth factor. Neither depends on t: the category's value in year t is coefficient * growth**t.
+    def category_term(self, cat_key, slots):
+        x = self.x
+        scores = [x[slot] for slot in slots if x[slot] == x[slot]] # N/A answers are NaN
+        if not scores: return 0, 1.0
+
+        avg_base_score = sum(scores) / len(scores)
+        normalized_base_score = avg_base_score - 4
+
+        growth_rate = x[FUTURE_SLOT[cat_key]]
+        optimism_adj = self.get_sens_val("future_projection_optimism_adj", 1.0)
+        effective_growth_rate = growth_rate * optimism_adj
+
+        weight = x[WEIGHT_SLOT[cat_key]] / 7.0
+        realization_prob_adj = self.get_sens_val("realization_prob_adj", 1.0)
+        return normalized_base_score * weight * realization_prob_adj, 1 + effective_growth_rate
+
+    def calculate_category_value_at_t(self, base_score_key_prefix, num_q, future_expect_key, weight_key, t, is_cost=False):
+        # NA handling is done by adjusting num_q before calling this function for U_bio.
+        # C_geo is handled separately.
+        coefficient, growth = self.category_term(base_score_key_prefix, CATEGORY_QUESTION_SLOTS[base_score_key_prefix][:num_q])
+        return coefficient * growth ** t
+
+    # (label, coefficient, annual growth factor, times counted) of one utility or cost category
+    def category_entry(self, cat_key, label):
+        x = self.x
+        slots = CATEGORY_QUESTION_SLOTS.get(cat_key)
+        times = 1
+        if cat_key == "U_law":
+            if x[SLOT_INDEX["U_law_1_na"]] == 1:
+                slots = [SLOT_INDEX["U_law_LAW.2"]] # Only U_law_LAW.2 is scored
+            else:
+                times = 2 # U_law is added once inside the category loop and once more after it
+        elif cat_key == "U_bio" and x[SLOT_INDEX["U_bio_5_na"]] == 1: # Specific NA key for U_bio_5
+            slots = slots[:4]
+        elif cat_key == "C_geo":
+            slots = [SLOT_INDEX["C_geo_GEO.2"]] if x[SLOT_INDEX["C_geo_1_na"]] == 1 else [SLOT_INDEX["C_geo_GEO.1"], SLOT_INDEX["C_geo_GEO.2"]]
+        return (label, *self.category_term(cat_key, slots), times)
+
+    # category_entry() of every utility and cost category, in the order the breakdowns list them:
+    # an N/A first legal question moves U_law (scored on U_law_LAW.2 only) after the others.
+    # entry(cat_key, label) replaces category_entry, e.g. to read memoized entries.
+    def category_terms(self, entry=None):
+        entry = entry or self.category_entry
+        utility_terms = [entry(cat_key, label) for cat_key, label, _ in UTILITY_CATEGORIES if cat_key != "U_law"]
+        u_law = entry("U_law", "法律承诺")
+        if u_law[3] == 1:
+            utility_terms.append(u_law)
+        else:
+            utility_terms.insert(U_LAW_POSITION, u_law)
+        cost_terms = [entry(cat_key, label) for cat_key, label, _ in COST_CATEGORIES]
+        return utility_terms, cost_terms
+
+    # Annual discount rate of each of the T periods. Depends only on the risk, certainty,
+    # adaptability and conflict answers and the discount sliders, not on any category.
+    def discount_rates(self, T):
+        x = self.x
+        p = self.periods_per_year
+        const = MODEL_CONSTANTS
+        r_base_adj = self.get_sens_val("base_discount_rate_adj", 1.0)
+        r_base = const["base_discount_rate"] * r_base_adj
+        risk_perception_adj = self.get_sens_val("overall_risk_perception_adj", 1.0)
+        r_risk_initial_val = x[SLOT_INDEX["Q_risk_breakup_A_1"]]
+        r_risk_initial = (r_risk_initial_val - 1) * const["risk_step"] * risk_perception_adj
+
+        r_certainty_future_val = x[SLOT_INDEX["Q_certainty_future_A_3"]]
+        r_uncertainty_initial = (7 - r_certainty_future_val) * const["risk_step"] * risk_perception_adj
+
+        learning_adapt_solve_val = x[SLOT_INDEX["Q_adapt_solve_B_3"]]
+        learning_adapt_stress_val = x[SLOT_INDEX["Q_adapt_stress_B_4"]]
+        learning_adapt_learn_hist_val = x[SLOT_INDEX["Q_adapt_learn_hist_B_5"]]
+        learning_adapt_avg = (learning_adapt_solve_val + learning_adapt_stress_val + learning_adapt_learn_hist_val) / 3.0
+        r_learning_initial_effect = (learning_adapt_avg - 4) * const["learning_step"]
+        conflict_patterns_stable = x[SLOT_INDEX["Q_conflict_patterns_exist_A_2"]] == 0
+
+        stability_decay, instability_growth = const["stability_decay"], const["instability_growth"]
+        uncertainty_decay, learning_decay = const["uncertainty_decay"], const["learning_decay"]
+        risk_floor, uncertainty_floor, learning_floor = const["risk_floor"], const["uncertainty_floor"], const["learning_floor"]
+        min_discount_rate = const["min_discount_rate"]
+
+        rates = []
+        for k in range(T):
+            t = k / p # Years since the start
+            stability_factor = (1 - stability_decay * t) if conflict_patterns_stable else (1 + instability_growth * t)
+            r_risk_t = r_risk_initial * max(risk_floor, stability_factor)
+            r_uncertainty_t = r_uncertainty_initial * max(uncertainty_floor, (1 - uncertainty_decay * t))
+            r_learning_t_effect = r_learning_initial_effect * max(learning_floor, (1 - learning_decay * t))
+            r_t_period = r_base + r_risk_t + r_uncertainty_t - r_learning_t_effect
+            rates.append(max(min_discount_rate, r_t_period))
+        return rates
+
+    # Synergy/Conflict Factors, from the t=0 values; they add a constant to every period.
+    # Communication amplifies psychological utility (max 10% boost if comm is at max (3)),
+    # philosophical cost amplifies psychological cost.
+    def synergy_terms(self, utility_terms, cost_terms):
+        x = self.x
+        utility_t0 = {label: coefficient for label, coefficient, _, _ in utility_terms}
+        cost_t0 = {label: coefficient for label, coefficient, _, _ in cost_terms}
+        u_psych_val_t0 = utility_t0.get("心理", 0)
+        u_comm_val_t0 = utility_t0.get("沟通传播", 0)
+        synergy_comm_psych_factor = 1.0
+        if u_comm_val_t0 > 0:
+            synergy_comm_psych_factor = 1 + MODEL_CONSTANTS["synergy_boost"] * (u_comm_val_t0 / ((x[WEIGHT_SLOT["U_comm"]] / 7.0) * 3))
+        c_philo_val_t0 = cost_t0.get("哲学精神", 0)
+        c_psych_val_t0 = cost_t0.get("心理", 0)
+        conflict_philo_psych_factor = 1.0
+        if c_philo_val_t0 > 0:
+            conflict_philo_psych_factor = 1 + MODEL_CONSTANTS["synergy_boost"] * (c_philo_val_t0 / ((x[WEIGHT_SLOT["C_philo"]] / 7.0) * 3))
+        return u_psych_val_t0 * (synergy_comm_psych_factor - 1.0), c_psych_val_t0 * (conflict_philo_psych_factor - 1.0)
+
+    def fill_breakdowns(self, utility_terms, cost_terms):
+        self.initial_utility_breakdown = {self.label(label): coefficient for label, coefficient, _, _ in utility_terms}
+        self.initial_cost_breakdown = {self.label(label): coefficient for label, coefficient, _, _ in cost_terms}
+
+    # NRUPV over T periods, from the category terms, the synergy constants and the discount
+    # rates, and with keep_series the per-period series (SERIES_NAMES order; None without).
+    # Categories sharing a growth factor are summed and their growth is carried forward as a
+    # running product, so each step costs a handful of multiplications however many categories
+    # there are. Series values are per period (annual flows divided by periods_per_year) and
+    # time_periods are in years.
+    def period_series(self, T, utility_terms, cost_terms, u_synergy, c_conflict, rates, keep_series=True):
+        p = self.periods_per_year
+        U_t_series = []
+        C_t_series = []
+        Net_U_t_series = []
+        discounted_Net_U_t_series = []
+        cumulative_nrupv_series = []
+        u_groups = growth_groups(utility_terms, p)
+        c_groups = growth_groups(cost_terms, p)
+
+        nrupv = 0
+        for k in range(T):
+            current_total_utility = u_synergy
+            for group in u_groups:
+                current_total_utility += group[0] * group[2]
+                group[2] *= group[1]
+            current_total_cost = c_conflict
+            for group in c_groups:
+                current_total_cost += group[0] * group[2]
+                group[2] *= group[1]
+            current_total_utility /= p
+            current_total_cost /= p
+            net_utility_this_period = current_total_utility - current_total_cost
+
+            # Each period is discounted at its own annual rate over the whole span to its end
+            discounted_net_utility = net_utility_this_period / ((1 + rates[k]) ** ((k + 1) / p))
+            nrupv += discounted_net_utility
+            if keep_series:
+                U_t_series.append(current_total_utility)
+                C_t_series.append(current_total_cost)
+                Net_U_t_series.append(net_utility_this_period)
+                discounted_Net_U_t_series.append(discounted_net_utility)
+                cumulative_nrupv_series.append(nrupv)
+        if not keep_series:
+            return nrupv, None
+        time_periods = [k / p for k in range(T)] if p != 1 else list(range(T))
+        return nrupv, (time_periods, U_t_series, C_t_series, Net_U_t_series, list(rates), discounted_Net_U_t_series, cumulative_nrupv_series)
+
+    def calculate_nrupv_components_over_time(self):
+        # The horizon is split into periods_per_year steps per year (1 = the original annual model)
+        T_realistic = self.x[SLOT_INDEX["Q_exp_duration_realistic"]]
+        T = int(math.ceil(T_realistic * self.periods_per_year))
+        run = self.profile_run
+        rates = self.discount_rates(T)
+        if run is not None:
+            run.lap("discount_rates")
+            run.count("periods", T)
+        if T == 0:
+            self.fill_breakdowns([], []) # Nothing is scored, breakdowns stay empty
+            self.series = self.period_series(0, [], [], 0, 0, rates, self.keep_series)[1]
+            return 0, T_realistic
+
+        utility_terms, cost_terms = self.category_terms()
+        self.fill_breakdowns(utility_terms, cost_terms)
+        u_synergy, c_conflict = self.synergy_terms(utility_terms, cost_terms)
+        if run is not None: run.lap("category_terms")
+        nrupv, self.series = self.period_series(T, utility_terms, cost_terms, u_synergy, c_conflict, rates, self.keep_series)
+        if run is not None: run.lap("periods")
+        return nrupv, T_realistic
+
+    def calculate_ocau(self):
+        x = self.x
+        u_single_satisfaction = x[SLOT_INDEX["Q_single_satisfaction_1"]]
+        u_single = u_single_satisfaction
+
+        alt_partner_likelihood_val = x[SLOT_INDEX["Q_alt_partner_likelihood_4"]]
+        alt_partner_likelihood = alt_partner_likelihood_val / 7.0
+
+        initial_gross_U = sum(self.initial_utility_breakdown.values()) if hasattr(self, 'initial_utility_breakdown') and self.initial_utility_breakdown else 5
+        e_u_alternative = alt_partner_likelihood * (initial_gross_U * MODEL_CONSTANTS["alt_partner_factor"])
+
+        ocau = max(u_single, e_u_alternative)
+        return ocau, u_single, e_u_alternative
+
+    def calculate_sunk_cost_adjustment(self):
+        sunk_influence_val = self.x[SLOT_INDEX["Q_sunk_cost_influence_4"]]
+        sunk_worry_val = self.x[SLOT_INDEX["Q_sunk_cost_worry_5"]]
+
+        adjustment_factor = ((sunk_influence_val - 1) + (sunk_worry_val - 1)) / 12.0
+        max_possible_adjustment = MODEL_CONSTANTS["sunk_cost_max_adjustment"]
+        sunk_cost_adj = adjustment_factor * max_possible_adjustment
+        return sunk_cost_adj
+
+    # The model's result for these answers, as a ReVIMResult. series=False leaves the per-period
+    # series out (scalar results, e.g. for batch use); the text report is only rendered when
+    # asked for (result.report()).
+    def evaluate(self, series=True):
+        # With a profiler, each stage is timed (see revim_profile); a failed evaluation is not recorded
+        run = self.profile_run = self.profiler.start("evaluate") if self.profiler is not None else None
+        if run is not None: run.count_calls(self, "get_val", "get_sens_val")
+        self.keep_series = series
+        nrupv, T_realistic = self.calculate_nrupv_components_over_time()
+        ocau, u_single, e_u_alt = self.calculate_ocau()
+        if run is not None: run.lap("ocau")
+        sunk_cost_adj = self.calculate_sunk_cost_adjustment()
+        if run is not None: run.lap("sunk_cost")
+
+        result = ReVIMResult(nrupv, T_realistic, ocau, u_single, e_u_alt, sunk_cost_adj, self.initial_utility_breakdown,
+                             self.initial_cost_breakdown, self.lang, self.series if series else None)
+        if run is not None:
+            run.lap("result")
+            self.profile_run = None
+            run.finish()
+        return result
+
+
+# --- Incremental evaluation ---
+# Successive evaluations of slightly different answers (the GUIs' live mode: one slider moved at
+# a time) share an EvaluationCache. It keeps each category's entry (coefficient, growth, times)
+# keyed by the inputs it reads, the discount rates keyed by theirs, and for every growth factor
+# the discounted sum of its growth over the horizon. An update recomputes only what the changed
+# answers feed:
+#
+#   a category's answers, N/A flags, future expectation or weight -> that category's entry
+#   optimism / realization sliders                                -> every category's entry
+#   risk, certainty, adaptability, conflict answers, rate sliders -> the discount rates (and the
+#   expected duration, or the period resolution)                     growth sums
+#
+# NRUPV is then the sum over categories of coefficient x times x growth sum, plus the synergy
+# constants x the growth sum at 1.0, so an edit that does not touch the discount inputs costs
+# the same whatever the horizon. The per-period series are only built when first read (the
+# charts), from the same terms, and match ReVIMCalculator's; NRUPV agrees with it to rounding.
+
+def _category_input_slots():
+    slots = {}
+    for cat_key, _, _ in UTILITY_CATEGORIES + COST_CATEGORIES:
+        slots[cat_key] = set(CATEGORY_QUESTION_SLOTS.get(cat_key, ())) | {FUTURE_SLOT[cat_key], WEIGHT_SLOT[cat_key]}
+    slots["U_bio"].add(SLOT_INDEX["U_bio_5_na"])
+    slots["U_law"].update(SLOT_INDEX[k] for k in ("U_law_LAW.2", "U_law_1_na"))
+    slots["C_geo"].update(SLOT_INDEX[k] for k in ("C_geo_GEO.1", "C_geo_GEO.2", "C_geo_1_na"))
+    return slots
+
+
+CATEGORY_INPUT_SLOTS = _category_input_slots()
+SLOT_CATEGORIES = {}
+for _cat_key, _slots in CATEGORY_INPUT_SLOTS.items():
+    for _slot in _slots:
+        SLOT_CATEGORIES.setdefault(_slot, []).append(_cat_key)
+CATEGORY_LABELS = {cat_key: label for cat_key, label, _ in UTILITY_CATEGORIES + COST_CATEGORIES}
+DISCOUNT_INPUT_SLOTS = frozenset(SLOT_INDEX[k] for k in (
+    "Q_risk_breakup_A_1", "Q_certainty_future_A_3", "Q_adapt_solve_B_3", "Q_adapt_stress_B_4",
+    "Q_adapt_learn_hist_B_5", "Q_conflict_patterns_exist_A_2", "Q_exp_duration_realistic"))
+CATEGORY_SENSITIVITY_KEYS = ("future_projection_optimism_adj", "realization_prob_adj")
+
+
+class EvaluationCache:
+    # Not thread-safe: keep one per thread (the GUIs use one for the live-mode worker)
+    def __init__(self):
+        self.x = None # Answer vector of the last update
+        self.sens = None # Effective slider values of the last update, in SENSITIVITY_KEYS order
+        self.entries = {} # cat_key -> category_entry()
+        self.horizon = None # (periods, periods_per_year) the rates were computed for
+        self.rates = []
+        self.discounts = [] # (1 + r_k) ** ((k + 1) / periods_per_year)
+        self.growth_sums = {} # Annual growth factor -> see growth_sum()
+        self.recomputed = set() # What the last update recomputed: category keys and/or "discount"
+
+    def update(self, calculator, T):
+        x = calculator.x
+        p = calculator.periods_per_year
+        sens = [calculator.get_sens_val(key, 1.0) for key in SENSITIVITY_KEYS]
+        recomputed = set()
+        if self.x is None:
+            dirty = set(CATEGORY_INPUT_SLOTS)
+            discount_dirty = True
+        else:
+            changed = [i for i, (new, old) in enumerate(zip(x, self.x)) if new != old and (new == new or old == old)] # NaN == NaN here
+            dirty = {cat_key for slot in changed for cat_key in SLOT_CATEGORIES.get(slot, ())}
+            discount_dirty = (T, p) != self.horizon or any(slot in DISCOUNT_INPUT_SLOTS for slot in changed)
+            for i, key in enumerate(SENSITIVITY_KEYS):
+                if sens[i] != self.sens[i]:
+                    if key in CATEGORY_SENSITIVITY_KEYS:
+                        dirty = set(CATEGORY_INPUT_SLOTS)
+                    else:
+                        discount_dirty = True
+
+        for cat_key in dirty:
+            self.entries[cat_key] = calculator.category_entry(cat_key, CATEGORY_LABELS[cat_key])
+        recomputed.update(dirty)
+        if discount_dirty:
+            # New lists rather than in-place updates: earlier results may still hold the old ones
+            self.rates = calculator.discount_rates(T)
+            self.discounts = [(1 + r) ** ((k + 1) / p) for k, r in enumerate(self.rates)]
+            self.growth_sums = {}
+            self.horizon = (T, p)
+            recomputed.add("discount")
+        self.x = list(x)
+        self.sens = sens
+        self.recomputed = recomputed
+
+    def entry(self, cat_key, label):
+        return self.entries[cat_key]
+
+    # Present value of one unit of annual flow growing by `growth` a year, over the horizon
+    def growth_sum(self, growth):
+        total = self.growth_sums.get(growth)
+        if total is None:
+            p = self.horizon[1]
+            step = growth if p == 1 else growth ** (1.0 / p)
+            power = 1.0
+            total = 0.0
+            for discount in self.discounts:
+                total += power / discount
+                power *= step
+            total /= p
+            self.growth_sums[growth] = total
+        return total
+
+
+class IncrementalCalculator(ReVIMCalculator):
+    # cache: the EvaluationCache shared with the previous evaluations
+    def __init__(self, response, sensitivity=None, lang="en", periods_per_year=1, cache=None, profiler=None):
+        super().__init__(response, sensitivity, lang, periods_per_year, profiler)
+        self.cache = cache if cache is not None else EvaluationCache()
+
+    def calculate_nrupv_components_over_time(self):
+        T_realistic = self.x[SLOT_INDEX["Q_exp_duration_realistic"]]
+        T = int(math.ceil(T_realistic * self.periods_per_year))
+        cache = self.cache
+        run = self.profile_run
+        cache.update(self, T)
+        if run is not None:
+            run.lap("cache_update")
+            run.count("periods", T)
+            run.count("recomputed", len(cache.recomputed))
+        if T == 0:
+            self.fill_breakdowns([], []) # Nothing is scored, breakdowns stay empty
+            self.series = self.lazy_series(0, [], [], 0, 0, cache.rates)
+            return 0, T_realistic
+
+        utility_terms, cost_terms = self.category_terms(cache.entry)
+        self.fill_breakdowns(utility_terms, cost_terms)
+        u_synergy, c_conflict = self.synergy_terms(utility_terms, cost_terms)
+        self.series = self.lazy_series(T, utility_terms, cost_terms, u_synergy, c_conflict, cache.rates)
+        if run is not None: run.lap("category_terms")
+
+        nrupv = (u_synergy - c_conflict) * cache.growth_sum(1.0)
+        for _, coefficient, growth, times in utility_terms:
+            nrupv += coefficient * times * cache.growth_sum(growth)
+        for _, coefficient, growth, times in cost_terms:
+            nrupv -= coefficient * times * cache.growth_sum(growth)
+        if run is not None: run.lap("growth_sums")
+        return nrupv, T_realistic
+
+    # The per-period series are only built when the result's series are first read (the charts)
+    def lazy_series(self, *inputs):
+        if not self.keep_series:
+            return None
+        return lambda: self.period_series(*inputs)[1]
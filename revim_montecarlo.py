@@ -0,0 +1,163 @@
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from revim_batch import encode_response, evaluate_batch
+from revim_schema import OPTION_MAPS, SENSITIVITY_KEYS, SLOTS
+
+# --- Monte Carlo uncertainty engine ---
+# Treats a response's answers as noisy self-reports: each sample jitters the Likert answers
+# (and optionally the importance weights) by a rounded normal step clipped to 1-7, and moves
+# future-expectation choices to a neighbouring option with some probability. All samples are
+# scored with the batch engine.
+#
+# Samples are drawn in fixed-size chunks, each from its own child of one SeedSequence, so a
+# given seed gives the same samples whether the chunks run in this process or spread across
+# a process pool.
+#
+#   python revim_montecarlo.py response.json --samples 50000 --workers 4 --seed 1
+
+LIKERT_SLOTS = np.array([i for i, (_, kind, _) in enumerate(SLOTS) if kind in ("likert", "number")])
+WEIGHT_SLOTS = np.array([i for i, (_, kind, _) in enumerate(SLOTS) if kind == "weight"])
+FUTURE_SLOTS = np.array([i for i, (_, kind, _) in enumerate(SLOTS) if kind == "future"])
+# Future-expectation options ordered from most negative to most positive
+FUTURE_LEVELS = np.array(sorted(set(OPTION_MAPS["en"]["future"][0].values())), dtype=float)
+
+
+class NoiseModel:
+    # likert_sd: s.d. of the normal step added to every 1-7 answer before rounding (0 = exact)
+    # weight_sd: the same for the importance weights
+    # future_shift_prob: probability that a future-expectation choice moves one option up or down
+    def __init__(self, likert_sd=0.5, weight_sd=0.0, future_shift_prob=0.2):
+        self.likert_sd = likert_sd
+        self.weight_sd = weight_sd
+        self.future_shift_prob = future_shift_prob
+
+    def as_dict(self):
+        return {"likert_sd": self.likert_sd, "weight_sd": self.weight_sd, "future_shift_prob": self.future_shift_prob}
+
+
+def _jitter_scale(X, cols, sd, rng):
+    if sd <= 0 or len(cols) == 0:
+        return
+    block = X[:, cols]
+    answered = ~np.isnan(block) # N/A answers stay N/A
+    jittered = np.clip(np.rint(block + rng.normal(0.0, sd, block.shape)), 1, 7)
+    X[:, cols] = np.where(answered, jittered, block)
+
+
+def sample_responses(x, n, noise, rng):
+    X = np.array(np.broadcast_to(x, (n, len(x))))
+    _jitter_scale(X, LIKERT_SLOTS, noise.likert_sd, rng)
+    _jitter_scale(X, WEIGHT_SLOTS, noise.weight_sd, rng)
+    if noise.future_shift_prob > 0:
+        level = np.abs(X[:, FUTURE_SLOTS, None] - FUTURE_LEVELS).argmin(axis=2)
+        shift = np.where(rng.random(level.shape) < noise.future_shift_prob, rng.choice([-1, 1], level.shape), 0)
+        X[:, FUTURE_SLOTS] = FUTURE_LEVELS[np.clip(level + shift, 0, len(FUTURE_LEVELS) - 1)]
+    return X
+
+
+# One chunk of samples: (nrupv, decision threshold). Module-level so a process pool can run it.
+def _run_chunk(x, n, noise, seed_seq, sens, periods_per_year):
+    rng = np.random.default_rng(seed_seq)
+    res = evaluate_batch(sample_responses(x, n, noise, rng), sens, series=False, periods_per_year=periods_per_year)
+    return res.nrupv, res.ocau + res.sunk_cost_adj
+
+
+class MonteCarloResult:
+    def __init__(self, nrupv, threshold, point_nrupv, point_threshold, seed, noise):
+        self.nrupv = nrupv
+        self.threshold = threshold
+        self.margin = nrupv - threshold
+        self.point_nrupv = point_nrupv # Unperturbed answers
+        self.point_threshold = point_threshold
+        self.seed = seed
+        self.noise = noise
+
+    def __len__(self):
+        return len(self.nrupv)
+
+    @property
+    def prob_worth_continuing(self):
+        # P(NRUPV > OCAU + sunk-cost adjustment)
+        return float(np.mean(self.margin > 0))
+
+    def interval(self, level=0.9, of="nrupv"):
+        # Central credible interval of the sampled NRUPV (or "margin" / "threshold")
+        values = getattr(self, of)
+        tail = (1 - level) / 2 * 100
+        low, high = np.percentile(values, [tail, 100 - tail])
+        return float(low), float(high)
+
+    def histogram(self, bins=50):
+        return np.histogram(self.nrupv, bins=bins)
+
+    def summary(self, levels=(0.5, 0.9, 0.95)):
+        return {
+            "samples": len(self), "seed": self.seed, "noise": self.noise.as_dict(),
+            "point_nrupv": float(self.point_nrupv), "point_threshold": float(self.point_threshold),
+            "mean": float(self.nrupv.mean()), "std": float(self.nrupv.std(ddof=1)) if len(self) > 1 else 0.0,
+            "median": float(np.median(self.nrupv)),
+            "intervals": {f"{level:g}": self.interval(level) for level in levels},
+            "prob_worth_continuing": self.prob_worth_continuing,
+        }
+
+
+# response: dict of answers or ResponseRecord; sens: dict of sensitivity factors;
+# workers > 1 spreads the chunks across a process pool
+def simulate(response, n_samples=20000, noise=None, seed=0, sens=None, workers=1, chunk_size=5000, periods_per_year=1):
+    noise = noise or NoiseModel()
+    x = encode_response(response)
+    point = evaluate_batch(x, sens, series=False, periods_per_year=periods_per_year)
+
+    sizes = [min(chunk_size, n_samples - start) for start in range(0, n_samples, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(x, n, noise, seed_seq, sens, periods_per_year) for n, seed_seq in zip(sizes, seeds)]
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_run_chunk, *zip(*jobs)))
+    else:
+        parts = [_run_chunk(*job) for job in jobs]
+
+    if parts:
+        nrupv = np.concatenate([part[0] for part in parts])
+        threshold = np.concatenate([part[1] for part in parts])
+    else:
+        nrupv = threshold = np.empty(0)
+    return MonteCarloResult(nrupv, threshold, point.nrupv[0], point.ocau[0] + point.sunk_cost_adj[0], seed, noise)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo uncertainty of the ReVIM result for one response.")
+    parser.add_argument("input", help="JSON file with one response object (keys named like the GUI's data_vars)")
+    parser.add_argument("--samples", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1, help="Processes used for sampling (default: 1)")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--lang", choices=["en", "zh"], default="en", help="Ignored: option labels of both languages are recognised (kept for existing scripts)")
+    parser.add_argument("--likert-sd", type=float, default=0.5)
+    parser.add_argument("--weight-sd", type=float, default=0.0)
+    parser.add_argument("--future-shift-prob", type=float, default=0.2)
+    args = parser.parse_args(argv)
+    if args.samples < 1 or args.chunk_size < 1:
+        parser.error("--samples and --chunk-size must be positive")
+
+    with open(args.input, encoding="utf-8") as f:
+        values = json.load(f)
+    sens = {key: float(values[key]) for key in SENSITIVITY_KEYS if values.get(key) not in (None, "")}
+    noise = NoiseModel(args.likert_sd, args.weight_sd, args.future_shift_prob)
+
+    start = time.perf_counter()
+    result = simulate(values, args.samples, noise, args.seed, sens, args.workers, args.chunk_size)
+    elapsed = time.perf_counter() - start
+    print(json.dumps(result.summary(), indent=2))
+    print(f"Drew {len(result)} samples in {elapsed:.2f}s ({len(result) / elapsed:,.0f} samples/s)", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
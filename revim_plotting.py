@@ -0,0 +1,63 @@
+import threading
+import types
+
+# --- Deferred matplotlib loading for the GUIs ---
+# matplotlib with the TkAgg backend is most of the GUIs' import time, but it is only needed once
+# a chart is drawn. The GUIs get it from load_charts() when they first draw; preload() runs the
+# same import on a background thread once the window is up, so the first chart rarely waits.
+#
+# The chart font is resolved once per process (chart_font): the first of CJK_FONT_CANDIDATES
+# that matplotlib has installed. Listing fonts the host does not have made every text draw
+# search for, and warn about, each missing family.
+
+# Windows fonts the GUIs were written for first, then common macOS and Linux CJK fonts
+CJK_FONT_CANDIDATES = [
+    "Microsoft YaHei", "SimHei", "PingFang SC", "Heiti SC", "Arial Unicode MS",
+    "Noto Sans CJK SC", "Noto Sans SC", "Source Han Sans SC", "WenQuanYi Zen Hei", "WenQuanYi Micro Hei", "Droid Sans Fallback",
+]
+
+_lock = threading.Lock()
+_charts = None
+_font = ()
+
+
+# Name of the chart font, or None when no candidate is installed (matplotlib's default font is
+# used then, and CJK labels show as boxes)
+def chart_font():
+    global _font
+    if _font == ():
+        from matplotlib import font_manager
+        installed = {entry.name for entry in font_manager.fontManager.ttflist}
+        _font = next((name for name in CJK_FONT_CANDIDATES if name in installed), None)
+    return _font
+
+
+# Imports matplotlib and the chart code and sets the chart fonts, once. Returns a namespace with
+# Figure, FigureCanvasTkAgg, ResultsFigure and TrajectoryFigure. Safe to call from any thread.
+def load_charts():
+    global _charts
+    with _lock:
+        if _charts is None:
+            import matplotlib
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+            from matplotlib.figure import Figure
+            from revim_charts import ResultsFigure, TrajectoryFigure
+
+            font = chart_font()
+            if font:
+                matplotlib.rcParams['font.sans-serif'] = [font]
+            matplotlib.rcParams['axes.unicode_minus'] = False
+            _charts = types.SimpleNamespace(Figure=Figure, FigureCanvasTkAgg=FigureCanvasTkAgg, ResultsFigure=ResultsFigure,
+                                             TrajectoryFigure=TrajectoryFigure)
+        return _charts
+
+
+def _preload():
+    try:
+        load_charts()
+    except Exception:
+        pass # Raised again, and reported, when the GUI draws its first chart
+
+
+def preload():
+    threading.Thread(target=_preload, name="revim-preload", daemon=True).start()
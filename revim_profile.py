@@ -0,0 +1,146 @@
+import collections
+import json
+import sys
+import threading
+import time
+import tracemalloc
+
+# --- Opt-in instrumentation ---
+# A Profiler handed to a calculator (ReVIMCalculator(..., profiler=p)) or a GUI
+# (ReVIMApp(root, profiler=p)) records one entry per evaluate() and display_visualizations()
+# call: wall time per stage, counters (get_val / get_sens_val calls, periods evaluated, ...) and
+# the net number of memory blocks each stage left allocated (sys.getallocatedblocks; with
+# trace_allocations=True also the traced bytes and peak, via tracemalloc, which slows everything
+# down). Without a profiler the instrumented code only tests `run is not None` at each stage.
+#
+# Records are kept (the last `keep`) for summary() / to_json() / dump() and passed to
+# callback(record) as each call finishes, on the thread that made the call (the GUIs' live
+# worker for live results). Block and tracemalloc counts are process-wide, so calls running at
+# the same time on other threads show up in them.
+#
+#   profiler = Profiler(callback=print)
+#   ReVIMCalculator(response, profiler=profiler).evaluate()
+#   profiler.dump("stages.json")
+
+
+class ProfileRun:
+    # One profiled call. lap(stage) charges everything since the previous lap (or the start) to
+    # stage; count() adds to a counter; finish() hands the record to the profiler.
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.stages = {}
+        self.allocations = {}
+        self.counters = {}
+        self.wrapped = None
+        self.wrapped_names = ()
+        if profiler.trace_allocations:
+            tracemalloc.reset_peak()
+            self.traced = tracemalloc.get_traced_memory()[0]
+        self.blocks = sys.getallocatedblocks()
+        self.start = self.last = time.perf_counter()
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        blocks = sys.getallocatedblocks()
+        self.stages[stage] = self.stages.get(stage, 0.0) + (now - self.last)
+        self.allocations[stage] = self.allocations.get(stage, 0) + (blocks - self.blocks)
+        self.last = now
+        self.blocks = blocks
+
+    def count(self, counter, n=1):
+        self.counters[counter] = self.counters.get(counter, 0) + n
+
+    # Counts the calls of obj's methods `names` until finish(), through instance attributes
+    # that shadow them (nothing changes for other instances)
+    def count_calls(self, obj, *names):
+        self.wrapped = obj
+        for name in names:
+            method = getattr(obj, name)
+            self.counters.setdefault(name, 0)
+            def counted(*args, _method=method, _name=name, **kwargs):
+                self.counters[_name] += 1
+                return _method(*args, **kwargs)
+            setattr(obj, name, counted)
+        self.wrapped_names = names
+
+    def finish(self, **info):
+        end = time.perf_counter()
+        if self.wrapped is not None:
+            for name in self.wrapped_names:
+                self.wrapped.__dict__.pop(name, None)
+            self.wrapped = None
+        record = {
+            "name": self.name, "time": time.time(), "total_ms": (end - self.start) * 1000,
+            "stages_ms": {stage: seconds * 1000 for stage, seconds in self.stages.items()},
+            "counters": dict(self.counters), "allocated_blocks": dict(self.allocations),
+        }
+        if self.profiler.trace_allocations:
+            current, peak = tracemalloc.get_traced_memory()
+            record["traced_bytes"] = current - self.traced
+            record["peak_traced_bytes"] = peak - self.traced
+        record.update(info)
+        self.profiler.add(record)
+        return record
+
+
+class Profiler:
+    # callback(record): called as each profiled call finishes; keep: records kept for export
+    def __init__(self, callback=None, keep=1000, trace_allocations=False):
+        self.callback = callback
+        self.records = collections.deque(maxlen=keep)
+        self.trace_allocations = trace_allocations
+        self._lock = threading.Lock()
+        if trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def start(self, name):
+        return ProfileRun(self, name)
+
+    def add(self, record):
+        with self._lock:
+            self.records.append(record)
+        if self.callback is not None:
+            self.callback(record)
+
+    # Per call name: number of calls, mean total and mean time per stage (ms), counter means
+    def summary(self):
+        with self._lock:
+            records = list(self.records)
+        grouped = collections.defaultdict(list)
+        for record in records:
+            grouped[record["name"]].append(record)
+        summary = {}
+        for name, group in grouped.items():
+            stages = collections.defaultdict(float)
+            counters = collections.defaultdict(float)
+            for record in group:
+                for stage, ms in record["stages_ms"].items():
+                    stages[stage] += ms
+                for counter, n in record["counters"].items():
+                    counters[counter] += n
+            summary[name] = {
+                "calls": len(group), "mean_ms": sum(record["total_ms"] for record in group) / len(group),
+                "stages_mean_ms": {stage: ms / len(group) for stage, ms in stages.items()},
+                "counters_mean": {counter: n / len(group) for counter, n in counters.items()},
+            }
+        return summary
+
+    def to_json(self):
+        with self._lock:
+            records = list(self.records)
+        return json.dumps({"summary": self.summary(), "records": records}, indent=1, ensure_ascii=False)
+
+    def dump(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.to_json())
+
+    def format_summary(self):
+        lines = []
+        for name, entry in self.summary().items():
+            lines.append(f"{name}: {entry['calls']} calls, mean {entry['mean_ms']:.2f} ms")
+            for stage, ms in entry["stages_mean_ms"].items():
+                lines.append(f"  {stage:<20}{ms:>10.3f} ms")
+            for counter, n in entry["counters_mean"].items():
+                lines.append(f"  {counter:<20}{n:>10.1f} per call")
+        return "\n".join(lines)
@@ -0,0 +1,213 @@
+import math
+
+# --- ReVIM Questionnaire Schema ---
+# Compiled once at import: every answer the model reads (Likert items, N/A flags, weights,
+# future expectations, dynamics and OCAU/sunk-cost questions) gets a fixed integer slot.
+# A response is converted into a dense list of floats exactly once (response_vector) and the
+# scalar calculator and the batch engine both index that vector instead of looking answers
+# up by string key.
+
+# (category key, label, number of questions) in the calculator's order. C_geo comes last
+# because the calculator scores it separately after the other cost categories.
+UTILITY_CATEGORIES = [
+    ("U_psych", "心理", 10), ("U_econ", "经济", 5), ("U_socio", "社交", 5),
+    ("U_anthro", "文化人类", 5), ("U_bio", "生理医学", 5), ("U_poli", "权力治理", 4),
+    ("U_philo", "哲学精神", 3), ("U_law", "法律承诺", 2), ("U_comm", "沟通传播", 4),
+    ("U_geo", "地理空间", 3), ("U_eco_sys", "生态系统", 3)
+]
+COST_CATEGORIES = [
+    ("C_psych", "心理", 5), ("C_econ", "经济", 3), ("C_socio", "社交", 3),
+    ("C_anthro", "文化人类", 2), ("C_bio", "生理医学", 3), ("C_poli", "权力治理", 3),
+    ("C_philo", "哲学精神", 2), ("C_law", "法律承诺", 2), ("C_comm", "沟通传播", 2),
+    ("C_eco_sys", "生态系统", 3), ("C_geo", "地理空间", 2)
+]
+
+# Category labels used for breakdown keys, in Chinese with their English translation
+CATEGORY_LABELS_EN = {
+    "心理": "Psychological", "经济": "Economic", "社交": "Sociological",
+    "文化人类": "Anthropological", "生理医学": "Biological/Medical", "权力治理": "Political",
+    "哲学精神": "Philosophical/Spiritual", "法律承诺": "Legal Commitment", "沟通传播": "Communication",
+    "地理空间": "Geospatial", "生态系统": "Ecological/Systems Theory"
+}
+
+# Horizon resolutions: model steps per year. Rates and growth stay annual; flows are split evenly.
+PERIODS_PER_YEAR = {"annual": 1, "quarterly": 4, "monthly": 12}
+
+SENSITIVITY_KEYS = ["base_discount_rate_adj", "future_projection_optimism_adj", "overall_risk_perception_adj", "realization_prob_adj"]
+
+# Model constants, by name. ReVIMCalculator and the batch engine both read them from here; the
+# batch engine also accepts per-call overrides (e.g. for global sensitivity analysis).
+MODEL_CONSTANTS = {
+    "base_discount_rate": 0.03, # r_base
+    "risk_step": 0.005, # Discount rate added per point of breakup risk / future uncertainty
+    "learning_step": 0.005, # Discount rate removed per point of adaptability above neutral
+    "stability_decay": 0.05, # Yearly shrink of the risk premium when conflict patterns are stable
+    "instability_growth": 0.02, # Yearly growth of the risk premium otherwise
+    "uncertainty_decay": 0.03,
+    "learning_decay": 0.02,
+    "risk_floor": 0.5, # Lower bounds of the three time multipliers
+    "uncertainty_floor": 0.5,
+    "learning_floor": 0.7,
+    "min_discount_rate": 0.001,
+    "synergy_boost": 0.1, # Communication -> psychological utility, philosophical -> psychological cost
+    "alt_partner_factor": 0.7, # Share of the current gross utility expected from an alternative partner
+    "sunk_cost_max_adjustment": 3.0,
+}
+
+# Dropdown label -> model value, with the value used for unknown labels
+OPTION_MAPS = {
+    "en": {
+        "future": ({"Significantly improved": 0.03, "Slightly improved": 0.015, "Remained unchanged": 0, "Slightly worsened": -0.015, "Significantly worsened": -0.03, "Uncertain": -0.005}, 0),
+        "duration": ({"Several months": 0.5, "1-2 years": 1.5, "3-5 years": 4, "5-10 years": 7.5, "More than 10 years": 15, "Lifelong": 25, "Very uncertain": 3}, 3),
+        "single": ({"Significantly higher": 3, "Slightly higher": 1.5, "About the same": 0, "Slightly lower": -1.5, "Significantly lower": -3}, 0),
+        "recovery": ({"Very soon (within 1-3 months)": 0.25, "Average (3-6 months)": 0.5, "Longer (6 months-1 year)": 1, "Very long (more than 1 year)": 1.5, "Uncertain": 0.75}, 0.75),
+    },
+    "zh": {
+        "future": ({"显著改善": 0.03, "略有改善": 0.015, "保持不变": 0, "略有恶化": -0.015, "显著恶化": -0.03, "不确定": -0.005}, 0),
+        "duration": ({"几个月": 0.5, "1-2年": 1.5, "3-5年": 4, "5-10年": 7.5, "10年以上": 15, "终身": 25, "非常不确定": 3}, 3),
+        "single": ({"显著更高": 3, "略高": 1.5, "差不多": 0, "略低": -1.5, "显著更低": -3}, 0),
+        "recovery": ({"很快（1-3个月内）": 0.25, "一般（3-6个月）": 0.5, "较长（6个月-1年）": 1, "很长（1年以上）": 1.5, "不确定": 0.75}, 0.75),
+    },
+}
+
+# Locale tables, compiled once: every dropdown option gets an enum code (its position in the
+# English list), and the labels of every language map to that code in one dict per kind, so
+# English, Chinese and mixed responses all decode with a single lookup and no language flag.
+OPTION_KINDS = tuple(OPTION_MAPS["en"])
+OPTION_LANGS = tuple(OPTION_MAPS)
+OPTION_LABELS = {lang: {kind: tuple(OPTION_MAPS[lang][kind][0]) for kind in OPTION_KINDS} for lang in OPTION_LANGS} # lang -> kind -> label per code
+OPTION_VALUES = {kind: tuple(OPTION_MAPS["en"][kind][0].values()) for kind in OPTION_KINDS} # kind -> model value per code
+OPTION_FALLBACK = {kind: OPTION_MAPS["en"][kind][1] for kind in OPTION_KINDS} # Value of an unknown label
+
+
+def _build_label_codes():
+    codes = {}
+    for kind in OPTION_KINDS:
+        table = codes[kind] = {}
+        for lang in OPTION_LANGS:
+            if OPTION_MAPS[lang][kind][1] != OPTION_FALLBACK[kind] or len(OPTION_LABELS[lang][kind]) != len(OPTION_VALUES[kind]):
+                raise ValueError(f"{lang} options for {kind} do not match the English ones")
+            for code, (label, value) in enumerate(OPTION_MAPS[lang][kind][0].items()):
+                if value != OPTION_VALUES[kind][code] or table.get(label, code) != code:
+                    raise ValueError(f"{lang} option {label!r} for {kind} does not match the English one")
+                table[label] = code
+    return codes
+
+LABEL_CODES = _build_label_codes() # kind -> {label in any language: code}
+
+
+def option_code(kind, label):
+    # Enum code of a dropdown label in any language, or None for an unknown label
+    return LABEL_CODES[kind].get(label)
+
+
+def question_keys(cat_key, num_q):
+    code = cat_key.split('_')[-1].upper() # Same key formation as add_likert_scale
+    return [f"{cat_key}_{code}_{i}" for i in range(1, num_q + 1)]
+
+
+# (key, kind, default when missing). The calculator reads U_law_LAW.2 (when U_law.1 is N/A)
+# and C_geo_GEO.1/.2 with dotted keys, so those are the keys kept here as well.
+def _build_slots():
+    slots = []
+    for cat_key, _, num_q in UTILITY_CATEGORIES:
+        slots += [(k, "likert", 4) for k in question_keys(cat_key, num_q)]
+        if cat_key == "U_bio":
+            slots.append(("U_bio_5_na", "flag", 0))
+        elif cat_key == "U_law":
+            slots += [("U_law_LAW.2", "likert", 4), ("U_law_1_na", "flag", 0)]
+    for cat_key, _, num_q in COST_CATEGORIES:
+        if cat_key == "C_geo":
+            slots += [("C_geo_GEO.1", "likert", 4), ("C_geo_GEO.2", "likert", 4), ("C_geo_1_na", "flag", 0)]
+        else:
+            slots += [(k, "likert", 4) for k in question_keys(cat_key, num_q)]
+    for cat_key, _, _ in UTILITY_CATEGORIES + COST_CATEGORIES:
+        slots.append((f"{cat_key}_future", "future", 0))
+    for cat_key, _, _ in UTILITY_CATEGORIES + COST_CATEGORIES:
+        slots.append((f"W_{cat_key}", "weight", 4))
+    slots += [
+        ("Q_risk_breakup_A_1", "number", 4), ("Q_conflict_patterns_exist_A_2", "conflict", "0"),
+        ("Q_certainty_future_A_3", "number", 4), ("Q_adapt_solve_B_3", "number", 4),
+        ("Q_adapt_stress_B_4", "number", 4), ("Q_adapt_learn_hist_B_5", "number", 4),
+        ("Q_exp_duration_realistic", "duration", 5), ("Q_single_satisfaction_1", "single", 0),
+        ("Q_alt_partner_likelihood_4", "number", 1), ("Q_sunk_cost_influence_4", "number", 1),
+        ("Q_sunk_cost_worry_5", "number", 1),
+    ]
+    return slots
+
+SLOTS = _build_slots()
+SLOT_KEYS = [key for key, _, _ in SLOTS]
+SLOT_INDEX = {key: i for i, key in enumerate(SLOT_KEYS)}
+N_SLOTS = len(SLOTS)
+
+# Question slots per category (the GUI keys; U_law_LAW.2 and C_geo_GEO.* are looked up directly)
+CATEGORY_QUESTION_SLOTS = {cat_key: [SLOT_INDEX[k] for k in question_keys(cat_key, num_q)]
+                           for cat_key, _, num_q in UTILITY_CATEGORIES + COST_CATEGORIES if cat_key != "C_geo"}
+FUTURE_SLOT = {cat_key: SLOT_INDEX[f"{cat_key}_future"] for cat_key, _, _ in UTILITY_CATEGORIES + COST_CATEGORIES}
+WEIGHT_SLOT = {cat_key: SLOT_INDEX[f"W_{cat_key}"] for cat_key, _, _ in UTILITY_CATEGORIES + COST_CATEGORIES}
+
+
+# get_val semantics: digits become ints, "不适用" is N/A, "" and missing answers fall back to
+# the default, and dropdown labels (of either language) go through the option tables.
+def resolve_value(raw, kind, default):
+    if raw is None:
+        return default
+    if isinstance(raw, (int, float)):
+        return raw
+    if not isinstance(raw, str):
+        return raw
+    if raw.isdigit(): return int(raw)
+    if raw == "不适用": return "N/A"
+    if raw == "": return default
+    codes = LABEL_CODES.get(kind)
+    if codes is not None:
+        code = codes.get(raw)
+        return OPTION_FALLBACK[kind] if code is None else OPTION_VALUES[kind][code]
+    return raw
+
+
+def _to_number(key, value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid value for {key}: {value!r}")
+
+
+def encode_value(key, kind, default, raw):
+    val = resolve_value(raw, kind, default)
+    if kind == "likert":
+        return math.nan if val == "N/A" else _to_number(key, val) # NaN marks a skipped (N/A) question
+    if kind == "flag":
+        return 1.0 if val == 1 else 0.0
+    if kind == "weight":
+        return float(val) if isinstance(val, (int, float)) else 4.0 # Non-numeric weights fall back to 4/7
+    if kind == "conflict":
+        # get_val turns the stored "0"/"1" into an int, so the calculator's == "0" test only
+        # passes for unanswered input. 0 = stable (shrinking risk), 1 = persisting conflict.
+        return 0.0 if val == "0" else 1.0
+    return _to_number(key, val)
+
+
+# Answers repeat a lot (Likert digits, option labels), so encoded values are memoized per
+# (slot kind, default). Labels of both languages share the memos.
+_MEMO_LIMIT = 4096
+_memos = {}
+_ENCODE_PLAN = [(key, kind, default, _memos.setdefault((kind, default), {})) for key, kind, default in SLOTS]
+
+
+def response_vector(values):
+    vector = [0.0] * N_SLOTS
+    for i, (key, kind, default, memo) in enumerate(_ENCODE_PLAN):
+        raw = values.get(key)
+        try:
+            vector[i] = memo[raw]
+            continue
+        except (KeyError, TypeError):
+            pass
+        val = vector[i] = encode_value(key, kind, default, raw)
+        if len(memo) < _MEMO_LIMIT:
+            try:
+                memo[raw] = val
+            except TypeError:
+                pass
+    return vector
@@ -0,0 +1,305 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http import HTTPStatus
+
+from revim_batch import encode_response
+from revim_cache import key_prefix, vector_key
+from revim_cli import RESULT_FIELDS, score_rows
+from revim_model import ReVIMCalculator
+from revim_schema import PERIODS_PER_YEAR, SENSITIVITY_KEYS
+
+# --- Local HTTP scoring service ---
+# A small HTTP/1.1 server on asyncio (standard library only) for embedding ReVIM scoring in
+# other applications. Requests are validated on the event loop; the model runs in a process (or
+# thread) pool, so the loop never blocks on a calculation.
+#
+#   GET  /health        {"status": "ok", "pending": ...}
+#   GET  /stats         request, coalescing and rejection counters
+#   POST /score         {"response": {...}, "sensitivity": {...}, "lang": "en", "periods": "annual"}
+#                       -> ReVIMCalculator result: the revim_cli result fields, the expected
+#                          duration, both breakdowns and the feedback text
+#   POST /score/batch   {"responses": [{...}, ...], "sensitivity": {...}, "periods": "annual"}
+#                       -> {"results": [revim_cli result fields and "error", one per response]}
+#
+# Only "response"/"responses" is required. Batch rows may carry their own sensitivity columns,
+# as in revim_cli, and invalid rows get an error instead of failing the request; split into
+# chunks of at least batch_chunk rows, one per worker at most, a batch is scored by several
+# workers at once.
+# Identical requests in flight at the same time are computed once: single requests by what they
+# encode to (answers, sliders, resolution, language), batches by their body. When max_pending
+# pool jobs are queued or running, new work is refused with 503 and Retry-After, so an overloaded
+# service answers quickly instead of queueing without bound.
+#
+#   python revim_server.py --port 8765 --workers 4
+#   python revim_loadtest.py --spawn --requests 5000
+
+MAX_BODY = 16 * 1024 * 1024
+
+
+class RequestError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# Pool jobs (top level, so a process pool can pickle them)
+
+def _score_response(values, sens, lang, periods_per_year):
+    result = ReVIMCalculator(values, sens, lang=lang, periods_per_year=periods_per_year).evaluate(series=False)
+    return {
+        "nrupv": result.nrupv, "ocau": result.ocau, "sunk_cost_adj": result.sunk_cost_adj,
+        "decision_threshold": result.decision_threshold, "decision_margin": result.decision_margin,
+        "is_worth_continuing": result.is_worth_continuing, "expected_duration_years": float(result.T_realistic),
+        "utility_breakdown": dict(result.initial_utility_breakdown), "cost_breakdown": dict(result.initial_cost_breakdown),
+        "feedback": result.report(),
+    }
+
+
+def _score_responses(rows, sens, periods_per_year):
+    results = []
+    for _, result, error in score_rows(rows, max(1, len(rows)), sens, True, periods_per_year):
+        results.append(dict(result or {field: None for field in RESULT_FIELDS}, error=error))
+    return results
+
+
+def _sensitivity(payload):
+    sens = payload.get("sensitivity") or {}
+    if not isinstance(sens, dict):
+        raise RequestError(HTTPStatus.BAD_REQUEST, '"sensitivity" must be an object')
+    unknown = set(sens) - set(SENSITIVITY_KEYS)
+    if unknown:
+        raise RequestError(HTTPStatus.BAD_REQUEST, f"Unknown sensitivity factor(s): {', '.join(sorted(unknown))}")
+    try:
+        sens = {key: float(value) for key, value in sens.items()}
+    except (TypeError, ValueError):
+        raise RequestError(HTTPStatus.BAD_REQUEST, "Sensitivity factors must be numbers") from None
+    if not all(math.isfinite(value) for value in sens.values()):
+        raise RequestError(HTTPStatus.BAD_REQUEST, "Sensitivity factors must be finite")
+    return sens
+
+
+def _periods(payload):
+    periods = payload.get("periods", "annual")
+    if periods not in PERIODS_PER_YEAR:
+        raise RequestError(HTTPStatus.BAD_REQUEST, f'"periods" must be one of {", ".join(PERIODS_PER_YEAR)}')
+    return PERIODS_PER_YEAR[periods]
+
+
+class ScoringService:
+    # workers: pool size (default: CPU count); pool: "process" or "thread"; max_pending: pool jobs
+    # queued or running before requests are refused (default: 8 per worker); batch_chunk: rows
+    # per pool job for /score/batch; max_batch: rows accepted in one batch request
+    def __init__(self, workers=None, pool="process", max_pending=None, batch_chunk=512, max_batch=100000):
+        self.workers = workers or os.cpu_count() or 1
+        executor = ProcessPoolExecutor if pool == "process" else ThreadPoolExecutor
+        self.executor = executor(max_workers=self.workers)
+        self.pool = pool
+        self.max_pending = max_pending or 8 * self.workers
+        self.batch_chunk = batch_chunk
+        self.max_batch = max_batch
+        self.pending = 0 # Pool jobs submitted and not finished
+        self.in_flight = {} # Coalescing key -> future of the result
+        self.counters = {"requests": 0, "scored": 0, "batch_rows": 0, "coalesced": 0, "rejected": 0, "errors": 0}
+        self.started = time.time()
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self):
+        return dict(self.counters, pending=self.pending, max_pending=self.max_pending, workers=self.workers,
+                    pool=self.pool, uptime=time.time() - self.started)
+
+    async def _run(self, jobs):
+        # jobs: (function, *args) tuples, submitted together or not at all; an idle pool takes any request
+        if self.pending and self.pending + len(jobs) > self.max_pending:
+            self.counters["rejected"] += 1
+            raise RequestError(HTTPStatus.SERVICE_UNAVAILABLE, "Server busy, retry shortly")
+        loop = asyncio.get_running_loop()
+        self.pending += len(jobs)
+        futures = [loop.run_in_executor(self.executor, *job) for job in jobs]
+        try:
+            return await asyncio.gather(*futures)
+        finally:
+            self.pending -= len(jobs)
+
+    async def _coalesced(self, key, jobs):
+        future = self.in_flight.get(key)
+        if future is not None:
+            self.counters["coalesced"] += 1
+            return await asyncio.shield(future)
+        future = asyncio.ensure_future(self._run(jobs))
+        self.in_flight[key] = future
+        try:
+            return await asyncio.shield(future)
+        finally:
+            if self.in_flight.get(key) is future:
+                del self.in_flight[key]
+
+    async def score(self, payload):
+        values = payload.get("response")
+        if not isinstance(values, dict):
+            raise RequestError(HTTPStatus.BAD_REQUEST, '"response" must be an object of answers')
+        sens = _sensitivity(payload)
+        periods_per_year = _periods(payload)
+        lang = payload.get("lang", "en")
+        if lang not in ("en", "zh"):
+            raise RequestError(HTTPStatus.BAD_REQUEST, '"lang" must be "en" or "zh"')
+        try:
+            x = encode_response(values)
+        except ValueError as e:
+            raise RequestError(HTTPStatus.UNPROCESSABLE_ENTITY, str(e)) from None
+        key = vector_key(key_prefix("serve", [sens.get(k, 1.0) for k in SENSITIVITY_KEYS], periods_per_year, lang), x)
+        (result,) = await self._coalesced(key, [(_score_response, values, sens, lang, periods_per_year)])
+        self.counters["scored"] += 1
+        return result
+
+    async def score_batch(self, payload, body):
+        rows = payload.get("responses")
+        if not isinstance(rows, list) or not all(isinstance(values, dict) for values in rows):
+            raise RequestError(HTTPStatus.BAD_REQUEST, '"responses" must be a list of objects of answers')
+        if len(rows) > self.max_batch:
+            raise RequestError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"At most {self.max_batch} responses per request")
+        sens = _sensitivity(payload)
+        periods_per_year = _periods(payload)
+        size = max(self.batch_chunk, -(-len(rows) // self.workers)) # At most one job per worker
+        jobs = [(_score_responses, rows[start:start + size], sens, periods_per_year) for start in range(0, len(rows), size)]
+        key = "batch|" + hashlib.blake2b(body, digest_size=16).hexdigest()
+        parts = await self._coalesced(key, jobs)
+        self.counters["batch_rows"] += len(rows)
+        return {"results": [result for part in parts for result in part]}
+
+    async def dispatch(self, method, path, body):
+        if path in ("/health", "/stats"):
+            if method != "GET":
+                raise RequestError(HTTPStatus.METHOD_NOT_ALLOWED, f"Use GET for {path}")
+            return {"status": "ok", "pending": self.pending} if path == "/health" else self.stats()
+        if path not in ("/score", "/score/batch"):
+            raise RequestError(HTTPStatus.NOT_FOUND, f"No endpoint {path}")
+        if method != "POST":
+            raise RequestError(HTTPStatus.METHOD_NOT_ALLOWED, f"Use POST for {path}")
+        try:
+            payload = json.loads(body)
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"Invalid JSON: {e}") from None
+        if not isinstance(payload, dict):
+            raise RequestError(HTTPStatus.BAD_REQUEST, "The request body must be a JSON object")
+        return await (self.score(payload) if path == "/score" else self.score_batch(payload, body))
+
+    # One HTTP/1.1 connection; requests are answered in order while the client keeps it open
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._send(writer, HTTPStatus.BAD_REQUEST, {"error": "Malformed request line"}, False)
+                    break
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                status, result, retry = HTTPStatus.OK, None, False
+                try:
+                    if "chunked" in headers.get("transfer-encoding", "").lower():
+                        keep_alive = False
+                        raise RequestError(HTTPStatus.LENGTH_REQUIRED, "Chunked bodies are not supported; send Content-Length")
+                    length = int(headers.get("content-length", "0"))
+                    if length > MAX_BODY:
+                        keep_alive = False
+                        raise RequestError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"Bodies are limited to {MAX_BODY} bytes")
+                    body = await reader.readexactly(length) if length > 0 else b""
+                    self.counters["requests"] += 1
+                    result = await self.dispatch(method, target.split("?", 1)[0], body)
+                except RequestError as e:
+                    status, result = e.status, {"error": str(e)}
+                    retry = e.status == HTTPStatus.SERVICE_UNAVAILABLE
+                    if not retry:
+                        self.counters["errors"] += 1
+                except ValueError:
+                    status, result, keep_alive = HTTPStatus.BAD_REQUEST, {"error": "Invalid Content-Length"}, False
+                except Exception as e: # A failing model run must not take the connection handler down
+                    status, result = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"{type(e).__name__}: {e}"}
+                    self.counters["errors"] += 1
+                await self._send(writer, status, result, keep_alive, retry)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _send(self, writer, status, result, keep_alive, retry=False):
+        # NaN (a breakdown of skipped questions) is not JSON, so it is sent as null
+        body = json.dumps(_finite(result), ensure_ascii=False).encode()
+        head = [f"HTTP/1.1 {status.value} {status.phrase}", "Content-Type: application/json; charset=utf-8",
+                f"Content-Length: {len(body)}", f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        if retry:
+            head.append("Retry-After: 1")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+
+def _finite(value):
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, dict):
+        return {k: _finite(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_finite(v) for v in value]
+    return value
+
+
+async def serve(service, host, port):
+    server = await asyncio.start_server(service.handle, host, port)
+    bound = server.sockets[0].getsockname()
+    print(f"Serving on http://{bound[0]}:{bound[1]} ({service.workers} {service.pool} workers, "
+          f"at most {service.max_pending} pending jobs)", file=sys.stderr, flush=True)
+    loop = asyncio.get_running_loop()
+    stopped = loop.create_future()
+    try:
+        loop.add_signal_handler(signal.SIGTERM, lambda: stopped.done() or stopped.set_result(None)) # Stop as on Ctrl+C, so main() shuts the pool down
+    except NotImplementedError: # Windows: no loop signal handlers, and terminate() ends the process outright
+        pass
+    async with server:
+        await stopped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve ReVIM scoring over HTTP on this machine.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765, help="0 picks a free port (default: 8765)")
+    parser.add_argument("--workers", type=int, help="Pool size (default: CPU count)")
+    parser.add_argument("--pool", choices=["process", "thread"], default="process")
+    parser.add_argument("--max-pending", type=int, help="Pool jobs queued or running before 503 (default: 8 per worker)")
+    parser.add_argument("--batch-chunk", type=int, default=512, help="Rows per pool job for /score/batch (default: 512)")
+    args = parser.parse_args(argv)
+    if (args.workers is not None and args.workers < 1) or args.batch_chunk < 1 or (args.max_pending is not None and args.max_pending < 1):
+        parser.error("--workers, --max-pending and --batch-chunk must be positive")
+
+    service = ScoringService(args.workers, args.pool, args.max_pending, args.batch_chunk)
+    try:
+        asyncio.run(serve(service, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
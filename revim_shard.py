@@ -0,0 +1,137 @@
+import collections
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from revim_cli import _chunks, encode_chunk, merge_chunk, result_dicts, score_arrays, sens_defaults
+from revim_schema import N_SLOTS, SENSITIVITY_KEYS
+
+# --- Multi-core batch scoring ---
+# Scores input rows across a pool of worker processes, chunk by chunk, with results merged back
+# in input order (the same rows revim_cli.score_chunks yields, chunk for chunk).
+#
+# Parsed rows are encoded by the parent straight into shared-memory blocks, one
+# (chunk_size x (N_SLOTS + sliders)) float block per chunk in flight, which the workers read in
+# place: only the block name goes through the pool and only the result fields come back. Blocks
+# are reused as chunks complete; at most `in_flight` chunks (default: two per worker) are encoded ahead,
+# which bounds memory and keeps every worker busy. A packed store (revim_store) needs no blocks:
+# each worker memory-maps the file and decodes its own chunks.
+#
+#   scorer = ShardedScorer(workers=8, chunk_size=8192)
+#   for rows in scorer.score_chunks(read_responses(f, "csv")): ...
+#   scorer.close()
+
+_attached = {} # Worker side: shared-memory blocks by name, attached once per process
+_stores = {} # Worker side: open response stores by path
+
+
+def _block_view(shm, capacity):
+    return np.ndarray((capacity, N_SLOTS + len(SENSITIVITY_KEYS)), buffer=shm.buf)
+
+
+def _score_block(name, capacity, n, periods_per_year):
+    shm = _attached.get(name)
+    if shm is None:
+        shm = _attached[name] = shared_memory.SharedMemory(name) # The parent unlinks it when done
+    block = _block_view(shm, capacity)[:n]
+    S = {key: block[:, N_SLOTS + i] for i, key in enumerate(SENSITIVITY_KEYS)}
+    return score_arrays(block[:, :N_SLOTS], S, periods_per_year)
+
+
+def _score_store_rows(path, start, stop, sens, periods_per_year):
+    from revim_store import ResponseStore
+    store = _stores.get(path)
+    if store is None:
+        store = _stores[path] = ResponseStore(path)
+    X = store.vectors(start, stop)
+    return score_arrays(X, {key: np.full(len(X), val) for key, val in sens.items()}, periods_per_year)
+
+
+class ShardedScorer:
+    # workers: pool size (default: CPU count); in_flight: chunks encoded and queued ahead
+    def __init__(self, workers=None, chunk_size=8192, sens=None, periods_per_year=1, skip_invalid=False, in_flight=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.sens = sens_defaults(sens)
+        self.periods_per_year = periods_per_year
+        self.skip_invalid = skip_invalid
+        self.in_flight = in_flight or 2 * self.workers
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        self.blocks = [] # Every block created, unlinked by close()
+        self.free = [] # Blocks not holding a chunk in flight
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        for shm in self.blocks:
+            shm.close()
+            shm.unlink()
+        self.blocks = []
+        self.free = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _free_block(self):
+        if not self.free:
+            size = self.chunk_size * (N_SLOTS + len(SENSITIVITY_KEYS)) * 8
+            self.blocks.append(shared_memory.SharedMemory(create=True, size=size))
+            self.free.append(self.blocks[-1])
+        return self.free.pop()
+
+    # rows: iterable of input rows; row_offset: number of the first row, for error messages.
+    # Yields one list of (input row, result dict or None, error or None) per chunk, in order.
+    def score_chunks(self, rows, row_offset=0):
+        pending = collections.deque() # (chunk, valid, errors, block, future)
+        try:
+            for chunk in _chunks(rows, self.chunk_size):
+                if len(pending) == self.in_flight:
+                    yield self._finish(pending)
+                shm = self._free_block()
+                block = _block_view(shm, self.chunk_size)
+                S = {key: block[:, N_SLOTS + i] for i, key in enumerate(SENSITIVITY_KEYS)}
+                try:
+                    valid, errors = encode_chunk(chunk, block[:, :N_SLOTS], S, self.sens, self.skip_invalid, row_offset)
+                except ValueError:
+                    self.free.append(shm)
+                    raise
+                future = self.executor.submit(_score_block, shm.name, self.chunk_size, len(valid), self.periods_per_year)
+                pending.append((chunk, valid, errors, shm, future))
+                row_offset += len(chunk)
+            while pending:
+                yield self._finish(pending)
+        finally:
+            for *_, shm, future in pending: # Abandoned (error or generator closed): wait before reusing the blocks
+                future.cancel() or future.exception()
+                self.free.append(shm)
+
+    def _finish(self, pending):
+        chunk, valid, errors, shm, future = pending.popleft()
+        try:
+            scores = result_dicts(future.result())
+        finally:
+            self.free.append(shm)
+        return merge_chunk(chunk, valid, errors, scores)
+
+    # Rows start.. of a packed store at path, scored by workers that map the file themselves.
+    # Yields one list of ({"row": index}, result dict, None) per chunk, in order.
+    def score_store(self, path, start=0):
+        from revim_store import ResponseStore
+        with ResponseStore(path) as store:
+            total = len(store)
+        pending = collections.deque()
+        for first in range(start, total, self.chunk_size):
+            stop = min(first + self.chunk_size, total)
+            if len(pending) == self.in_flight:
+                yield self._finish_store(pending)
+            pending.append((first, self.executor.submit(_score_store_rows, path, first, stop, self.sens, self.periods_per_year)))
+        while pending:
+            yield self._finish_store(pending)
+
+    def _finish_store(self, pending):
+        first, future = pending.popleft()
+        return [({"row": first + j}, score, None) for j, score in enumerate(result_dicts(future.result()))]
@@ -0,0 +1,275 @@
+import argparse
+import json
+import math
+import os
+import struct
+import sys
+import time
+from itertools import chain
+
+import numpy as np
+
+from revim_batch import encode_response
+from revim_schema import N_SLOTS, OPTION_VALUES, SLOTS, response_vector
+
+# --- Packed response store ---
+# Responses as fixed-width binary records: one int8 per schema slot (see revim_schema), so a
+# record is N_SLOTS (138) bytes against the kilobytes of a dict of strings, and 10M responses take
+# about 1.4 GB. The records follow a header and are read through numpy.memmap; vectors() and
+# chunks() decode them into the batch engine's float rows with one table lookup per cell, no
+# parsing. Stores are written once ("w") or grown in append mode ("a").
+#
+# Cell codes: Likert, weight and 1-7 number answers are stored as their value (whole numbers
+# only) and N/A as NA_CODE; flags and the conflict answer as 0/1; dropdown answers as the index
+# of their value in the slot's levels (the options' values, then the slot default if it is not
+# one of them).
+#
+# Header: MAGIC, the format version, the header and record sizes (struct HEADER) and a JSON
+# layout, [key, kind, levels or null] per column, padded to a multiple of 64 bytes. Readers map
+# the columns to the current schema by key (columns a store lacks get the slot default), so
+# stores stay readable when the questionnaire gains questions. Appending needs the current layout.
+#
+#   python revim_store.py pack responses.csv responses.revim
+#   python revim_store.py pack more.jsonl responses.revim --append
+#   python revim_store.py info responses.revim
+#   python revim_cli.py responses.revim -o scores.csv
+
+MAGIC = b"REVIMRS\0"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sHII") # Magic, format version, header size, record size
+NA_CODE = -128
+OPTION_KINDS_STORED = ("future", "duration", "single")
+
+
+def _slot_levels(kind, default):
+    if kind not in OPTION_KINDS_STORED:
+        return None
+    levels = [float(value) for value in OPTION_VALUES[kind]]
+    return levels if float(default) in levels else levels + [float(default)]
+
+
+LAYOUT = [[key, kind, _slot_levels(kind, default)] for key, kind, default in SLOTS]
+
+
+def _decode_table(layout):
+    # (N_SLOTS, 256) floats: decoded value of every code (code + 128) of every current slot,
+    # and the stored column each slot is read from
+    table = np.zeros((N_SLOTS, 256))
+    columns = np.zeros(N_SLOTS, dtype=np.intp)
+    stored = {key: (column, levels) for column, (key, _, levels) in enumerate(layout)}
+    default_row = response_vector({})
+    for slot, (key, _, _) in enumerate(SLOTS):
+        if key not in stored:
+            table[slot] = default_row[slot]
+            continue
+        columns[slot], levels = stored[key]
+        if levels is None:
+            table[slot] = np.arange(-128, 128)
+            table[slot, NA_CODE + 128] = math.nan
+        else:
+            table[slot] = math.nan
+            table[slot, 128:128 + len(levels)] = levels
+    return table, columns
+
+
+def _option_groups():
+    # Dropdown slots grouped by their levels: (slot indices, levels)
+    groups = {}
+    for slot, (_, _, levels) in enumerate(LAYOUT):
+        if levels is not None:
+            groups.setdefault(tuple(levels), []).append(slot)
+    return [(np.array(slots), np.array(levels)) for levels, slots in groups.items()]
+
+
+_OPTION_GROUPS = _option_groups()
+
+
+# X: (n, N_SLOTS) encoded answer vectors -> (n, N_SLOTS) int8 codes
+def pack(X, row_offset=0):
+    X = np.asarray(X, dtype=float)
+    na = np.isnan(X)
+    bad = ~na & ((X != np.round(X)) | (np.abs(X) > 127))
+    codes = np.where(na | bad, NA_CODE, X).astype(np.int8)
+    for slots, levels in _OPTION_GROUPS:
+        match = X[:, slots, None] == levels
+        bad[:, slots] = ~match.any(axis=2)
+        codes[:, slots] = match.argmax(axis=2)
+    if bad.any():
+        row, slot = np.argwhere(bad)[0]
+        raise ValueError(f"Row {row_offset + row + 1}: {LAYOUT[slot][0]} = {float(X[row, slot])!r} cannot be stored in one byte")
+    return codes
+
+
+class ResponseStore:
+    # path: store file; mode: "r" read, "a" append (the file is created if missing), "w" create
+    # (an existing file is replaced)
+    def __init__(self, path, mode="r"):
+        if mode not in ("r", "a", "w"):
+            raise ValueError(f"Unknown mode: {mode!r}")
+        self.path = path
+        self.mode = mode
+        if mode == "w" or (mode == "a" and not os.path.exists(path)):
+            self._write_header()
+        with open(path, "rb") as f:
+            head = f.read(HEADER.size)
+            if len(head) < HEADER.size:
+                raise ValueError(f"{path} is not a response store")
+            magic, self.version, self.header_size, self.record_size = HEADER.unpack(head)
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a response store")
+            if self.version > FORMAT_VERSION:
+                raise ValueError(f"{path} has format version {self.version}; this version reads up to {FORMAT_VERSION}")
+            self.layout = json.loads(f.read(self.header_size - HEADER.size).rstrip(b"\0"))
+        if len(self.layout) != self.record_size:
+            raise ValueError(f"{path} has a corrupt header")
+        if mode == "a" and self.layout != LAYOUT:
+            raise ValueError(f"{path} was written with a different questionnaire schema; append to a new store")
+        self._table, self._columns = _decode_table(self.layout)
+        self._flat_table = self._table.ravel()
+        self._identity = self.record_size == N_SLOTS and np.array_equal(self._columns, np.arange(N_SLOTS))
+        self._offsets = np.arange(N_SLOTS) * 256 + 128 # Start of each slot's row in the flat table, at code 0
+        self._file = open(path, "r+b") if mode != "r" else None
+        if self._file is not None:
+            # Drop a record left half-written by an interrupted append
+            self._file.truncate(self.header_size + len(self) * self.record_size)
+
+    def _write_header(self):
+        layout = json.dumps(LAYOUT, separators=(",", ":")).encode()
+        header_size = -(-(HEADER.size + len(layout)) // 64) * 64
+        with open(self.path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, header_size, N_SLOTS))
+            f.write(layout.ljust(header_size - HEADER.size, b"\0"))
+
+    def __len__(self):
+        return (os.path.getsize(self.path) - self.header_size) // self.record_size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def nbytes(self):
+        return self.header_size + len(self) * self.record_size
+
+    # X: (n, N_SLOTS) encoded answer vectors
+    def append_vectors(self, X):
+        if self._file is None:
+            raise ValueError("Store is open for reading")
+        self._file.seek(0, os.SEEK_END)
+        first = len(self)
+        for start in range(0, len(X), 65536): # Bounds the temporary arrays of pack()
+            self._file.write(pack(X[start:start + 65536], first + start).tobytes())
+        self._file.flush()
+        return len(X)
+
+    # rows: response dicts (or ResponseRecords), written chunk_size at a time; returns the row count
+    def append(self, rows, chunk_size=4096):
+        count = 0
+        X = np.empty((chunk_size, N_SLOTS))
+        n = 0
+        for values in rows:
+            try:
+                encode_response(values, out=X[n])
+            except ValueError as e:
+                raise ValueError(f"Row {len(self) + n + 1}: {e}") from None
+            n += 1
+            if n == chunk_size:
+                count += self.append_vectors(X)
+                n = 0
+        if n:
+            count += self.append_vectors(X[:n])
+        return count
+
+    # Raw int8 codes of rows start..stop, memory-mapped (read-only, no copy)
+    def codes(self, start=0, stop=None):
+        rows = len(self)
+        if rows == 0:
+            return np.empty((0, self.record_size), dtype=np.int8)
+        records = np.memmap(self.path, dtype=np.int8, mode="r", offset=self.header_size, shape=(rows, self.record_size))
+        return records[start:stop]
+
+    def _decode(self, codes, out=None):
+        index = (codes if self._identity else codes[:, self._columns]).astype(np.intp)
+        index += self._offsets
+        return np.take(self._flat_table, index, out=None if out is None else out[:len(codes)])
+
+    # Rows start..stop decoded to (n, N_SLOTS) float answer vectors; out: optional array to fill
+    def vectors(self, start=0, stop=None, out=None):
+        return self._decode(self.codes(start, stop), out)
+
+    # Yields (first row, vectors) for consecutive chunks; the vectors array is reused
+    def chunks(self, chunk_size=8192, start=0, stop=None):
+        codes = self.codes()
+        stop = len(codes) if stop is None else min(stop, len(codes))
+        buffer = np.empty((chunk_size, N_SLOTS))
+        for first in range(start, stop, chunk_size):
+            yield first, self._decode(codes[first:min(first + chunk_size, stop)], buffer)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pack responses into a memory-mapped binary store, or describe one.")
+    parser.add_argument("command", choices=["pack", "info"])
+    parser.add_argument("input", nargs="?", help="pack: CSV or JSON Lines file of responses ('-' for stdin)")
+    parser.add_argument("store", help="Store file (.revim)")
+    parser.add_argument("--input-format", choices=["csv", "jsonl"], help="Default: guessed from the file extension")
+    parser.add_argument("--append", action="store_true", help="pack: add to an existing store instead of replacing it")
+    parser.add_argument("--chunk-size", type=int, default=4096, help="Rows encoded per write (default: 4096)")
+    args = parser.parse_args(argv)
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be positive")
+
+    if args.command == "info":
+        try:
+            with ResponseStore(args.store) as store:
+                print(f"format version {store.version}, {len(store):,} rows of {store.record_size} bytes, "
+                      f"{store.nbytes():,} bytes on disk")
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        return 0
+
+    if not args.input:
+        parser.error("pack needs an input file")
+    from revim_cli import detect_format, read_responses
+    start = time.perf_counter()
+    src = None
+    try:
+        # The input is opened and its first row checked before the store is created or truncated
+        fmt = detect_format(args.input, args.input_format)
+        if args.input != "-":
+            with open(args.input, "rb") as f:
+                if fmt == "store" or f.read(len(MAGIC)) == MAGIC:
+                    raise ValueError(f"{args.input} is a response store; pack reads CSV or JSON Lines")
+            if os.path.exists(args.store) and os.path.samefile(args.input, args.store):
+                raise ValueError("The input and the store are the same file")
+        src = sys.stdin if args.input == "-" else open(args.input, newline="", encoding="utf-8-sig")
+        rows = read_responses(src, fmt)
+        first = next(rows, None)
+        if first is not None:
+            try:
+                encode_response(first)
+            except ValueError as e:
+                raise ValueError(f"Row 1: {e}") from None
+            rows = chain([first], rows)
+        with ResponseStore(args.store, "a" if args.append else "w") as store:
+            count = store.append(rows, args.chunk_size)
+            total = len(store)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if src is not None and src is not sys.stdin: src.close()
+    elapsed = time.perf_counter() - start
+    print(f"Packed {count} rows in {elapsed:.2f}s ({count / elapsed if elapsed > 0 else float('inf'):,.0f} rows/s); "
+          f"{args.store} now holds {total:,} rows", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
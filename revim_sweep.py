@@ -0,0 +1,99 @@
+import numpy as np
+
+from revim_batch import encode_response, evaluate_batch
+from revim_schema import SENSITIVITY_KEYS
+
+# --- Full-grid sensitivity sweep ---
+# Evaluates one response over the Cartesian grid of the four sensitivity factors
+# (SENSITIVITY_KEYS order) at the sliders' 0.5-1.5 range and 0.05 resolution: 21^4 points.
+#
+# The factors separate: optimism and realization probability only change the per-period net
+# utility and the OCAU, while the base discount rate and risk perception only change the
+# discount rate. The batch engine evaluates each 21x21 half once, and every grid point's NRUPV
+# is then the sum over periods of net utility x discount factor, a single tensor contraction.
+
+SWEEP_VALUES = np.round(np.linspace(0.5, 1.5, 21), 2) # Slider range and resolution
+BASE, OPTIMISM, RISK, REALIZATION = range(4) # Grid axes, in SENSITIVITY_KEYS order
+
+
+class SweepResult:
+    # nrupv, threshold and is_worth_continuing are arrays of shape (len(values[0]), ..., len(values[3]))
+    def __init__(self, values, nrupv, threshold):
+        self.keys = list(SENSITIVITY_KEYS)
+        self.values = values
+        self.nrupv = nrupv
+        self.threshold = threshold
+        self.margin = nrupv - threshold
+        self.is_worth_continuing = nrupv > threshold
+
+        # Decision at the unadjusted point (all factors at the grid value closest to 1.0)
+        self.baseline_index = tuple(int(np.abs(axis - 1.0).argmin()) for axis in values)
+        self.baseline_worth = bool(self.is_worth_continuing[self.baseline_index])
+        # Grid points whose decision differs from the unadjusted one
+        self.flip_mask = self.is_worth_continuing != self.baseline_worth
+        # Grid points with a neighbour (along any axis) on the other side of the decision boundary
+        boundary = np.zeros(nrupv.shape, dtype=bool)
+        for axis in range(nrupv.ndim):
+            change = np.diff(self.is_worth_continuing, axis=axis)
+            lower = [slice(None)] * nrupv.ndim
+            upper = [slice(None)] * nrupv.ndim
+            lower[axis] = slice(None, -1)
+            upper[axis] = slice(1, None)
+            boundary[tuple(lower)] |= change
+            boundary[tuple(upper)] |= change
+        self.boundary_mask = boundary
+
+    @property
+    def flip_fraction(self):
+        return float(self.flip_mask.mean())
+
+    def axis(self, key):
+        return self.keys.index(key) if isinstance(key, str) else key
+
+    # 2D cut through the grid along two factors; the other two are held at the grid values
+    # closest to `fixed` (default 1.0). Returns (x values, y values, margin, is_worth) with the
+    # 2D arrays indexed [y, x].
+    def slice2d(self, x_key, y_key, fixed=None):
+        x_axis, y_axis = self.axis(x_key), self.axis(y_key)
+        if x_axis == y_axis:
+            raise ValueError("The two sweep axes must differ")
+        fixed = fixed or {}
+        index = []
+        for axis, key in enumerate(self.keys):
+            if axis in (x_axis, y_axis):
+                index.append(slice(None))
+            else:
+                index.append(int(np.abs(self.values[axis] - fixed.get(key, 1.0)).argmin()))
+        margin = self.margin[tuple(index)]
+        worth = self.is_worth_continuing[tuple(index)]
+        if x_axis < y_axis: # Remaining axes keep grid order, so put y first
+            margin, worth = margin.T, worth.T
+        return self.values[x_axis], self.values[y_axis], margin, worth
+
+
+# response: dict of answers or ResponseRecord (see revim_model); values: per-factor grid values
+# in SENSITIVITY_KEYS order, each defaulting to SWEEP_VALUES
+def sweep(response, values=None, periods_per_year=1):
+    values = [np.asarray(v, dtype=float) for v in (values or [SWEEP_VALUES] * len(SENSITIVITY_KEYS))]
+    x = encode_response(response)
+
+    # Net utility per period and OCAU over (optimism, realization)
+    o, rp = np.meshgrid(values[OPTIMISM], values[REALIZATION], indexing='ij')
+    flows = evaluate_batch(np.broadcast_to(x, (o.size, x.size)), {
+        "future_projection_optimism_adj": o.ravel(), "realization_prob_adj": rp.ravel(),
+    }, periods_per_year=periods_per_year)
+    # Discount rate per period over (base rate, risk perception)
+    b, r = np.meshgrid(values[BASE], values[RISK], indexing='ij')
+    rates = evaluate_batch(np.broadcast_to(x, (b.size, x.size)), {
+        "base_discount_rate_adj": b.ravel(), "overall_risk_perception_adj": r.ravel(),
+    }, periods_per_year=periods_per_year)
+
+    # Every row shares the response's horizon, so the series have no padding
+    step = np.arange(rates.r_t_series.shape[1])
+    discount = np.power(1 + rates.r_t_series, -(step + 1) / periods_per_year)
+    net = flows.Net_U_t_series
+    nrupv = np.einsum('art,bst->abrs',
+                      discount.reshape(len(values[BASE]), len(values[RISK]), -1),
+                      net.reshape(len(values[OPTIMISM]), len(values[REALIZATION]), -1), optimize=True)
+    threshold = (flows.ocau + flows.sunk_cost_adj).reshape(len(values[OPTIMISM]), len(values[REALIZATION]))
+    return SweepResult(values, nrupv, np.broadcast_to(threshold[None, :, None, :], nrupv.shape))
@@ -0,0 +1,58 @@
+import random
+
+import numpy as np
+import pytest
+
+from revim_batch import encode_responses, evaluate_batch
+from revim_bench import random_response
+from revim_model import SERIES_NAMES, ReVIMCalculator, ResponseRecord
+from revim_schema import SENSITIVITY_KEYS
+
+# The batch engine gives the scalar calculator's numbers, row by row: N/A answers and flags,
+# per-row sensitivity factors and every horizon resolution included.
+
+N = 300
+NA_FLAGS = ("U_bio_5_na", "U_law_1_na", "C_geo_1_na")
+FIELDS = ("nrupv", "T_realistic", "ocau", "u_single", "e_u_alt", "sunk_cost_adj")
+
+
+def close(a, b):
+    return np.allclose(a, b, rtol=1e-9, atol=1e-9)
+
+
+@pytest.fixture(scope="module")
+def responses():
+    rng = random.Random(1)
+    return [random_response(rng, rng.choice(["en", "zh"]), na_rate=0.3) for _ in range(N)]
+
+
+@pytest.fixture(scope="module")
+def sensitivities():
+    rng = random.Random(2)
+    return [{key: round(rng.uniform(0.5, 1.5), 2) for key in SENSITIVITY_KEYS} for _ in range(N)]
+
+
+def test_responses_cover_na_flags(responses):
+    for flag in NA_FLAGS:
+        assert 0 < sum(values[flag] for values in responses) < N
+
+
+@pytest.mark.parametrize("periods_per_year", [1, 4, 12])
+@pytest.mark.parametrize("with_sens", [False, True])
+def test_batch_matches_evaluate(responses, sensitivities, periods_per_year, with_sens):
+    sens = {key: np.array([s[key] for s in sensitivities]) for key in SENSITIVITY_KEYS} if with_sens else None
+    res = evaluate_batch(encode_responses(responses), sens, periods_per_year=periods_per_year)
+    for i, values in enumerate(responses):
+        result = ReVIMCalculator(ResponseRecord(values), sensitivities[i] if with_sens else None,
+                                 periods_per_year=periods_per_year).evaluate()
+        for name in FIELDS:
+            assert close(getattr(res, name)[i], getattr(result, name)), (i, name)
+        assert bool(res.is_worth_continuing[i]) == result.is_worth_continuing, i
+        assert res.periods[i] == len(result.time_periods), i
+        for name in SERIES_NAMES:
+            series = getattr(res, name)
+            series = series[i] if series.ndim == 2 else series # time_periods is shared by all rows
+            assert close(series[:res.periods[i]], getattr(result, name).tolist()), (i, name)
+        for labels, breakdown, scalar in ((res.utility_labels, res.initial_utility_breakdown, result.initial_utility_breakdown),
+                                          (res.cost_labels, res.initial_cost_breakdown, result.initial_cost_breakdown)):
+            assert close(breakdown[i], [scalar[label] for label in labels]), i
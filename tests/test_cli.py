@@ -0,0 +1,22 @@
+import io
+import json
+import random
+
+import pytest
+
+from revim_bench import random_response
+from revim_cli import read_responses, score_rows
+
+
+def jsonl(*rows):
+    return io.StringIO("".join(row if isinstance(row, str) else json.dumps(row) + "\n" for row in rows))
+
+
+@pytest.mark.parametrize("line", ["[]\n", "3\n", '"x"\n', "null\n"])
+def test_non_object_rows(line):
+    response = random_response(random.Random(0))
+    with pytest.raises(ValueError, match="Row 2: expected a JSON object"):
+        list(score_rows(read_responses(jsonl(response, line, response), "jsonl")))
+    scored = list(score_rows(read_responses(jsonl(response, line, response), "jsonl"), skip_invalid=True))
+    assert [error for _, _, error in scored] == [None, "expected a JSON object", None]
+    assert scored[0][1] == scored[2][1]
@@ -0,0 +1,37 @@
+import csv
+import datetime
+import random
+
+from revim_bench import random_response
+from revim_history import EvaluationLog, main, to_timestamp
+
+
+def test_to_timestamp_numeric_strings():
+    assert to_timestamp("1700000000") == 1700000000
+    assert to_timestamp(" 1700000000.5 ") == 1700000000
+    assert to_timestamp("2024-03-01") == int(datetime.datetime(2024, 3, 1).timestamp())
+    assert to_timestamp("2024-03-01", end=True) == int(datetime.datetime(2024, 3, 1).timestamp()) + 86399
+
+
+def test_append_csv_with_epoch_times(tmp_path):
+    rng = random.Random(0)
+    times = [1700000000, 1700086400.5, 1700172800]
+    rows = []
+    for person in ("A", "B"):
+        for t in times:
+            row = random_response(rng, rng.choice(["en", "zh"]))
+            row.update(client_id=person, taken_at=str(t))
+            rows.append(row)
+    path = tmp_path / "responses.csv"
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+    log_path = str(tmp_path / "clients.log")
+    assert main(["append", log_path, str(path), "--person-column", "client_id", "--time-column", "taken_at"]) == 0
+
+    log = EvaluationLog(log_path)
+    assert len(log) == 6
+    assert log.history("A")["time"].tolist() == [int(t) for t in times]
+    assert log.history("B", "1700086400", "1700172799")["time"].tolist() == [1700086400]
@@ -0,0 +1,64 @@
+import random
+
+import numpy as np
+import pytest
+
+from revim_batch import encode_responses, evaluate_batch
+from revim_bench import gui_option_lists, random_response
+from revim_cli import score_rows
+from revim_model import SERIES_NAMES, ReVIMCalculator, ResponseRecord
+from revim_schema import OPTION_LABELS, SLOTS
+
+# A response answered in either GUI, or with labels of both mixed, scores the same in the
+# scalar calculator (in either report language) and in the batch engine.
+
+GUI_OPTIONS = {lang: gui_option_lists(lang) for lang in ("en", "zh")}
+LABEL_SETS = ("en", "zh", "mixed")
+FIELDS = ("nrupv", "T_realistic", "ocau", "u_single", "e_u_alt", "sunk_cost_adj", "is_worth_continuing")
+
+
+def relabel(values, labels):
+    # values answered with the English GUI's options, relabelled with those of `labels`
+    out = dict(values)
+    for n, (key, kind, _) in enumerate(SLOTS):
+        if kind in GUI_OPTIONS["en"]:
+            target = labels if labels != "mixed" else ("en", "zh")[n % 2]
+            out[key] = GUI_OPTIONS[target][kind][GUI_OPTIONS["en"][kind].index(values[key])]
+    return out
+
+
+@pytest.fixture(scope="module")
+def responses():
+    rng = random.Random(17)
+    return [random_response(rng, "en") for _ in range(200)]
+
+
+def test_gui_options_match_label_tables():
+    for lang, lists in GUI_OPTIONS.items():
+        assert lists == OPTION_LABELS[lang]
+
+
+def test_evaluate_identical_across_labels(responses):
+    for values in responses:
+        results = []
+        for lang in ("en", "zh"):
+            for labels in LABEL_SETS:
+                result = ReVIMCalculator(ResponseRecord(relabel(values, labels)), lang=lang).evaluate()
+                # The breakdowns' keys are localized, so their values are compared
+                results.append([getattr(result, name) for name in FIELDS] + [getattr(result, name).tolist() for name in SERIES_NAMES]
+                               + [list(result.initial_utility_breakdown.values()), list(result.initial_cost_breakdown.values())])
+        assert all(result == results[0] for result in results[1:]), values
+
+
+def test_batch_identical_across_labels(responses):
+    batches = []
+    for labels in LABEL_SETS:
+        rows = [relabel(values, labels) for values in responses]
+        res = evaluate_batch(encode_responses(rows))
+        scores = [result for _, result, _ in score_rows(rows)]
+        batches.append((res, scores))
+    first, first_scores = batches[0]
+    for res, scores in batches[1:]:
+        for name in FIELDS + SERIES_NAMES + ("initial_utility_breakdown", "initial_cost_breakdown"):
+            assert np.array_equal(getattr(res, name), getattr(first, name), equal_nan=True), name
+        assert scores == first_scores